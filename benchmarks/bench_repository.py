@@ -0,0 +1,323 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+"""
+Benchmark of `kicad-repository` build hook on synthetic repositories.
+
+Each scenario merges freshly built package into `packages.json` holding
+given total number of versions with realistic metadata, then times
+`KicadRepositoryHook.finalize` (cold and unchanged rerun), each of its
+`create_*` steps, size of produced files and peak traced memory.
+
+    python benchmarks/bench_repository.py --output baseline.json
+    python benchmarks/bench_repository.py --compare baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+from hatch_kicad.build import KicadBuilder, get_package_metadata
+from hatch_kicad.repository import KicadRepositoryHook
+
+SIZES = [1, 100, 5000]
+VERSIONS_PER_PACKAGE = 10
+STEPS = [
+    "place_artifact",
+    "keep_referenced_artifacts",
+    "create_packages_file",
+    "create_resources_file",
+    "create_repository_file",
+    "create_index_html",
+    "create_static_pages",
+    "remove_stale_files",
+]
+# timings shorter than this are too noisy to be compared with baseline
+MIN_COMPARED_TIME = 0.001
+REPOSITORY_URL = "https://example.com/kicad"
+# tiny valid PNG, content of icons does not matter for the hook
+ICON = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000001e221bc330000000049454e44ae426082"
+)
+DESCRIPTION_FULL = (
+    "This plugin automates a tedious part of the PCB design workflow. "
+    "It can be run from the toolbar or from the external plugins menu. "
+    "See https://github.com/example/plugin for documentation.\n"
+) * 4
+
+
+def synthetic_packages(versions: int) -> list[dict[str, Any]]:
+    """
+    Returns `packages.json` packages holding `versions` versions in total.
+    """
+    packages: list[dict[str, Any]] = []
+    for i in range(versions):
+        if i % VERSIONS_PER_PACKAGE == 0:
+            n = len(packages)
+            packages.append(
+                {
+                    "$schema": "https://go.kicad.org/pcm/schemas/v2",
+                    "name": f"Plugin {n}",
+                    "description": f"Synthetic plugin number {n} for benchmarks",
+                    "description_full": DESCRIPTION_FULL,
+                    "identifier": f"example-plugin-{n}",
+                    "type": "plugin",
+                    "author": {
+                        "name": f"Author {n}",
+                        "contact": {"web": f"https://github.com/author{n}"},
+                    },
+                    "license": "MIT",
+                    "resources": {"Github": f"https://github.com/example/plugin-{n}"},
+                    "tags": ["pcbnew", "automation", f"tag{n % 7}"],
+                    "versions": [],
+                }
+            )
+        package = packages[-1]
+        v = len(package["versions"])
+        zip_name = f"plugin-{len(packages) - 1}-0.{v}.zip"
+        package["versions"].insert(
+            0,
+            {
+                "version": f"0.{v}",
+                "status": "stable" if v % 3 else "testing",
+                "kicad_version": ["6.0", "7.0", "8.0"][v % 3],
+                "download_sha256": hashlib.sha256(zip_name.encode()).hexdigest(),
+                "download_size": 20000 + 37 * v,
+                "download_url": f"{REPOSITORY_URL}/{zip_name}",
+                "install_size": 65000 + 101 * v,
+            },
+        )
+    return packages
+
+
+def project_config(root: Path) -> dict[str, Any]:
+    return {
+        "project": {"name": "benchmark-plugin", "version": "1.0.0"},
+        "tool": {
+            "hatch": {
+                "build": {
+                    "targets": {
+                        "kicad-package": {
+                            "reproducible": True,
+                            "icon": str(root / "icon.png"),
+                            "name": "Benchmark plugin",
+                            "description": "Package built by benchmark",
+                            "description_full": DESCRIPTION_FULL,
+                            "author": {"name": "bench", "email": "bench@example.com"},
+                            "identifier": "benchmark-plugin",
+                            "license": "MIT",
+                            "download_url": f"{REPOSITORY_URL}/{{zip_name}}",
+                            "status": "stable",
+                            "kicad_version": "8.0",
+                        }
+                    }
+                }
+            }
+        },
+    }
+
+
+def make_hook(root: Path) -> tuple[KicadRepositoryHook, str]:
+    """
+    Returns hook instance for project in `root` and path of its artifact.
+    """
+    config = KicadBuilder(str(root), config=project_config(root)).config
+    hook = KicadRepositoryHook(
+        str(root),
+        {"repository_url": REPOSITORY_URL, "merge_packages": True},
+        config,
+        None,
+        str(root / "dist"),
+        "",
+    )
+    return hook, str(root / "dist" / config.zip_name)
+
+
+def setup(root: Path, versions: int) -> tuple[KicadRepositoryHook, str]:
+    """
+    Prepare project in `root` which `dist` directory contains built package
+    and `dist/repository` holds previous `packages.json`, so that merged
+    repository has `versions` versions in total.
+    """
+    (root / "icon.png").write_bytes(ICON)
+    dist = root / "dist"
+    repository = dist / "repository"
+    repository.mkdir(parents=True)
+    hook, artifact = make_hook(root)
+
+    with zipfile.ZipFile(artifact, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("plugins/__init__.py", "from .plugin import *\n")
+        z.writestr("resources/icon.png", ICON)
+    config = hook.build_config
+    metadata = config.get_metadata()
+    metadata["versions"][0].update(get_package_metadata(artifact))
+    metadata["versions"][0]["download_url"] = config.download_url
+    (dist / "metadata.json").write_text(json.dumps(metadata), encoding="utf-8")
+
+    previous = {"packages": synthetic_packages(versions - 1)}
+    (repository / "packages.json").write_text(json.dumps(previous), encoding="utf-8")
+    return hook, artifact
+
+
+def instrument(hook: KicadRepositoryHook, timings: dict[str, float]) -> None:
+    """
+    Replace `STEPS` methods of `hook` instance with wrappers
+    accumulating their run time in `timings`.
+    """
+    for name in STEPS:
+        method = getattr(hook, name)
+
+        def _timed(*args, _method=method, _name=name, **kwargs):
+            start = time.perf_counter()
+            try:
+                return _method(*args, **kwargs)
+            finally:
+                timings[_name] += time.perf_counter() - start
+
+        setattr(hook, name, _timed)
+
+
+def run_once(versions: int) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as d:
+        root = Path(d)
+        hook, artifact = setup(root, versions)
+        timings: dict[str, float] = defaultdict(float)
+        instrument(hook, timings)
+
+        start = time.perf_counter()
+        hook.finalize("", {}, artifact)
+        finalize = time.perf_counter() - start
+
+        # rerun with nothing changed measures the incremental path
+        hook, artifact = make_hook(root)
+        start = time.perf_counter()
+        hook.finalize("", {}, artifact)
+        finalize_warm = time.perf_counter() - start
+
+        repository = root / "dist" / "repository"
+        return {
+            "finalize": finalize,
+            "finalize_warm": finalize_warm,
+            "steps": dict(timings),
+            "packages_json_size": os.path.getsize(repository / "packages.json"),
+            "index_html_size": os.path.getsize(repository / "index.html"),
+        }
+
+
+def peak_memory(versions: int) -> int:
+    with tempfile.TemporaryDirectory() as d:
+        hook, artifact = setup(Path(d), versions)
+        tracemalloc.start()
+        try:
+            hook.finalize("", {}, artifact)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+
+def benchmark(sizes: list[int], repeat: int) -> dict[str, Any]:
+    results = {}
+    for versions in sizes:
+        runs = [run_once(versions) for _ in range(repeat)]
+        result = {
+            "finalize": statistics.median(r["finalize"] for r in runs),
+            "finalize_warm": statistics.median(r["finalize_warm"] for r in runs),
+            "steps": {
+                step: statistics.median(r["steps"].get(step, 0.0) for r in runs)
+                for step in STEPS
+            },
+            "packages_json_size": runs[0]["packages_json_size"],
+            "index_html_size": runs[0]["index_html_size"],
+            "peak_memory": peak_memory(versions),
+        }
+        results[str(versions)] = result
+        print(  # noqa: T201
+            f"{versions:>6} versions: finalize {result['finalize']:.4f}s"
+            f", unchanged {result['finalize_warm']:.4f}s"
+            f", peak memory {result['peak_memory'] / 2**20:.1f} MiB",
+            file=sys.stderr,
+        )
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def flatten(result: dict[str, Any]) -> dict[str, float]:
+    values = {k: v for k, v in result.items() if k != "steps"}
+    values.update({f"steps.{k}": v for k, v in result.get("steps", {}).items()})
+    return values
+
+
+def compare(
+    current: dict[str, Any], baseline: dict[str, Any], threshold: float
+) -> list[str]:
+    """
+    Returns descriptions of metrics which are more than `threshold` times
+    worse than in `baseline`.
+    """
+    regressions = []
+    for versions, result in current["results"].items():
+        previous = flatten(baseline["results"].get(versions, {}))
+        for metric, value in flatten(result).items():
+            old = previous.get(metric)
+            if not old or (isinstance(value, float) and value < MIN_COMPARED_TIME):
+                continue
+            ratio = value / old
+            line = (
+                f"{versions:>6} {metric:<35} {old:>14.4f} {value:>14.4f} {ratio:>6.2f}x"
+            )
+            print(line, file=sys.stderr)  # noqa: T201
+            if ratio > threshold:
+                regressions.append(line)
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", help="store results as JSON baseline")
+    parser.add_argument("-c", "--compare", help="baseline JSON to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="ratio to baseline reported as regression (default: 1.25)",
+    )
+    args = parser.parse_args(argv)
+
+    current = benchmark(args.sizes, args.repeat)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=4)
+    else:
+        print(json.dumps(current, indent=4))  # noqa: T201
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if regressions := compare(current, baseline, args.threshold):
+            print("Regressions:", *regressions, sep="\n")  # noqa: T201
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,8 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+import sys
+
+from hatch_kicad.cli import main
+
+sys.exit(main())
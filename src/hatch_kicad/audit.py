@@ -0,0 +1,240 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, TypedDict
+from urllib.parse import urlparse
+
+from hatch_kicad.repository import iter_packages_file
+from hatch_kicad.utils import get_cache_dir, getsha256
+
+__all__ = ["audit"]
+
+
+class ArtifactInfo(TypedDict):
+    size: int
+    mtime_ns: int
+    sha256: str
+    install_size: int | None
+    # content of embedded `metadata.json`, None when missing or invalid
+    metadata: dict[str, Any] | None
+
+
+class AuditError(TypedDict):
+    identifier: str
+    version: str
+    file: str
+    message: str
+
+
+class AuditReport(TypedDict):
+    repository: str
+    artifacts: int
+    hashed: int
+    cached: int
+    skipped: list[str]
+    errors: list[AuditError]
+
+
+def inspect_artifact(path: str) -> ArtifactInfo:
+    """
+    Hash `path` and read install size and `metadata.json` from its
+    central directory. Runs in worker process.
+    """
+    stat = os.stat(path)
+    info: ArtifactInfo = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": getsha256(path),
+        "install_size": None,
+        "metadata": None,
+    }
+    with contextlib.suppress(zipfile.BadZipFile, OSError):
+        with zipfile.ZipFile(path) as z:
+            info["install_size"] = sum(
+                entry.file_size for entry in z.infolist() if not entry.is_dir()
+            )
+            with contextlib.suppress(KeyError, ValueError):
+                info["metadata"] = json.loads(z.read("metadata.json"))
+    return info
+
+
+def local_name(url: str) -> str:
+    return Path(urlparse(url).path).name
+
+
+def default_cache(directory: str) -> str:
+    """
+    Returns path of hash cache of repository `directory` in user cache
+    directory, audited directory itself may be read-only or published.
+    """
+    key = hashlib.sha256(os.path.abspath(directory).encode()).hexdigest()[:16]
+    return os.path.join(get_cache_dir("audit"), f"{key}.json")
+
+
+def read_cache(cache: str) -> dict[str, ArtifactInfo]:
+    try:
+        with open(cache, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def compare_metadata(
+    identifier: str, version: dict[str, Any], embedded: dict[str, Any] | None
+) -> list[str]:
+    if embedded is None:
+        return ["artifact does not contain valid `metadata.json`"]
+    messages = []
+    if embedded.get("identifier") != identifier:
+        messages.append(
+            f"embedded `identifier` is {embedded.get('identifier')!r}, "
+            f"index has {identifier!r}"
+        )
+    embedded_version = (embedded.get("versions") or [{}])[0]
+    for key, value in embedded_version.items():
+        if version.get(key) != value:
+            messages.append(
+                f"embedded `versions[0].{key}` is {value!r}, "
+                f"index has {version.get(key)!r}"
+            )
+    return messages
+
+
+def audit(
+    directory: str, jobs: int | None = None, cache: str | None = None
+) -> AuditReport:
+    """
+    Check every artifact referenced by `packages.json` of repository
+    `directory` against its `versions` entry, hashing artifacts in process
+    pool. `packages.json` is streamed, only versions referencing local
+    artifacts are kept. Results of hashing are kept in `cache` file and reused for files
+    with unchanged size and modification time. Cache is best-effort,
+    failure to write it does not fail the audit.
+    """
+    cache = cache or default_cache(directory)
+    errors: list[AuditError] = []
+
+    def error(message: str, file: str, identifier: str = "", version: str = ""):
+        errors.append(
+            {
+                "identifier": identifier,
+                "version": version,
+                "file": file,
+                "message": message,
+            }
+        )
+
+    with open(os.path.join(directory, "repository.json"), encoding="utf-8") as f:
+        repository = json.load(f)
+    outputs = {}
+    for key, default in [("packages", "packages.json"), ("resources", "resources.zip")]:
+        entry = repository.get(key, {})
+        name = local_name(entry.get("url", "")) or default
+        outputs[key] = os.path.join(directory, name)
+        try:
+            if getsha256(outputs[key]) != entry.get("sha256"):
+                error(f"sha256 does not match `repository.json` {key}", name)
+        except OSError as e:
+            error(str(e), name)
+    base_url = repository.get("packages", {}).get("url", "").rsplit("/", 1)[0]
+
+    # artifact name to list of `(identifier, version)` referencing it
+    references: dict[str, list[tuple[str, dict[str, Any]]]] = {}
+    identifiers = []
+    skipped = []
+    try:
+        for package in iter_packages_file(outputs["packages"]):
+            identifier = package.get("identifier", "")
+            identifiers.append(identifier)
+            for version in package.get("versions", []):
+                url = version.get("download_url", "")
+                name = local_name(url)
+                if name and os.path.isfile(os.path.join(directory, name)):
+                    references.setdefault(name, []).append((identifier, version))
+                elif base_url and url.startswith(f"{base_url}/"):
+                    error(
+                        "artifact is missing",
+                        name,
+                        identifier,
+                        version.get("version", ""),
+                    )
+                else:
+                    skipped.append(url)
+    except ValueError as e:
+        error(f"malformed packages file: {e}", os.path.basename(outputs["packages"]))
+    except OSError:
+        # already reported when hashing
+        pass
+
+    previous = read_cache(cache)
+    results: dict[str, ArtifactInfo] = {}
+    to_hash = []
+    for name in sorted(references):
+        stat = os.stat(os.path.join(directory, name))
+        cached = previous.get(name)
+        if (
+            cached
+            and cached["size"] == stat.st_size
+            and cached["mtime_ns"] == stat.st_mtime_ns
+        ):
+            results[name] = cached
+        else:
+            to_hash.append(name)
+    if to_hash:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            paths = [os.path.join(directory, name) for name in to_hash]
+            for name, info in zip(to_hash, executor.map(inspect_artifact, paths)):
+                results[name] = info
+
+    for name, info in sorted(results.items()):
+        for identifier, version in references[name]:
+            version_str = version.get("version", "")
+            expected = {
+                "download_sha256": info["sha256"],
+                "download_size": info["size"],
+                "install_size": info["install_size"],
+            }
+            for key, value in expected.items():
+                if version.get(key) != value:
+                    error(
+                        f"`{key}` is {version.get(key)!r}, artifact has {value!r}",
+                        name,
+                        identifier,
+                        version_str,
+                    )
+            for message in compare_metadata(identifier, version, info["metadata"]):
+                error(message, name, identifier, version_str)
+
+    try:
+        with zipfile.ZipFile(outputs["resources"]) as z:
+            icons = set(z.namelist())
+    except (OSError, zipfile.BadZipFile):
+        icons = set()
+    for identifier in identifiers:
+        if f"{identifier}/icon.png" not in icons:
+            error(
+                "icon is missing from resources",
+                os.path.basename(outputs["resources"]),
+                identifier,
+            )
+
+    with contextlib.suppress(OSError), open(cache, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4, sort_keys=True)
+
+    return {
+        "repository": directory,
+        "artifacts": len(results),
+        "hashed": len(to_hash),
+        "cached": len(results) - len(to_hash),
+        "skipped": sorted(set(skipped)),
+        "errors": errors,
+    }
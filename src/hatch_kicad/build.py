@@ -5,14 +5,27 @@ from __future__ import annotations
 
 import json
 import os
+import tempfile
 import zipfile
 from pathlib import Path
 from typing import Any, Callable, TypedDict
 
 from hatchling.builders.plugin.interface import BuilderInterface
 
-from hatch_kicad.config import Compatibility, KicadBuilderConfig
-from hatch_kicad.utils import getsha256
+from hatch_kicad.bytecode import compile_bytecode
+from hatch_kicad.config import Compatibility, KicadBuilderConfig, Slim, Wheelhouse
+from hatch_kicad.progress import Progress
+from hatch_kicad.report import format_size_report, size_report
+from hatch_kicad.slim import is_excluded, slim_files
+from hatch_kicad.utils import get_cache_dir, getsha256
+from hatch_kicad.wheels import (
+    BUNDLED_WHEELHOUSE,
+    cache_wheels,
+    extract_wheels,
+    iter_wheel_files,
+    lock_requirements,
+    resolve_wheels,
+)
 from hatch_kicad.zip import ZipArchive
 
 __all__ = ["KicadBuilder"]
@@ -25,8 +38,10 @@ class PackageMetadata(TypedDict):
 
 
 def get_package_metadata(filename) -> PackageMetadata:
-    z = zipfile.ZipFile(filename, "r")
-    install_size = sum(entry.file_size for entry in z.infolist() if not entry.is_dir())
+    with zipfile.ZipFile(filename, "r") as z:
+        install_size = sum(
+            entry.file_size for entry in z.infolist() if not entry.is_dir()
+        )
     return {
         "download_sha256": getsha256(filename),
         "download_size": os.path.getsize(filename),
@@ -56,31 +71,48 @@ class KicadBuilder(BuilderInterface):
             )
 
         try:
+            json_format = self.config.json_format
             metadata: dict[str, Any] = self.config.get_metadata()
-            with open(metadata_target, "w") as f:
-                json.dump(metadata, f, indent=4)
-
-            found_plugin_files = False
-            with ZipArchive(zip_target, reproducible=self.config.reproducible) as zipf:
-                for file in self.recurse_included_files():
-                    # require at least one *.py file, otherwise assume that
-                    # user made an mistake in configuration
-                    if not found_plugin_files and file.relative_path.endswith(".py"):
-                        found_plugin_files = True
-                    zipf.write(file.path, f"plugins/{file.distribution_path}")
-                zipf.write(self.config.icon, "resources/icon.png")
-                zipf.write(metadata_target, "metadata.json")
-                if self.config.compatibility == Compatibility.IPC:
-                    ipc_metadata = self.config.get_ipc_plugin_data()
-                    plugin_json_target = Path(zip_target.parent, "plugin.json")
-                    with open(plugin_json_target, "w") as f:
-                        json.dump(ipc_metadata, f, indent=4)
-                    zipf.write(plugin_json_target, "plugins/plugin.json")
-
-            if not found_plugin_files:
+            with open(metadata_target, "w", encoding="utf-8") as f:
+                f.write(json_format.dumps(metadata))
+
+            files = [
+                (file.path, f"plugins/{file.distribution_path}")
+                for file in self.recurse_included_files()
+            ]
+            if slim := self.config.slim:
+                files = self.apply_slim(files, slim, directory)
+            # require at least one included *.py file (vendored packages
+            # do not count), otherwise assume that user made an mistake
+            # in configuration
+            if not any(arcname.endswith(".py") for _, arcname in files):
                 self.app.display_error(
                     "No plugin files found, please check your configuration"
                 )
+            if vendor := self.config.vendor:
+                files.extend(
+                    self.get_vendored_files(vendor, [arcname for _, arcname in files])
+                )
+            sources = [
+                (path, arcname) for path, arcname in files if arcname.endswith(".py")
+            ]
+            with tempfile.TemporaryDirectory() as tmp:
+                entries = list(files)
+                if self.config.bytecode and sources:
+                    entries += compile_bytecode(sources, self.config.bytecode, tmp)
+                entries.append((str(self.config.icon), "resources/icon.png"))
+                entries.append((str(metadata_target), "metadata.json"))
+                if self.config.compatibility == Compatibility.IPC:
+                    ipc_metadata = self.config.get_ipc_plugin_data()
+                    plugin_json_target = Path(zip_target.parent, "plugin.json")
+                    with open(plugin_json_target, "w", encoding="utf-8") as f:
+                        f.write(json_format.dumps(ipc_metadata))
+                    entries.append((str(plugin_json_target), "plugins/plugin.json"))
+                    if bundle := self.config.bundle_wheels:
+                        entries += self.get_bundled_wheels(
+                            bundle, directory, [arcname for _, arcname in files]
+                        )
+                self.write_archive(zip_target, entries)
 
             calculated_meta = get_package_metadata(zip_target)
             self.app.display_info("package details:")
@@ -90,10 +122,127 @@ class KicadBuilder(BuilderInterface):
             package_version.update(calculated_meta)
             package_version.update({"download_url": self.config.download_url})
             # update with calculated metadata
-            with open(metadata_target, "w") as f:
-                json.dump(metadata, f, indent=4)
+            with open(metadata_target, "w", encoding="utf-8") as f:
+                f.write(json_format.dumps(metadata))
         except Exception as e:
             self.app.display_error(str(e))
             self.app.abort("Build failed!")
 
         return os.fspath(zip_target)
+
+    def write_archive(self, target: Path, entries: list[tuple[str, str]]) -> None:
+        """
+        Write `(path, arcname)` entries to `target` archive,
+        progress of long running builds is reported periodically.
+        Per member sizes are written to `size-report.json` and `size-report.txt`
+        when `size_report` enabled.
+        """
+        progress = Progress(
+            len(entries),
+            sum(os.path.getsize(path) for path, _ in entries),
+            self.app.display_info,
+        )
+        with ZipArchive(
+            target, reproducible=self.config.reproducible, progress=progress
+        ) as zipf:
+            for path, arcname in entries:
+                zipf.write(path, arcname)
+        if self.config.size_report:
+            report = size_report(zipf.members, os.path.getsize(target))
+            with open(target.with_name("size-report.json"), "w", encoding="utf-8") as f:
+                f.write(self.config.json_format.dumps(report))
+            with open(target.with_name("size-report.txt"), "w", encoding="utf-8") as f:
+                f.write(format_size_report(report))
+
+    def apply_slim(
+        self, files: list[tuple[str, str]], slim: Slim, directory: str
+    ) -> list[tuple[str, str]]:
+        """
+        Drop excluded files and replace python sources with slimmed ones.
+        Mapping of slimmed files to their sources is written to `slim-map.json`.
+        """
+        excluded = [
+            arcname
+            for _, arcname in files
+            if is_excluded(arcname.removeprefix("plugins/"), slim["exclude"])
+        ]
+        files = [(path, arcname) for path, arcname in files if arcname not in excluded]
+        slimmed = slim_files(
+            [(path, arcname) for path, arcname in files if arcname.endswith(".py")],
+            get_cache_dir("slim"),
+            strip_docstrings=slim["strip_docstrings"],
+        )
+        slim_map = {
+            "files": {
+                arcname: {
+                    "source": os.path.relpath(path, self.root).replace(os.sep, "/"),
+                    "sha256": slimmed[arcname]["sha256"],
+                    "size": slimmed[arcname]["size"],
+                    "slim_size": slimmed[arcname]["slim_size"],
+                }
+                for path, arcname in files
+                if arcname in slimmed
+            },
+            "excluded": excluded,
+        }
+        with open(Path(directory, "slim-map.json"), "w", encoding="utf-8") as f:
+            f.write(self.config.json_format.dumps(slim_map))
+        return [
+            (slimmed[arcname]["path"] if arcname in slimmed else path, arcname)
+            for path, arcname in files
+        ]
+
+    def get_vendored_files(
+        self, vendor: Wheelhouse, arcnames: list[str]
+    ) -> list[tuple[str, str]]:
+        """
+        Resolve requirements against local wheelhouse and return files
+        of extracted pure Python wheels placed in `plugins/_vendor`.
+        """
+        if any(a.startswith("plugins/_vendor/") for a in arcnames):
+            msg = "Included files conflict with `plugins/_vendor` generated by `vendor`"
+            raise ValueError(msg)
+        wheels = resolve_wheels(vendor["requirements"], vendor["wheelhouse"], pure=True)
+        for wheel in wheels:
+            self.app.display_info(f"vendoring {wheel.name} {wheel.version}")
+        files: list[tuple[str, str]] = []
+        for extracted in extract_wheels(wheels, get_cache_dir("wheels")):
+            files.extend(
+                (path, f"plugins/_vendor/{relpath}")
+                for path, relpath in iter_wheel_files(extracted)
+            )
+        return files
+
+    def get_bundled_wheels(
+        self, bundle: Wheelhouse, directory: str, arcnames: list[str]
+    ) -> list[tuple[str, str]]:
+        """
+        Resolve requirements against local wheelhouse and shared wheel cache,
+        write pinned `requirements.txt` installing them without network
+        and return it together with wheels to be placed in plugin directory.
+        """
+        lockfile = "plugins/requirements.txt"
+        if lockfile in arcnames or any(
+            a.startswith(f"plugins/{BUNDLED_WHEELHOUSE}/") for a in arcnames
+        ):
+            msg = (
+                f"Included files conflict with `{lockfile}` or "
+                f"`plugins/{BUNDLED_WHEELHOUSE}` generated by `bundle_wheels`"
+            )
+            raise ValueError(msg)
+        cache_dir = get_cache_dir("wheelhouse")
+        wheels = resolve_wheels(
+            bundle["requirements"], [bundle["wheelhouse"], cache_dir], variants=True
+        )
+        cache_wheels(wheels, cache_dir)
+        for wheel in wheels:
+            self.app.display_info(f"bundling {os.path.basename(wheel.path)}")
+        lockfile_target = Path(directory, "requirements.txt")
+        with open(lockfile_target, "w", encoding="utf-8") as f:
+            f.write(lock_requirements(wheels, BUNDLED_WHEELHOUSE))
+        files = [(str(lockfile_target), lockfile)]
+        files.extend(
+            (w.path, f"plugins/{BUNDLED_WHEELHOUSE}/{os.path.basename(w.path)}")
+            for w in wheels
+        )
+        return files
@@ -0,0 +1,103 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePosixPath
+
+__all__ = ["compile_bytecode", "find_interpreter"]
+
+# executed by target interpreter, compiles `[source, cfile, dfile]` items read
+# from stdin; checked-hash pycs do not depend on source modification time
+COMPILE_SCRIPT = """
+import json, py_compile, sys
+for source, cfile, dfile in json.load(sys.stdin):
+    py_compile.compile(
+        source,
+        cfile=cfile,
+        dfile=dfile,
+        doraise=True,
+        invalidation_mode=py_compile.PycInvalidationMode.CHECKED_HASH,
+    )
+"""
+CACHE_TAG_SCRIPT = "import sys; print(sys.implementation.cache_tag)"
+
+
+def find_interpreter(version: str) -> str:
+    """
+    Returns path of Python `version` (in `X.Y` format) interpreter,
+    the running interpreter is preferred, others are looked up in PATH.
+    """
+    if version == f"{sys.version_info.major}.{sys.version_info.minor}":
+        return sys.executable
+    interpreter = shutil.which(f"python{version}")
+    if not interpreter:
+        msg = f"Python {version} interpreter (`python{version}`) not found in PATH"
+        raise ValueError(msg)
+    return interpreter
+
+
+def pyc_name(arcname: str, cache_tag: str) -> str:
+    """
+    Returns archive name of bytecode of `arcname` source in `__pycache__` layout.
+    """
+    path = PurePosixPath(arcname)
+    return str(path.parent / "__pycache__" / f"{path.stem}.{cache_tag}.pyc")
+
+
+def run(interpreter: str, script: str, data: str = "") -> str:
+    result = subprocess.run(  # noqa: S603
+        [interpreter, "-I", "-c", script],
+        input=data,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode:
+        msg = f"Bytecode compilation with `{interpreter}` failed:\n{result.stderr}"
+        raise RuntimeError(msg)
+    return result.stdout.strip()
+
+
+def compile_bytecode(
+    sources: list[tuple[str, str]],
+    versions: list[str],
+    directory: str,
+    jobs: int | None = None,
+) -> list[tuple[str, str]]:
+    """
+    Compile `(path, arcname)` sources for each of Python `versions` into
+    `directory`. Sources are split between `jobs` interpreter processes
+    running in parallel. Returns `(path, arcname)` list of compiled files,
+    sorted by archive name.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    items: dict[str, list[list[str]]] = {}
+    compiled = []
+    for version in versions:
+        interpreter = find_interpreter(version)
+        cache_tag = run(interpreter, CACHE_TAG_SCRIPT)
+        for path, arcname in sources:
+            name = pyc_name(arcname, cache_tag)
+            cfile = os.path.join(directory, name)
+            # traceback paths are relative to plugin installation directory
+            dfile = str(PurePosixPath(arcname).relative_to("plugins"))
+            items.setdefault(interpreter, []).append([path, cfile, dfile])
+            compiled.append((cfile, name))
+
+    chunks = [
+        (interpreter, json.dumps(group[i::jobs]))
+        for interpreter, group in items.items()
+        for i in range(min(jobs, len(group)))
+    ]
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        list(
+            executor.map(lambda chunk: run(chunk[0], COMPILE_SCRIPT, chunk[1]), chunks)
+        )
+    return sorted(compiled, key=lambda item: item[1])
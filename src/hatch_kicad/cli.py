@@ -0,0 +1,176 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import zipfile
+
+from hatch_kicad.audit import audit
+from hatch_kicad.diff import diff_archives
+from hatch_kicad.serve import load, make_server
+from hatch_kicad.verify import verify
+
+DEFAULT_REPOSITORY = "dist/repository"
+
+
+def serve_command(args: argparse.Namespace) -> int:
+    server = make_server(args.directory, args.bind, args.port, quiet=args.quiet)
+    host, port = server.server_address[:2]
+    if isinstance(host, bytes):
+        host = host.decode()
+    print(f"Serving {args.directory} at http://{host}:{port}/")  # noqa: T201
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def load_command(args: argparse.Namespace) -> int:
+    result = load(args.url, args.clients, args.requests, args.interval, args.timeout)
+    print(json.dumps(result, indent=4))  # noqa: T201
+    return 1 if result["errors"] else 0
+
+
+def verify_command(args: argparse.Namespace) -> int:
+    metadata = args.metadata or os.path.join(
+        os.path.dirname(args.artifact), "metadata.json"
+    )
+    try:
+        result = verify(args.artifact, metadata, args.jobs)
+    except zipfile.BadZipFile as e:
+        print(f"{args.artifact}: {e}")  # noqa: T201
+        return 1
+    for name, error in result["corrupted"].items():
+        print(f"{args.artifact}: {name}: {error}")  # noqa: T201
+    for key, (expected, actual) in result["mismatched"].items():
+        print(  # noqa: T201
+            f"{metadata}: `{key}` is {expected!r}, artifact has {actual!r}"
+        )
+    if result["corrupted"] or result["mismatched"]:
+        return 1
+    print(f"{args.artifact}: OK")  # noqa: T201
+    return 0
+
+
+def audit_command(args: argparse.Namespace) -> int:
+    report = audit(args.directory, args.jobs, args.cache)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))  # noqa: T201
+    return 1 if report["errors"] else 0
+
+
+def diff_command(args: argparse.Namespace) -> int:
+    try:
+        result = diff_archives(
+            args.old, args.new, ignore_timestamps=args.ignore_timestamps
+        )
+    except zipfile.BadZipFile as e:
+        print(f"{e}")  # noqa: T201
+        return 2
+    if args.json:
+        print(json.dumps(result, indent=4))  # noqa: T201
+    else:
+        for name in result["added"]:
+            print(f"+ {name}")  # noqa: T201
+        for name in result["removed"]:
+            print(f"- {name}")  # noqa: T201
+        for name, fields in result["changed"].items():
+            print(f"~ {name} ({', '.join(fields)})")  # noqa: T201
+        for name, values in result["embedded"].items():
+            for path, (old, new) in values.items():
+                print(f"{name}: {path}: {old!r} -> {new!r}")  # noqa: T201
+        if result["reordered"]:
+            print("members are stored in different order")  # noqa: T201
+    differs = any(
+        result[k] for k in ("added", "removed", "changed", "embedded", "reordered")
+    )
+    if args.reproducible and not differs and not result["identical"]:
+        if not args.json:
+            print("archives are not byte identical")  # noqa: T201
+        return 1
+    return 1 if differs else 0
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="hatch-kicad", description="Tools for KiCad plugin repositories"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve = subparsers.add_parser(
+        "serve", help="serve repository generated by `kicad-repository` hook"
+    )
+    serve.add_argument("directory", nargs="?", default=DEFAULT_REPOSITORY)
+    serve.add_argument("-b", "--bind", default="127.0.0.1")
+    serve.add_argument("-p", "--port", type=int, default=8000)
+    serve.add_argument("-q", "--quiet", action="store_true", help="disable access log")
+    serve.set_defaults(func=serve_command)
+
+    load_ = subparsers.add_parser(
+        "load", help="simulate many package managers polling repository"
+    )
+    load_.add_argument("url", help="for example http://127.0.0.1:8000/repository.json")
+    load_.add_argument("-c", "--clients", type=int, default=10)
+    load_.add_argument(
+        "-n", "--requests", type=int, default=100, help="requests per client"
+    )
+    load_.add_argument(
+        "-i", "--interval", type=float, default=0.0, help="seconds between requests"
+    )
+    load_.add_argument("-t", "--timeout", type=float, default=10.0)
+    load_.set_defaults(func=load_command)
+
+    verify_ = subparsers.add_parser(
+        "verify", help="check package artifact against its metadata.json"
+    )
+    verify_.add_argument("artifact")
+    verify_.add_argument(
+        "metadata", nargs="?", help="defaults to metadata.json next to the artifact"
+    )
+    verify_.add_argument("-j", "--jobs", type=int, default=None)
+    verify_.set_defaults(func=verify_command)
+
+    audit_ = subparsers.add_parser(
+        "audit", help="check all artifacts referenced by repository packages.json"
+    )
+    audit_.add_argument("directory", nargs="?", default=DEFAULT_REPOSITORY)
+    audit_.add_argument("-j", "--jobs", type=int, default=None)
+    audit_.add_argument(
+        "--cache", help="hash cache file, defaults to file in user cache directory"
+    )
+    audit_.add_argument("-o", "--report", help="write JSON report to file")
+    audit_.set_defaults(func=audit_command)
+
+    diff_ = subparsers.add_parser(
+        "diff", help="compare members and embedded metadata of two packages"
+    )
+    diff_.add_argument("old")
+    diff_.add_argument("new")
+    diff_.add_argument(
+        "--ignore-timestamps",
+        action="store_true",
+        help="do not report members which differ only in modification time",
+    )
+    diff_.add_argument(
+        "--reproducible",
+        action="store_true",
+        help="fail unless archives are byte for byte identical",
+    )
+    diff_.add_argument("--json", action="store_true", help="print JSON report")
+    diff_.set_defaults(func=diff_command)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = get_parser().parse_args(argv)
+    return args.func(args)
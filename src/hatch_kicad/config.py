@@ -3,6 +3,8 @@
 # SPDX-License-Identifier: MIT
 from __future__ import annotations
 
+import json
+import os
 import re
 from enum import Enum
 from pathlib import Path
@@ -13,6 +15,8 @@ from hatchling.utils.context import Context
 from packaging.version import parse
 
 from hatch_kicad.licenses.supported import LICENSES
+from hatch_kicad.slim import DEFAULT_EXCLUDE
+from hatch_kicad.wheels import BUNDLED_WHEELHOUSE
 
 
 class Compatibility(str, Enum):
@@ -23,6 +27,23 @@ class Compatibility(str, Enum):
         return self.value
 
 
+class JsonFormat(str, Enum):
+    INDENT = "indent"
+    COMPACT = "compact"
+
+    def __str__(self) -> str:
+        return self.value
+
+    def dumps(self, obj: Any) -> str:
+        if self == JsonFormat.COMPACT:
+            # minified with sorted keys, so output is stable regardless
+            # of the order in which fields were added
+            return json.dumps(
+                obj, separators=(",", ":"), sort_keys=True, ensure_ascii=False
+            )
+        return json.dumps(obj, indent=4)
+
+
 class Person(TypedDict):
     name: str
     contact: dict[str, str]
@@ -39,6 +60,16 @@ class Action(TypedDict):
     icons_dark: list[str]
 
 
+class Slim(TypedDict):
+    strip_docstrings: bool
+    exclude: list[str]
+
+
+class Wheelhouse(TypedDict):
+    wheelhouse: str
+    requirements: list[str]
+
+
 class KicadBuilderConfig(BuilderConfig):
     _BASE = "tool.hatch.build.targets.kicad-package"
     _CONTACT_KEY_REGEX = r"^[a-zA-Z][-a-zA-Z0-9 ]{0,48}[a-zA-Z0-9]$"
@@ -51,6 +82,7 @@ class KicadBuilderConfig(BuilderConfig):
 
         self.__context: Context | None = None
         self.__compatibility: Compatibility | None = None
+        self.__json_format: JsonFormat | None = None
         self.__zip_name: str | None = None
         self.__name: str | None = None
         self.__description: str | None = None
@@ -68,6 +100,11 @@ class KicadBuilderConfig(BuilderConfig):
         self.__version: str | None = None
         self.__download_url: str | None = None
         self.__actions: list[Action] | None = None
+        self.__bytecode: list[str] | None = None
+        self.__slim: Slim | None = None
+        self.__vendor: Wheelhouse | None = None
+        self.__bundle_wheels: Wheelhouse | None = None
+        self.__size_report: bool | None = None
 
     @property
     def context(self) -> Context:
@@ -96,6 +133,127 @@ class KicadBuilderConfig(BuilderConfig):
             self.__compatibility = _get_compatibility()
         return self.__compatibility
 
+    @property
+    def json_format(self) -> JsonFormat:
+        if not self.__json_format:
+            value = self.target_config.get("json_format", JsonFormat.INDENT.value)
+            try:
+                self.__json_format = JsonFormat(value)
+            except ValueError:
+                allowed = ", ".join(f for f in JsonFormat)
+                msg = (
+                    f"Invalid json_format value: `{value}`\n"
+                    f"Json format can be one of the following values: {allowed}"
+                )
+                raise ValueError(msg) from None
+        return self.__json_format
+
+    @property
+    def bytecode(self) -> list[str]:
+        if self.__bytecode is None:
+            versions = self.target_config.get("bytecode", [])
+            if not (
+                isinstance(versions, list)
+                and all(
+                    isinstance(v, str) and re.match(r"^3\.\d{1,2}$", v)
+                    for v in versions
+                )
+            ):
+                msg = (
+                    f"Field `{self._BASE}.bytecode` must be a list of "
+                    "Python versions in `3.X` format"
+                )
+                raise ValueError(msg)
+            self.__bytecode = list(dict.fromkeys(versions))
+        return self.__bytecode
+
+    @property
+    def slim(self) -> Slim | None:
+        if self.__slim is None and self.target_config.get("slim", False):
+            value = self.target_config["slim"]
+            base = f"Field `{self._BASE}.slim`"
+            if value is True:
+                value = {}
+            if not isinstance(value, dict):
+                msg = f"{base} must be a boolean or a dictionary"
+                raise TypeError(msg)
+            if unknown := set(value) - set(Slim.__annotations__):
+                msg = f"{base} has unknown properties: {', '.join(sorted(unknown))}"
+                raise ValueError(msg)
+            strip_docstrings = value.get("strip_docstrings", True)
+            if not isinstance(strip_docstrings, bool):
+                msg = f"{base} `strip_docstrings` property must be a boolean"
+                raise TypeError(msg)
+            exclude = value.get("exclude", DEFAULT_EXCLUDE)
+            if not (
+                isinstance(exclude, list) and all(isinstance(p, str) for p in exclude)
+            ):
+                msg = f"{base} `exclude` property must be a list of strings"
+                raise TypeError(msg)
+            self.__slim = Slim(strip_docstrings=strip_docstrings, exclude=exclude)
+        return self.__slim
+
+    @property
+    def size_report(self) -> bool:
+        if self.__size_report is None:
+            value = self.target_config.get("size_report", False)
+            if not isinstance(value, bool):
+                msg = f"Field `{self._BASE}.size_report` must be a boolean"
+                raise TypeError(msg)
+            self.__size_report = value
+        return self.__size_report
+
+    def _get_wheelhouse(self, name: str) -> Wheelhouse | None:
+        if name not in self.target_config:
+            return None
+        value = self.target_config[name]
+        base = f"Field `{self._BASE}.{name}`"
+        if isinstance(value, str):
+            value = {"wheelhouse": value}
+        if not isinstance(value, dict):
+            msg = f"{base} must be a string or a dictionary"
+            raise TypeError(msg)
+        if unknown := set(value) - set(Wheelhouse.__annotations__):
+            msg = f"{base} has unknown properties: {', '.join(sorted(unknown))}"
+            raise ValueError(msg)
+        wheelhouse = value.get("wheelhouse")
+        if not isinstance(wheelhouse, str) or not wheelhouse:
+            msg = f"{base} `wheelhouse` property must be a non-empty string"
+            raise TypeError(msg)
+        wheelhouse = os.path.normpath(os.path.join(self.root, wheelhouse))
+        if not os.path.isdir(wheelhouse):
+            msg = f"{base} `wheelhouse` directory `{wheelhouse}` does not exist"
+            raise ValueError(msg)
+        if "requirements" in value:
+            requirements = value["requirements"]
+        else:
+            requirements = self.builder.metadata.core.dependencies
+        if not (
+            isinstance(requirements, list)
+            and all(isinstance(r, str) for r in requirements)
+        ):
+            msg = f"{base} `requirements` property must be a list of strings"
+            raise TypeError(msg)
+        return Wheelhouse(wheelhouse=wheelhouse, requirements=requirements)
+
+    @property
+    def vendor(self) -> Wheelhouse | None:
+        if self.__vendor is None:
+            self.__vendor = self._get_wheelhouse("vendor")
+        return self.__vendor
+
+    @property
+    def bundle_wheels(self) -> Wheelhouse | None:
+        if self.__bundle_wheels is None:
+            self.__bundle_wheels = self._get_wheelhouse("bundle_wheels")
+            if self.__bundle_wheels and self.compatibility != Compatibility.IPC:
+                msg = (
+                    f"Field `{self._BASE}.bundle_wheels` is supported only "
+                    f"in `{Compatibility.IPC}` compatibility mode"
+                )
+                raise ValueError(msg)
+        return self.__bundle_wheels
+
     @property
     def zip_name(self) -> str:
         if self.__zip_name is None:
@@ -588,4 +746,8 @@ class KicadBuilderConfig(BuilderConfig):
                 for action in self.actions
             ],
         }
+        if self.bundle_wheels:
+            # not part of KiCad schema, informs that `requirements.txt`
+            # installs wheels from this directory without downloads
+            metadata["runtime"]["wheelhouse"] = BUNDLED_WHEELHOUSE
         return metadata
@@ -0,0 +1,329 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import json
+import os
+import struct
+import zipfile
+import zlib
+from typing import Any, BinaryIO, NamedTuple, TypedDict
+
+from hatch_kicad.utils import getsha256
+
+__all__ = ["ArchiveDiff", "CentralDirectory", "diff_archives"]
+
+# structures of APPNOTE.TXT sections 4.3.12 (central directory header),
+# 4.3.14 - 4.3.16 (zip64 end of central directory and its locator, end
+# of central directory) and 4.3.7 (local file header)
+CENTRAL_HEADER_FORMAT = "<4s4B4HL2L5H2L"
+CENTRAL_HEADER_SIZE = struct.calcsize(CENTRAL_HEADER_FORMAT)
+CENTRAL_HEADER_SIGNATURE = b"PK\x01\x02"
+EOCD_FORMAT = "<4s4H2LH"
+EOCD_SIZE = struct.calcsize(EOCD_FORMAT)
+EOCD_SIGNATURE = b"PK\x05\x06"
+EOCD64_LOCATOR_FORMAT = "<4sLQL"
+EOCD64_LOCATOR_SIZE = struct.calcsize(EOCD64_LOCATOR_FORMAT)
+EOCD64_LOCATOR_SIGNATURE = b"PK\x06\x07"
+EOCD64_FORMAT = "<4sQ2H2L4Q"
+EOCD64_SIZE = struct.calcsize(EOCD64_FORMAT)
+EOCD64_SIGNATURE = b"PK\x06\x06"
+LOCAL_HEADER_FORMAT = "<4s2B4HL2L2H"
+LOCAL_HEADER_SIZE = struct.calcsize(LOCAL_HEADER_FORMAT)
+MAX_COMMENT_SIZE = 0xFFFF
+ZIP64_EXTRA_ID = 0x0001
+# 32-bit size or offset with this value is stored in zip64 extra field
+ZIP64_LIMIT = 0xFFFFFFFF
+UTF8_FLAG = 0x800
+ZIP64_MARKER = b"\xff\xff\xff\xff"
+# embedded files which content is compared field by field
+EMBEDDED_JSON = ["metadata.json", "plugins/plugin.json"]
+
+
+class Member(NamedTuple):
+    name: str
+    crc: int
+    compress_size: int
+    file_size: int
+    date_time: tuple[int, int, int, int, int, int]
+    compress_type: int
+    external_attr: int
+    header_offset: int
+
+
+class ArchiveDiff(TypedDict):
+    added: list[str]
+    removed: list[str]
+    # member name to names of changed fields
+    changed: dict[str, list[str]]
+    # members present in both archives are stored in different order
+    reordered: bool
+    # embedded JSON file name to changed `path: [old, new]` values
+    embedded: dict[str, dict[str, list[Any]]]
+    # archives are byte for byte identical
+    identical: bool
+
+
+def find_end_of_central_directory(f: BinaryIO) -> tuple[int, int, int, int]:
+    """
+    Returns offset of central directory, its size, number of entries and
+    size of data prepended to the archive (e.g. self extracting stub), which
+    shifts all offsets stored in the archive.
+    """
+    f.seek(0, os.SEEK_END)
+    file_size = f.tell()
+    tail_size = min(file_size, EOCD_SIZE + MAX_COMMENT_SIZE + EOCD64_LOCATOR_SIZE)
+    f.seek(file_size - tail_size)
+    tail = f.read(tail_size)
+    position = tail.rfind(EOCD_SIGNATURE)
+    if position < 0 or len(tail) - position < EOCD_SIZE:
+        msg = "File is not a zip file"
+        raise zipfile.BadZipFile(msg)
+    eocd_offset = file_size - tail_size + position
+    _, _, _, _, entries, size, offset, _ = struct.unpack_from(
+        EOCD_FORMAT, tail, position
+    )
+    locator = position - EOCD64_LOCATOR_SIZE
+    if locator >= 0 and tail[locator : locator + 4] == EOCD64_LOCATOR_SIGNATURE:
+        _, _, eocd64_offset, _ = struct.unpack_from(
+            EOCD64_LOCATOR_FORMAT, tail, locator
+        )
+        f.seek(eocd64_offset)
+        eocd64 = f.read(EOCD64_SIZE)
+        if len(eocd64) != EOCD64_SIZE or eocd64[:4] != EOCD64_SIGNATURE:
+            msg = "Corrupt zip64 end of central directory"
+            raise zipfile.BadZipFile(msg)
+        _, _, _, _, _, _, _, entries, size, offset = struct.unpack(
+            EOCD64_FORMAT, eocd64
+        )
+        eocd_offset = eocd64_offset
+    # archive with prepended data (e.g. self extracting) has shifted offsets
+    concat = eocd_offset - size - offset
+    return offset + concat, size, entries, concat
+
+
+def parse_zip64_extra(
+    extra: bytes, file_size: int, compress_size: int, header_offset: int
+) -> tuple[int, int, int]:
+    i = 0
+    while i + 4 <= len(extra):
+        field_id, size = struct.unpack_from("<HH", extra, i)
+        if field_id == ZIP64_EXTRA_ID:
+            values = list(struct.unpack_from(f"<{size // 8}Q", extra, i + 4))
+            if file_size == ZIP64_LIMIT:
+                file_size = values.pop(0)
+            if compress_size == ZIP64_LIMIT:
+                compress_size = values.pop(0)
+            if header_offset == ZIP64_LIMIT:
+                header_offset = values.pop(0)
+            break
+        i += 4 + size
+    return file_size, compress_size, header_offset
+
+
+class CentralDirectory:
+    """
+    Index of archive members read from central directory, only names are
+    decoded upfront, other fields are parsed on demand. Member data
+    is not touched.
+    """
+
+    def __init__(self, f: BinaryIO) -> None:
+        offset, size, entries, self.concat = find_end_of_central_directory(f)
+        f.seek(offset)
+        self.data = f.read(size)
+        if len(self.data) != size:
+            msg = "Truncated central directory"
+            raise zipfile.BadZipFile(msg)
+        # member name to position of its header, in archive order
+        self.index: dict[str, int] = {}
+        # member name to raw compression method, timestamp, CRC, sizes
+        # and attributes, equal keys mean equal members
+        self.keys: dict[str, bytes] = {}
+        lengths = struct.Struct("<3H").unpack_from
+        data = self.data
+        position = 0
+        while position < size:
+            if data[position : position + 4] != CENTRAL_HEADER_SIGNATURE:
+                msg = f"Bad central directory header at offset {offset + position}"
+                raise zipfile.BadZipFile(msg)
+            name_size, extra_size, comment_size = lengths(data, position + 28)
+            name_end = position + CENTRAL_HEADER_SIZE + name_size
+            raw_name = data[position + CENTRAL_HEADER_SIZE : name_end]
+            try:
+                name = raw_name.decode("ascii")
+            except UnicodeDecodeError:
+                flags = data[position + 8] | data[position + 9] << 8
+                name = raw_name.decode("utf-8" if flags & UTF8_FLAG else "cp437")
+            self.index[name] = position
+            self.keys[name] = data[position + 10 : position + 42]
+            position = name_end + extra_size + comment_size
+        if len(self.index) != entries:
+            msg = (
+                f"Expected {entries} central directory entries, found {len(self.index)}"
+            )
+            raise zipfile.BadZipFile(msg)
+
+    def member(self, name: str) -> Member:
+        position = self.index[name]
+        header = struct.unpack_from(CENTRAL_HEADER_FORMAT, self.data, position)
+        _, _, _, _, _, _, method, time, date, crc = header[:10]
+        compress_size, file_size, name_size, extra_size = header[10:14]
+        external_attr, header_offset = header[17:19]
+        if ZIP64_LIMIT in (file_size, compress_size, header_offset):
+            extra = position + CENTRAL_HEADER_SIZE + name_size
+            file_size, compress_size, header_offset = parse_zip64_extra(
+                self.data[extra : extra + extra_size],
+                file_size,
+                compress_size,
+                header_offset,
+            )
+        date_time = (
+            (date >> 9) + 1980,
+            (date >> 5) & 0xF,
+            date & 0x1F,
+            time >> 11,
+            (time >> 5) & 0x3F,
+            (time & 0x1F) * 2,
+        )
+        return Member(
+            name,
+            crc,
+            compress_size,
+            file_size,
+            date_time,
+            method,
+            external_attr,
+            header_offset + self.concat,
+        )
+
+
+def read_member(f: BinaryIO, member: Member) -> bytes:
+    """
+    Returns decompressed content of stored or deflated `member`.
+    """
+    f.seek(member.header_offset)
+    header = struct.unpack(LOCAL_HEADER_FORMAT, f.read(LOCAL_HEADER_SIZE))
+    f.seek(header[-2] + header[-1], os.SEEK_CUR)
+    data = f.read(member.compress_size)
+    if member.compress_type == zipfile.ZIP_DEFLATED:
+        data = zlib.decompress(data, -zlib.MAX_WBITS)
+    elif member.compress_type != zipfile.ZIP_STORED:
+        msg = f"Unsupported compression method of `{member.name}`"
+        raise NotImplementedError(msg)
+    if zlib.crc32(data) != member.crc:
+        msg = f"Bad CRC-32 for file `{member.name}`"
+        raise zipfile.BadZipFile(msg)
+    return data
+
+
+def flatten(value: Any, prefix: str = "") -> dict[str, Any]:
+    """
+    Returns mapping of `a.b[0].c` style paths to leaf values of JSON `value`.
+    """
+    if isinstance(value, dict) and value:
+        result = {}
+        for k, v in value.items():
+            result.update(flatten(v, f"{prefix}.{k}" if prefix else str(k)))
+        return result
+    if isinstance(value, list) and value:
+        result = {}
+        for i, v in enumerate(value):
+            result.update(flatten(v, f"{prefix}[{i}]"))
+        return result
+    return {prefix: value}
+
+
+def diff_json(old: Any, new: Any) -> dict[str, list[Any]]:
+    old_values, new_values = flatten(old), flatten(new)
+    return {
+        path: [old_values.get(path), new_values.get(path)]
+        for path in sorted(old_values.keys() | new_values.keys())
+        if path not in old_values
+        or path not in new_values
+        or old_values[path] != new_values[path]
+    }
+
+
+def load_embedded_json(f: BinaryIO, directory: CentralDirectory, name: str) -> Any:
+    if name not in directory.index:
+        return None
+    try:
+        return json.loads(read_member(f, directory.member(name)))
+    except ValueError:
+        return None
+
+
+def compare_members(a: Member, b: Member, *, ignore_timestamps: bool) -> list[str]:
+    fields = []
+    if a.crc != b.crc or a.file_size != b.file_size:
+        fields.append("content")
+    if a.date_time != b.date_time and not ignore_timestamps:
+        fields.append("timestamp")
+    if a.compress_type != b.compress_type or (
+        a.compress_size != b.compress_size and "content" not in fields
+    ):
+        fields.append("compression")
+    if a.external_attr != b.external_attr:
+        fields.append("attributes")
+    return fields
+
+
+def diff_archives(
+    old_path: str, new_path: str, *, ignore_timestamps: bool = False
+) -> ArchiveDiff:
+    """
+    Compare two archives using their central directories, members are
+    compared by CRC, sizes, timestamps, compression and attributes without
+    decompressing them. Embedded JSON files are decompressed and compared
+    field by field only when their content differs.
+    """
+    with open(old_path, "rb") as old_f, open(new_path, "rb") as new_f:
+        old = CentralDirectory(old_f)
+        new = CentralDirectory(new_f)
+
+        changed: dict[str, list[str]] = {}
+        common = [name for name in old.index if name in new.index]
+        # members with different raw keys are found by set operations on
+        # dict views without python level loop, zip64 sizes are stored
+        # in extra field, so raw keys are not enough for such archives
+        if ZIP64_MARKER in old.data or ZIP64_MARKER in new.data:
+            candidates = set(common)
+        else:
+            candidates = {name for name, _ in old.keys.items() - new.keys.items()}
+        for name in sorted(candidates & new.index.keys()):
+            fields = compare_members(
+                old.member(name),
+                new.member(name),
+                ignore_timestamps=ignore_timestamps,
+            )
+            if fields:
+                changed[name] = fields
+
+        embedded = {}
+        for name in EMBEDDED_JSON:
+            in_old, in_new = name in old.index, name in new.index
+            if "content" in changed.get(name, []) or in_old != in_new:
+                values = diff_json(
+                    load_embedded_json(old_f, old, name),
+                    load_embedded_json(new_f, new, name),
+                )
+                if values:
+                    embedded[name] = values
+
+    result: ArchiveDiff = {
+        "added": [name for name in new.index if name not in old.index],
+        "removed": [name for name in old.index if name not in new.index],
+        "changed": changed,
+        "reordered": common != [name for name in new.index if name in old.index],
+        "embedded": embedded,
+        "identical": False,
+    }
+    # whole files are hashed only when members match, archives can still
+    # differ in comments, extra fields or local headers
+    if not (
+        result["added"] or result["removed"] or result["changed"] or result["reordered"]
+    ) and os.path.getsize(old_path) == os.path.getsize(new_path):
+        result["identical"] = getsha256(old_path) == getsha256(new_path)
+    return result
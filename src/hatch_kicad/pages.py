@@ -0,0 +1,298 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import json
+import re
+from collections.abc import Iterable, Iterator
+from html import escape
+from typing import Any
+
+__all__ = ["iter_static_pages"]
+
+URL_REGEX = re.compile(r"https?://[^\s<>\"']+[^\s<>\"'.,;:!?)\]]")
+IDENTIFIER_UNSAFE_REGEX = re.compile(r"[^-a-zA-Z0-9_.]")
+TOKEN_REGEX = re.compile(r"[^\W_]{2,}")
+VERSIONS_HEADER = "".join(
+    f"<th>{column}</th>"
+    for column in ("Version", "Status", "KiCad", "Download", "Size", "SHA256")
+)
+
+SEARCH_INDEX_NAME = "search-index.json"
+SEARCH_SCRIPT_NAME = "search.js"
+# Queries `search-index.json`, every query word must be a prefix
+# of at least one indexed token of the package
+SEARCH_SCRIPT = """(function () {
+  var input = document.getElementById("search");
+  var results = document.getElementById("search-results");
+  var index = null;
+  function tokens(text) {
+    return text.toLowerCase().match(/[\\p{L}\\p{N}]{2,}/gu) || [];
+  }
+  function search(query) {
+    var matched = null;
+    tokens(query).forEach(function (word) {
+      var docs = new Set();
+      Object.keys(index.terms).forEach(function (term) {
+        if (term.startsWith(word)) {
+          index.terms[term].forEach(function (doc) { docs.add(doc); });
+        }
+      });
+      matched = matched === null ? docs
+        : new Set([...matched].filter(function (doc) { return docs.has(doc); }));
+    });
+    results.replaceChildren();
+    (matched === null ? [] : [...matched].sort(function (a, b) { return a - b; }))
+      .forEach(function (doc) {
+        var item = document.createElement("li");
+        var link = document.createElement("a");
+        link.href = index.docs[doc][1];
+        link.textContent = index.docs[doc][0];
+        item.append(link, " ", index.docs[doc][2]);
+        results.append(item);
+      });
+  }
+  input.addEventListener("input", function () {
+    if (index === null) {
+      fetch("search-index.json")
+        .then(function (response) { return response.json(); })
+        .then(function (data) { index = data; search(input.value); });
+    } else {
+      search(input.value);
+    }
+  });
+  input.hidden = false;
+})();
+"""
+
+PAGE_TEMPLATE = """<!doctype html>
+<html lang="en">
+  <head>
+    <meta charset="UTF-8" />
+    <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+    <link rel="icon" href="data:," />
+    <title>{title}</title>
+    <style>
+      body {{ font-family: system-ui, sans-serif; line-height: 1.5; }}
+      main {{ max-width: 60rem; margin: 0 auto; padding: 1rem; }}
+      table {{ border-collapse: collapse; width: 100%; }}
+      th, td {{ border-bottom: 1px solid #ddd; padding: .4rem; text-align: left; }}
+      code, .sha {{ word-break: break-all; }}
+      .full {{ white-space: pre-wrap; }}
+      nav a {{ margin-right: 1rem; }}
+    </style>
+  </head>
+  <body>
+    <main>
+{body}
+      <footer>
+        <small>Built with <a href="https://github.com/adamws/hatch-kicad">hatch-kicad</a></small>
+      </footer>
+    </main>
+  </body>
+</html>
+"""
+
+
+def linkify(text: str) -> str:
+    """
+    Escape `text` and turn contained URLs into links.
+    """
+
+    def _link(match: re.Match) -> str:
+        url = match.group(0)
+        return f'<a href="{url}">{url}</a>'
+
+    return URL_REGEX.sub(_link, escape(text))
+
+
+def contact_link(key: str, value: str) -> str:
+    if "@" in value and not URL_REGEX.match(value) and " " not in value:
+        value_escaped = escape(value)
+        link = f'<a href="mailto:{value_escaped}">{value_escaped}</a>'
+    else:
+        link = linkify(value)
+    return f"{escape(key)}: {link}"
+
+
+def person_html(person: dict[str, Any]) -> str:
+    contact = person.get("contact", {})
+    details = ", ".join(contact_link(k, v) for k, v in contact.items())
+    name = escape(person.get("name", ""))
+    return f"{name} ({details})" if details else name
+
+
+def package_page_name(package: dict[str, Any]) -> str:
+    identifier = IDENTIFIER_UNSAFE_REGEX.sub("_", package.get("identifier", ""))
+    return f"packages/{identifier or '_'}.html"
+
+
+class SearchIndex:
+    """
+    Inverted index of package name, identifier, tags, description and author.
+    Documents are stored as `[name, href, description]` lists and terms map
+    to ascending lists of document numbers.
+    """
+
+    def __init__(self) -> None:
+        self.docs: list[list[str]] = []
+        self.terms: dict[str, list[int]] = {}
+
+    def add(self, package: dict[str, Any]) -> None:
+        doc = len(self.docs)
+        name = package.get("name", package.get("identifier", ""))
+        description = package.get("description", "")
+        self.docs.append([name, package_page_name(package), description])
+        fields = [
+            name,
+            package.get("identifier", ""),
+            description,
+            package.get("author", {}).get("name", ""),
+            *package.get("tags", []),
+        ]
+        for token in sorted(set(TOKEN_REGEX.findall(" ".join(fields).lower()))):
+            self.terms.setdefault(token, []).append(doc)
+
+    def dumps(self) -> str:
+        return json.dumps(
+            {"docs": self.docs, "terms": self.terms},
+            separators=(",", ":"),
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+
+
+def index_page_name(page: int) -> str:
+    return "index.html" if page == 1 else f"index-{page}.html"
+
+
+def render_package_page(package: dict[str, Any], repository_url: str) -> str:
+    name = escape(package.get("name", package.get("identifier", "")))
+    identifier = escape(package.get("identifier", ""))
+    lines = [
+        '      <nav><a href="../index.html">All packages</a></nav>',
+        f"      <h1>{name}</h1>",
+        f"      <p>{linkify(package.get('description', ''))}</p>",
+        f'      <p class="full">{linkify(package.get("description_full", ""))}</p>',
+        "      <table>",
+        f"        <tr><th>Identifier</th><td><code>{identifier}</code></td></tr>",
+    ]
+    if author := package.get("author"):
+        lines.append(f"        <tr><th>Author</th><td>{person_html(author)}</td></tr>")
+    if maintainer := package.get("maintainer"):
+        lines.append(
+            f"        <tr><th>Maintainer</th><td>{person_html(maintainer)}</td></tr>"
+        )
+    if license_ := package.get("license"):
+        lines.append(f"        <tr><th>License</th><td>{escape(license_)}</td></tr>")
+    for key, value in package.get("resources", {}).items():
+        lines.append(
+            f"        <tr><th>{escape(key)}</th><td>{linkify(value)}</td></tr>"
+        )
+    if tags := package.get("tags"):
+        tags_str = ", ".join(escape(tag) for tag in tags)
+        lines.append(f"        <tr><th>Tags</th><td>{tags_str}</td></tr>")
+    lines += [
+        "      </table>",
+        "      <h2>Versions</h2>",
+        "      <table>",
+        f"        <tr>{VERSIONS_HEADER}</tr>",
+    ]
+    for version in package.get("versions", []):
+        kicad = escape(version.get("kicad_version", ""))
+        if kicad_max := version.get("kicad_version_max"):
+            kicad += f" - {escape(kicad_max)}"
+        download = ""
+        if url := version.get("download_url"):
+            download = f'<a href="{escape(url)}">{escape(url.split("/")[-1])}</a>'
+        lines.append(
+            f"        <tr><td>{escape(version.get('version', ''))}</td>"
+            f"<td>{escape(version.get('status', ''))}</td>"
+            f"<td>{kicad}</td><td>{download}</td>"
+            f"<td>{version.get('download_size', '')}</td>"
+            f'<td class="sha">{escape(version.get("download_sha256", ""))}</td></tr>'
+        )
+    lines.append("      </table>")
+    lines.append(repository_hint(repository_url))
+    return PAGE_TEMPLATE.format(title=name, body="\n".join(lines))
+
+
+def repository_hint(repository_url: str) -> str:
+    url = escape(f"{repository_url}/repository.json")
+    return (
+        f"      <p>Add <mark>{url}</mark> to KiCad's repository list "
+        "to use these packages.</p>"
+    )
+
+
+def render_package_row(package: dict[str, Any]) -> str:
+    name = escape(package.get("name", package.get("identifier", "")))
+    versions = package.get("versions", [])
+    latest = escape(versions[0].get("version", "")) if versions else ""
+    return (
+        f'        <tr><td><a href="{package_page_name(package)}">{name}</a></td>'
+        f"<td>{latest}</td><td>{linkify(package.get('description', ''))}</td></tr>"
+    )
+
+
+def render_index_page(
+    rows: list[str], page: int, repository_url: str, *, has_next: bool, search: bool
+) -> str:
+    navigation = []
+    if page > 1:
+        navigation.append(f'<a href="{index_page_name(page - 1)}">Previous</a>')
+    if has_next:
+        navigation.append(f'<a href="{index_page_name(page + 1)}">Next</a>')
+    lines = [
+        "      <h1>Packages</h1>",
+        repository_hint(repository_url),
+    ]
+    if search:
+        lines += [
+            '      <input id="search" type="search" placeholder="Search" hidden />',
+            '      <ul id="search-results"></ul>',
+            f'      <script src="{SEARCH_SCRIPT_NAME}" defer></script>',
+        ]
+    lines += [
+        "      <table>",
+        "        <tr><th>Name</th><th>Version</th><th>Description</th></tr>",
+        *rows,
+        "      </table>",
+        f"      <nav>Page {page} {' '.join(navigation)}</nav>",
+    ]
+    return PAGE_TEMPLATE.format(title="Packages", body="\n".join(lines))
+
+
+def iter_static_pages(
+    packages: Iterable[dict[str, Any]],
+    repository_url: str,
+    page_size: int,
+    *,
+    search: bool = True,
+) -> Iterator[tuple[str, str]]:
+    """
+    Render static repository pages in single pass over `packages`.
+    Yields `(path, content)` tuples, where path is relative to repository root.
+    Only rows of a single index page and the search index are held in memory.
+    """
+    search_index = SearchIndex()
+    page = 1
+    rows: list[str] = []
+    for package in packages:
+        if len(rows) == page_size:
+            yield index_page_name(page), render_index_page(
+                rows, page, repository_url, has_next=True, search=search
+            )
+            page += 1
+            rows = []
+        yield package_page_name(package), render_package_page(package, repository_url)
+        rows.append(render_package_row(package))
+        if search:
+            search_index.add(package)
+    yield index_page_name(page), render_index_page(
+        rows, page, repository_url, has_next=False, search=search
+    )
+    if search:
+        yield SEARCH_INDEX_NAME, search_index.dumps()
+        yield SEARCH_SCRIPT_NAME, SEARCH_SCRIPT
@@ -0,0 +1,85 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import time
+from typing import Callable
+
+__all__ = ["Progress"]
+
+# minimal number of seconds between two reports
+REPORT_INTERVAL = 2.0
+MIB = 2**20
+SECONDS_PER_MINUTE = 60
+MINUTES_PER_HOUR = 60
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds < SECONDS_PER_MINUTE:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, SECONDS_PER_MINUTE)
+    if minutes < MINUTES_PER_HOUR:
+        return f"{minutes}m{seconds:02d}s"
+    hours, minutes = divmod(minutes, MINUTES_PER_HOUR)
+    return f"{hours}h{minutes:02d}m"
+
+
+class Progress:
+    """
+    Tracks number of processed files and bytes and passes status line with
+    throughput and estimated time of completion to `report`, at most once
+    per `interval` seconds, so that frequent updates stay cheap.
+    """
+
+    def __init__(
+        self,
+        files: int,
+        size: int,
+        report: Callable[[str], None],
+        *,
+        interval: float = REPORT_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.files = files
+        self.size = size
+        self.report = report
+        self.interval = interval
+        self.clock = clock
+        self.files_done = 0
+        self.bytes_done = 0
+        self.start = clock()
+        self.next_report = self.start + interval
+        self.reported = False
+
+    def advance(self, size: int = 0, files: int = 0) -> None:
+        self.bytes_done += size
+        self.files_done += files
+        if (now := self.clock()) >= self.next_report:
+            self.next_report = now + self.interval
+            self.reported = True
+            self.report(self.status(now))
+
+    def status(self, now: float) -> str:
+        elapsed = max(now - self.start, 1e-9)
+        speed = self.bytes_done / elapsed
+        remaining = max(self.size - self.bytes_done, 0)
+        eta = format_duration(remaining / speed) if speed else "?"
+        return (
+            f"{self.files_done}/{self.files} files, "
+            f"{self.bytes_done / MIB:.1f}/{self.size / MIB:.1f} MiB, "
+            f"{speed / MIB:.1f} MiB/s, ETA {eta}"
+        )
+
+    def finish(self) -> None:
+        """
+        Report summary, only if any intermediate status has been reported.
+        """
+        if self.reported:
+            elapsed = max(self.clock() - self.start, 1e-9)
+            self.report(
+                f"{self.files_done} files, {self.bytes_done / MIB:.1f} MiB "
+                f"processed in {format_duration(elapsed)} "
+                f"({self.bytes_done / MIB / elapsed:.1f} MiB/s)"
+            )
@@ -0,0 +1,266 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import mimetypes
+import os
+import shutil
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Protocol, TypedDict
+from urllib.parse import quote, urlparse
+
+from hatch_kicad.utils import getsha256
+
+__all__ = ["FilesystemBackend", "S3Backend", "get_backend", "publish"]
+
+MANIFEST_NAME = ".manifest.json"
+EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
+
+class PublishResult(TypedDict):
+    uploaded: list[str]
+    deleted: list[str]
+    unchanged: list[str]
+
+
+class StorageBackend(Protocol):
+    def read(self, name: str) -> bytes | None:
+        """
+        Returns content of remote `name` object or None if it does not exist.
+        """
+
+    def upload(self, name: str, filename: str, sha256: str) -> None:
+        """
+        Upload local `filename` as remote `name` object.
+        """
+
+    def delete(self, name: str) -> None:
+        """
+        Delete remote `name` object, missing objects are ignored.
+        """
+
+
+class FilesystemBackend:
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+
+    def read(self, name: str) -> bytes | None:
+        try:
+            return (self.root / name).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def upload(self, name: str, filename: str, sha256: str) -> None:  # noqa: ARG002
+        target = self.root / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = f"{target}.tmp"
+        shutil.copyfile(filename, tmp)
+        os.replace(tmp, target)
+
+    def delete(self, name: str) -> None:
+        (self.root / name).unlink(missing_ok=True)
+
+
+class S3Backend:
+    """
+    Minimal client of S3 compatible API using path-style requests
+    signed with AWS Signature Version 4.
+    """
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        prefix: str = "",
+        *,
+        region: str = "us-east-1",
+        access_key: str = "",
+        secret_key: str = "",
+        session_token: str = "",
+    ) -> None:
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.region = region
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.session_token = session_token
+
+    def object_path(self, name: str) -> str:
+        key = f"{self.prefix}/{name}" if self.prefix else name
+        return quote(f"/{self.bucket}/{key}", safe="/-_.~")
+
+    def sign(
+        self,
+        method: str,
+        path: str,
+        payload_sha256: str,
+        now: datetime | None = None,
+        query: str = "",
+    ) -> dict[str, str]:
+        """
+        Returns headers of request authenticated with AWS Signature Version 4,
+        `query` is canonical (sorted and encoded) query string.
+        """
+        now = now or datetime.now(tz=timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        date = amz_date[:8]
+        host = urlparse(self.endpoint_url).netloc
+        headers = {
+            "host": host,
+            "x-amz-content-sha256": payload_sha256,
+            "x-amz-date": amz_date,
+        }
+        if self.session_token:
+            headers["x-amz-security-token"] = self.session_token
+        signed_headers = ";".join(sorted(headers))
+        canonical_headers = "".join(f"{k}:{headers[k]}\n" for k in sorted(headers))
+        canonical_request = "\n".join(
+            [method, path, query, canonical_headers, signed_headers, payload_sha256]
+        )
+        scope = f"{date}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join(
+            [
+                "AWS4-HMAC-SHA256",
+                amz_date,
+                scope,
+                hashlib.sha256(canonical_request.encode()).hexdigest(),
+            ]
+        )
+        key = f"AWS4{self.secret_key}".encode()
+        for part in [date, self.region, "s3", "aws4_request"]:
+            key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+        signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+        headers["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+        del headers["host"]
+        return headers
+
+    def request(
+        self,
+        method: str,
+        name: str,
+        *,
+        data: Any = None,
+        payload_sha256: str = EMPTY_SHA256,
+        extra_headers: dict[str, str] | None = None,
+    ) -> bytes:
+        path = self.object_path(name)
+        headers = self.sign(method, path, payload_sha256)
+        headers.update(extra_headers or {})
+        request = urllib.request.Request(  # noqa: S310
+            f"{self.endpoint_url}{path}", data=data, headers=headers, method=method
+        )
+        with urllib.request.urlopen(request) as response:  # noqa: S310
+            return response.read()
+
+    def read(self, name: str) -> bytes | None:
+        try:
+            return self.request("GET", name)
+        except urllib.error.HTTPError as e:
+            if e.code == 404:  # noqa: PLR2004
+                return None
+            raise
+
+    def upload(self, name: str, filename: str, sha256: str) -> None:
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        with open(filename, "rb") as f:
+            self.request(
+                "PUT",
+                name,
+                data=f,
+                payload_sha256=sha256,
+                extra_headers={
+                    "Content-Length": str(os.path.getsize(filename)),
+                    "Content-Type": content_type,
+                },
+            )
+
+    def delete(self, name: str) -> None:
+        try:
+            self.request("DELETE", name)
+        except urllib.error.HTTPError as e:
+            if e.code != 404:  # noqa: PLR2004
+                raise
+
+
+def get_backend(target: str, endpoint_url: str = "", region: str = "") -> Any:
+    """
+    Returns storage backend for `target`, which is either `s3://bucket/prefix`
+    URL or local directory path (optionally prefixed with `file://`).
+    S3 credentials are read from `AWS_ACCESS_KEY_ID`, `AWS_SECRET_ACCESS_KEY`
+    and `AWS_SESSION_TOKEN` environment variables, endpoint defaults
+    to AWS S3 endpoint of the region.
+    """
+    parsed = urlparse(target)
+    if parsed.scheme == "s3":
+        region = region or os.environ.get("AWS_DEFAULT_REGION", "us-east-1")
+        endpoint_url = (
+            endpoint_url
+            or os.environ.get("AWS_ENDPOINT_URL")
+            or f"https://s3.{region}.amazonaws.com"
+        )
+        return S3Backend(
+            endpoint_url,
+            parsed.netloc,
+            parsed.path,
+            region=region,
+            access_key=os.environ.get("AWS_ACCESS_KEY_ID", ""),
+            secret_key=os.environ.get("AWS_SECRET_ACCESS_KEY", ""),
+            session_token=os.environ.get("AWS_SESSION_TOKEN", ""),
+        )
+    if parsed.scheme == "file":
+        return FilesystemBackend(parsed.path)
+    return FilesystemBackend(target)
+
+
+def publish(directory: str, backend: StorageBackend, jobs: int = 8) -> PublishResult:
+    """
+    Upload files listed in `directory` manifest which differ from the remote
+    manifest. `repository.json` is uploaded after all files it may reference,
+    then files no longer listed are deleted and the manifest is uploaded last,
+    so interrupted publish is completed by the next one.
+    """
+    with open(f"{directory}/{MANIFEST_NAME}", encoding="utf-8") as f:
+        local = json.load(f).get("files", {})
+    try:
+        remote = json.loads(backend.read(MANIFEST_NAME) or b"{}").get("files", {})
+    except ValueError:
+        remote = {}
+
+    changed = sorted(name for name, entry in local.items() if remote.get(name) != entry)
+    last = [name for name in changed if name.startswith("repository.json")]
+    # `repository.json` must be the very last of the repository files
+    last.sort(key=lambda name: name == "repository.json")
+    first = [name for name in changed if name not in last]
+
+    def _upload(name: str) -> None:
+        backend.upload(name, f"{directory}/{name}", local[name]["sha256"])
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        list(executor.map(_upload, first))
+    for name in last:
+        _upload(name)
+
+    deleted = sorted(name for name in remote if name not in local)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        list(executor.map(backend.delete, deleted))
+
+    manifest = f"{directory}/{MANIFEST_NAME}"
+    backend.upload(MANIFEST_NAME, manifest, getsha256(manifest))
+
+    return {
+        "uploaded": first + last,
+        "deleted": deleted,
+        "unchanged": sorted(name for name in local if name not in changed),
+    }
@@ -0,0 +1,131 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import posixpath
+from typing import TypedDict
+
+from hatch_kicad.zip import MemberStats
+
+__all__ = ["SizeReport", "format_size_report", "size_report"]
+
+# number of largest members listed in text report
+TOP_MEMBERS = 20
+
+
+class SizeGroup(TypedDict):
+    files: int
+    size: int
+    compress_size: int
+    time: float
+
+
+class MemberReport(TypedDict):
+    name: str
+    size: int
+    compress_size: int
+    time: float
+
+
+class SizeReport(TypedDict):
+    download_size: int
+    total: SizeGroup
+    # sorted by compressed size, largest first
+    members: list[MemberReport]
+    # aggregated by parent directory and by extension of members
+    directories: dict[str, SizeGroup]
+    extensions: dict[str, SizeGroup]
+
+
+def new_group() -> SizeGroup:
+    return {"files": 0, "size": 0, "compress_size": 0, "time": 0.0}
+
+
+def add_to_group(group: SizeGroup, member: MemberStats) -> None:
+    group["files"] += 1
+    group["size"] += member.size
+    group["compress_size"] += member.compress_size
+    group["time"] += member.time
+
+
+def sort_groups(groups: dict[str, SizeGroup]) -> dict[str, SizeGroup]:
+    return dict(sorted(groups.items(), key=lambda g: (-g[1]["compress_size"], g[0])))
+
+
+def size_report(members: list[MemberStats], download_size: int) -> SizeReport:
+    """
+    Returns per member sizes and compression times of written archive
+    aggregated by directory and extension. `download_size` includes
+    headers and central directory of the archive.
+    """
+    total = new_group()
+    directories: dict[str, SizeGroup] = {}
+    extensions: dict[str, SizeGroup] = {}
+    for member in members:
+        directory = posixpath.dirname(member.name) or "."
+        extension = posixpath.splitext(member.name)[1].lower() or "(none)"
+        add_to_group(total, member)
+        add_to_group(directories.setdefault(directory, new_group()), member)
+        add_to_group(extensions.setdefault(extension, new_group()), member)
+    for group in [total, *directories.values(), *extensions.values()]:
+        group["time"] = round(group["time"], 6)
+    return {
+        "download_size": download_size,
+        "total": total,
+        "members": [
+            {
+                "name": m.name,
+                "size": m.size,
+                "compress_size": m.compress_size,
+                "time": round(m.time, 6),
+            }
+            for m in sorted(members, key=lambda m: (-m.compress_size, m.name))
+        ],
+        "directories": sort_groups(directories),
+        "extensions": sort_groups(extensions),
+    }
+
+
+def format_groups(title: str, groups: dict[str, SizeGroup], top: int) -> list[str]:
+    lines = [
+        "",
+        f"{title}:",
+        f"{'compressed':>12} {'size':>12} {'files':>7}  name",
+    ]
+    for name, group in list(groups.items())[:top]:
+        lines.append(
+            f"{group['compress_size']:>12} {group['size']:>12} "
+            f"{group['files']:>7}  {name}"
+        )
+    if len(groups) > top:
+        lines.append(f"... {len(groups) - top} more")
+    return lines
+
+
+def format_size_report(report: SizeReport, top: int = TOP_MEMBERS) -> str:
+    """
+    Returns human readable summary of `report` with `top` largest members,
+    directories and extensions.
+    """
+    total = report["total"]
+    summary = (
+        f"members: {total['files']}, compressed: {total['compress_size']}, "
+        f"time: {total['time']:.3f}s"
+    )
+    lines = [
+        f"download size: {report['download_size']}",
+        f"install size: {total['size']}",
+        summary,
+        "",
+        f"Largest members (top {top}):",
+        f"{'compressed':>12} {'size':>12} {'time':>8}  name",
+    ]
+    for member in report["members"][:top]:
+        lines.append(
+            f"{member['compress_size']:>12} {member['size']:>12} "
+            f"{member['time']:>8.3f}  {member['name']}"
+        )
+    lines += format_groups("Directories", report["directories"], top)
+    lines += format_groups("Extensions", report["extensions"], top)
+    return "\n".join(lines) + "\n"
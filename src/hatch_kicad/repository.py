@@ -3,23 +3,124 @@
 # SPDX-License-Identifier: MIT
 from __future__ import annotations
 
+import contextlib
+import gzip
+import hashlib
 import json
 import os
+import re
 import shutil
+import time
+import zipfile
 from collections import ChainMap
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, TypedDict
+from typing import IO, Any, Callable, TypedDict
 from urllib.parse import urlparse, urlunparse
 
 from hatchling.builders.hooks.plugin.interface import BuildHookInterface
+from hatchling.builders.utils import get_reproducible_timestamp
 from hatchling.utils.context import ContextStringFormatter
+from packaging.version import InvalidVersion, Version
 
-from hatch_kicad.utils import getsha256
+from hatch_kicad.config import JsonFormat
+from hatch_kicad.pages import iter_static_pages
+from hatch_kicad.publish import MANIFEST_NAME, get_backend, publish
+from hatch_kicad.tasks import SkippedError, Task, run_tasks
+from hatch_kicad.utils import (
+    READ_SIZE,
+    Placement,
+    getsha256,
+    place_file,
+    replace_if_changed,
+    temporary_path,
+    write_if_changed,
+)
 from hatch_kicad.zip import ZipArchive
 
 __all__ = ["KicadRepositoryHook"]
 
+# `metadata_str` is substituted with this marker when formatting html template,
+# the marker is then replaced with `packages.json` content streamed from disk
+METADATA_STR_MARKER = "\x00metadata_str\x00"
+WHITESPACE = re.compile(r"\s*")
+
+
+class ManifestEntry(TypedDict):
+    sha256: str
+    size: int
+
+
+class PublishConfig(TypedDict):
+    target: str
+    endpoint_url: str
+    region: str
+    jobs: int
+
+
+class Retention(TypedDict):
+    versions: int | None
+    latest_per_kicad_version: bool
+    development_max_age: float | None
+
+
+def version_key(version: dict[str, Any]) -> tuple[int, Version]:
+    try:
+        parsed = Version(version.get("version", ""))
+    except InvalidVersion:
+        parsed = Version("0")
+    return version.get("version_epoch", 0), parsed
+
+
+def apply_retention(
+    versions: list[dict[str, Any]],
+    retention: Retention,
+    first_seen: dict[str, int],
+    now: int,
+) -> list[dict[str, Any]]:
+    """
+    Returns `versions` (in original order) which should be kept according to
+    `retention` policy:
+    - `versions` newest versions are kept (all when not set),
+    - latest version of each `kicad_version`-`kicad_version_max` range is kept
+      when `latest_per_kicad_version` enabled,
+    - `development` versions first seen more than `development_max_age`
+      days ago are dropped.
+    `first_seen` maps version string to timestamp when it has been published.
+    """
+    newest = sorted(versions, key=version_key, reverse=True)
+    keep = set()
+    limit = retention["versions"]
+    for v in newest[:limit] if limit is not None else newest:
+        keep.add(id(v))
+    if retention["latest_per_kicad_version"]:
+        ranges = set()
+        for v in newest:
+            kicad_range = (v.get("kicad_version"), v.get("kicad_version_max"))
+            if kicad_range not in ranges:
+                ranges.add(kicad_range)
+                keep.add(id(v))
+    if (max_age := retention["development_max_age"]) is not None:
+        for v in versions:
+            seen = first_seen.get(v.get("version", ""), now)
+            if v.get("status") == "development" and now - seen > max_age * 86400:
+                keep.discard(id(v))
+    return [v for v in versions if id(v) in keep]
+
+
+def group_first_seen(versions_first_seen: dict[str, int]) -> dict[str, dict[str, int]]:
+    """
+    Returns publication times keyed by `{identifier}/{version}` grouped
+    by package identifier and version string.
+    """
+    grouped: dict[str, dict[str, int]] = {}
+    for key, timestamp in versions_first_seen.items():
+        identifier, _, version = key.partition("/")
+        grouped.setdefault(identifier, {})[version] = timestamp
+    return grouped
+
 
 class DownloadableFileMetadata(TypedDict):
     url: str
@@ -28,57 +129,219 @@ class DownloadableFileMetadata(TypedDict):
     update_timestamp: int
 
 
-def get_file_metadata(filename: str, repository_url: str) -> DownloadableFileMetadata:
-    mtime = os.path.getmtime(filename)
-    dt = datetime.fromtimestamp(mtime, tz=timezone.utc)
+def get_file_metadata(
+    filename: str,
+    repository_url: str,
+    previous: DownloadableFileMetadata | None = None,
+) -> DownloadableFileMetadata:
+    """
+    Returns metadata of downloadable repository file. Update time of `previous`
+    metadata is reused when file content did not change, otherwise it is taken
+    from `SOURCE_DATE_EPOCH` environment variable (when set) or file modification
+    time, but always later than previous update time.
+    """
+    sha256 = getsha256(filename)
+    if previous and previous.get("sha256") == sha256:
+        timestamp = int(previous["update_timestamp"])
+    else:
+        if "SOURCE_DATE_EPOCH" in os.environ:
+            timestamp = get_reproducible_timestamp()
+        else:
+            timestamp = int(os.path.getmtime(filename))
+        if previous and isinstance(previous.get("update_timestamp"), int):
+            timestamp = max(timestamp, previous["update_timestamp"] + 1)
+    dt = datetime.fromtimestamp(timestamp, tz=timezone.utc)
     return {
         "url": f"{repository_url}/{Path(filename).name}",
-        "sha256": getsha256(filename),
+        "sha256": sha256,
         "update_time_utc": dt.strftime("%Y-%m-%d %H:%M:%S"),
-        "update_timestamp": int(mtime),
+        "update_timestamp": timestamp,
+    }
+
+
+def iter_packages_json(
+    packages: Iterable[dict[str, Any]], json_format: JsonFormat
+) -> Iterator[str]:
+    """
+    Serialize `{"packages": [...]}` document one package at a time.
+    Output is identical to `json_format.dumps` of the whole document but
+    only single package needs to be held in memory.
+    """
+    if json_format == JsonFormat.COMPACT:
+        opening, separator, closing = '{"packages":[', ",", "]}"
+    else:
+        opening, separator, closing = '{\n    "packages": [\n', ",\n", "\n    ]\n}"
+
+    first = True
+    for package in packages:
+        if first:
+            yield opening
+            first = False
+        else:
+            yield separator
+        serialized = json_format.dumps(package)
+        if json_format == JsonFormat.INDENT:
+            serialized = "\n".join(f"        {line}" for line in serialized.split("\n"))
+        yield serialized
+    if first:
+        yield json_format.dumps({"packages": []})
+    else:
+        yield closing
+
+
+class JsonStream:
+    """
+    Incremental reader of JSON values from text file. Buffer holds only
+    the value being decoded, it grows when value does not fit.
+    """
+
+    def __init__(self, f: IO[str], read_size: int = READ_SIZE) -> None:
+        self.f = f
+        self.read_size = read_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        # read at least as much as is buffered, so that retried decoding
+        # of large value is not quadratic
+        data = self.f.read(max(self.read_size, len(self.buffer) - self.pos))
+        self.buffer = self.buffer[self.pos :] + data
+        self.pos = 0
+        self.eof = not data
+        return not self.eof
+
+    def peek(self) -> str:
+        """
+        Skip whitespace and return next character, empty string at the end.
+        """
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()  # type: ignore[union-attr]
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        if (found := self.peek()) != char:
+            msg = f"Expected `{char}`, found `{found}`"
+            raise ValueError(msg)
+        self.pos += 1
+
+    def skip(self, char: str) -> bool:
+        if self.peek() == char:
+            self.pos += 1
+            return True
+        return False
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # number at the end of buffer may continue in not yet read data
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_packages_file(
+    path: str, read_size: int = READ_SIZE
+) -> Iterator[dict[str, Any]]:
+    """
+    Parse `{"packages": [...]}` document one package at a time, counterpart
+    of `iter_packages_json`. Raises ValueError when document is malformed,
+    possibly after some packages have been yielded.
+    """
+    with open(path, encoding="utf-8") as f:
+        stream = JsonStream(f, read_size)
+        found = False
+        stream.expect("{")
+        more = not stream.skip("}")
+        while more:
+            key = stream.value()
+            stream.expect(":")
+            if key == "packages":
+                found = True
+                yield from iter_array(stream)
+            else:
+                stream.value()
+            if more := not stream.skip("}"):
+                stream.expect(",")
+        if not found:
+            msg = "Missing `packages` list"
+            raise ValueError(msg)
+        if stream.peek():
+            msg = "Extra data after `packages` document"
+            raise ValueError(msg)
+
+
+def iter_array(stream: JsonStream) -> Iterator[dict[str, Any]]:
+    stream.expect("[")
+    more = not stream.skip("]")
+    while more:
+        package = stream.value()
+        if not isinstance(package, dict):
+            msg = "Package must be an object"
+            raise ValueError(msg)
+        yield package
+        if more := not stream.skip("]"):
+            stream.expect(",")
+
+
+def merge_package(package: dict[str, Any], previous: dict[str, Any]) -> dict[str, Any]:
+    """
+    Returns `package` with versions of `previous` package appended,
+    versions of `package` take precedence over previous ones with equal `version`.
+    """
+    versions = package.get("versions", [])
+    known = {v.get("version") for v in versions}
+    versions = versions + [
+        v for v in previous.get("versions", []) if v.get("version") not in known
+    ]
+    return {**package, "versions": versions}
+
+
+def gzip_stream(src: IO[bytes], dst: IO[bytes]) -> None:
+    with gzip.GzipFile(
+        filename="", mode="wb", compresslevel=9, fileobj=dst, mtime=0
+    ) as f:
+        shutil.copyfileobj(src, f, READ_SIZE)
+
+
+def get_compressors() -> dict[str, Callable[[IO[bytes], IO[bytes]], None]]:
+    """
+    Returns mapping of file extension to function writing pre-compressed
+    variant of `src` file content to `dst`, in chunks. Compression is
+    deterministic, `gzip` header does not contain file name nor timestamp.
+    Brotli variant is generated only if optional `brotli` package is installed.
+    """
+    compressors: dict[str, Callable[[IO[bytes], IO[bytes]], None]] = {
+        ".gz": gzip_stream,
     }
+    try:
+        # optional dependency, looked up only when pre-compression is enabled
+        import brotli  # type: ignore[import-not-found]  # noqa: PLC0415
+    except ImportError:
+        pass
+    else:
 
+        def brotli_stream(src: IO[bytes], dst: IO[bytes]) -> None:
+            compressor = brotli.Compressor(quality=11)
+            while data := src.read(READ_SIZE):
+                dst.write(compressor.process(data))
+            dst.write(compressor.finish())
 
-def get_html_index_template() -> str:
-    return """
-<!doctype html>
-<html lang="en">
-  <head>
-    <meta charset="UTF-8" />
-    <meta name="viewport" content="width=device-width, initial-scale=1.0" />
-    <link rel="icon" href="data:," />
-    <link
-      rel="stylesheet"
-      href="https://cdn.jsdelivr.net/npm/@picocss/pico@1/css/pico.min.css"
-    />
-  </head>
-  <script src="https://cdn.jsdelivr.net/npm/linkifyjs@4.1.1/dist/linkify.min.js"></script>
-  <script src="https://cdn.jsdelivr.net/npm/linkify-html@4.1.1/dist/linkify-html.min.js"></script>
-  <script>
-    window.onload = function () {{
-      let packages = document.getElementById("packages");
-      packages.innerHTML = linkifyHtml(packages.innerHTML);
-    }};
-  </script>
-  <body>
-    <main class="container">
-      <p>
-        Add <mark>{repository_url}/repository.json</mark> to KiCad's repository
-        list to use these packages:
-      </p>
-      <pre><code id="packages">{metadata_str}</code></pre>
-      <footer>
-        <small
-          >Built with
-          <a href="https://github.com/adamws/hatch-kicad" class="secondary"
-            >hatch-kicad</a
-          ></small
-        >
-      </footer>
-    </main>
-  </body>
-</html>
-"""
+        compressors[".br"] = brotli_stream
+    return compressors
 
 
 class KicadRepositoryHook(BuildHookInterface):
@@ -87,10 +350,40 @@ class KicadRepositoryHook(BuildHookInterface):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.repo_directory = f"{self.directory}/repository"
+        # output paths may change to content-hashed names, see `hashed_names`
         self.packages_out = f"{self.repo_directory}/packages.json"
         self.resources_out = f"{self.repo_directory}/resources.zip"
+        self.repository_out = f"{self.repo_directory}/repository.json"
+        self.manifest_out = f"{self.repo_directory}/{MANIFEST_NAME}"
+        # files produced by current `finalize` run, relative to `repo_directory`
+        self.outputs: dict[str, ManifestEntry] = {}
         self.__repository_url: str | None = None
         self.__html_data: str | None = None
+        self.__artifact_placement: Placement | None = None
+        self.__precompress: bool | None = None
+        self.__json_format: JsonFormat | None = None
+        self.__html_page_size: int | None = None
+        self.__html_search: bool | None = None
+        self.__merge_packages: bool | None = None
+        self.__hashed_names: bool | None = None
+        self.__hashed_names_keep: int | None = None
+        self.__retention: Retention | None = None
+        self.__publish: PublishConfig | None = None
+        # maps `{identifier}/{version}` to timestamp when it has been published
+        self.versions_first_seen: dict[str, int] = {}
+        # `versions_first_seen` grouped by identifier and version
+        self.first_seen: dict[str, dict[str, int]] = {}
+        self.now = 0
+        # `packages.json` file found in repository directory before update,
+        # streamed on every pass so it is never held in memory whole
+        self.previous_packages: str | None = None
+        # summary of merged packages collected by `scan_packages`
+        self.identifiers: set[str] = set()
+        # maps `download_url` of every version to its `download_sha256`
+        self.referenced_artifacts: dict[str, str] = {}
+        self.next_versions_first_seen: dict[str, int] = {}
+        # `repository.json` file found in repository directory before update
+        self.previous_repository: dict[str, Any] = {}
 
     @property
     def repository_url(self) -> str:
@@ -137,15 +430,13 @@ class KicadRepositoryHook(BuildHookInterface):
                 with open(html_data_template) as f:
                     html_data_template = f.read()
             else:
-                # use default
-                html_data_template = get_html_index_template()
+                # static pages are rendered instead, see `create_static_pages`
+                html_data_template = ""
 
             formatter = ContextStringFormatter(
                 ChainMap(
                     {
-                        "metadata_str": lambda *args: json.dumps(
-                            self.packages, indent=4
-                        ),
+                        "metadata_str": lambda *args: METADATA_STR_MARKER,
                         "repository_url": lambda *args: self.repository_url,
                     },
                 )
@@ -153,48 +444,620 @@ class KicadRepositoryHook(BuildHookInterface):
             self.__html_data = formatter.format(html_data_template)
         return self.__html_data
 
+    @property
+    def artifact_placement(self) -> Placement:
+        if not self.__artifact_placement:
+            value = self.config.get("artifact_placement", Placement.AUTO.value)
+            try:
+                placement = Placement(value)
+            except ValueError:
+                allowed = ", ".join(p for p in Placement)
+                msg = (
+                    f"Invalid `artifact_placement` value: `{value}`\n"
+                    f"Option `artifact_placement` for build hook `{self.PLUGIN_NAME}` "
+                    f"can be one of the following values: {allowed}"
+                )
+                raise ValueError(msg) from None
+            self.__artifact_placement = placement
+        return self.__artifact_placement
+
+    @property
+    def precompress(self) -> bool:
+        if self.__precompress is None:
+            precompress = self.config.get("precompress", False)
+            if not isinstance(precompress, bool):
+                msg = (
+                    "Option `precompress` for build hook "
+                    f"`{self.PLUGIN_NAME}` must be a boolean"
+                )
+                raise TypeError(msg)
+            self.__precompress = precompress
+        return self.__precompress
+
+    @property
+    def json_format(self) -> JsonFormat:
+        if not self.__json_format:
+            if "json_format" in self.config:
+                value = self.config["json_format"]
+                try:
+                    json_format = JsonFormat(value)
+                except ValueError:
+                    allowed = ", ".join(f for f in JsonFormat)
+                    msg = (
+                        f"Invalid `json_format` value: `{value}`\n"
+                        f"Option `json_format` for build hook `{self.PLUGIN_NAME}` "
+                        f"can be one of the following values: {allowed}"
+                    )
+                    raise ValueError(msg) from None
+            elif self.build_config:
+                json_format = self.build_config.json_format
+            else:
+                json_format = JsonFormat.INDENT
+            self.__json_format = json_format
+        return self.__json_format
+
+    @property
+    def html_page_size(self) -> int:
+        if self.__html_page_size is None:
+            page_size = self.config.get("html_page_size", 50)
+            if not isinstance(page_size, int) or isinstance(page_size, bool):
+                msg = (
+                    "Option `html_page_size` for build hook "
+                    f"`{self.PLUGIN_NAME}` must be an integer"
+                )
+                raise TypeError(msg)
+            if page_size < 1:
+                msg = (
+                    "Option `html_page_size` for build hook "
+                    f"`{self.PLUGIN_NAME}` must be greater than 0"
+                )
+                raise ValueError(msg)
+            self.__html_page_size = page_size
+        return self.__html_page_size
+
+    @property
+    def html_search(self) -> bool:
+        if self.__html_search is None:
+            html_search = self.config.get("html_search", True)
+            if not isinstance(html_search, bool):
+                msg = (
+                    "Option `html_search` for build hook "
+                    f"`{self.PLUGIN_NAME}` must be a boolean"
+                )
+                raise TypeError(msg)
+            self.__html_search = html_search
+        return self.__html_search
+
+    @property
+    def merge_packages(self) -> bool:
+        if self.__merge_packages is None:
+            merge_packages = self.config.get("merge_packages", False)
+            if not isinstance(merge_packages, bool):
+                msg = (
+                    "Option `merge_packages` for build hook "
+                    f"`{self.PLUGIN_NAME}` must be a boolean"
+                )
+                raise TypeError(msg)
+            self.__merge_packages = merge_packages
+        return self.__merge_packages
+
+    @property
+    def hashed_names(self) -> bool:
+        if self.__hashed_names is None:
+            hashed_names = self.config.get("hashed_names", False)
+            if not isinstance(hashed_names, bool):
+                msg = (
+                    "Option `hashed_names` for build hook "
+                    f"`{self.PLUGIN_NAME}` must be a boolean"
+                )
+                raise TypeError(msg)
+            self.__hashed_names = hashed_names
+        return self.__hashed_names
+
+    @property
+    def hashed_names_keep(self) -> int:
+        if self.__hashed_names_keep is None:
+            keep = self.config.get("hashed_names_keep", 3)
+            if not isinstance(keep, int) or isinstance(keep, bool):
+                msg = (
+                    "Option `hashed_names_keep` for build hook "
+                    f"`{self.PLUGIN_NAME}` must be an integer"
+                )
+                raise TypeError(msg)
+            if keep < 1:
+                msg = (
+                    "Option `hashed_names_keep` for build hook "
+                    f"`{self.PLUGIN_NAME}` must be greater than 0"
+                )
+                raise ValueError(msg)
+            self.__hashed_names_keep = keep
+        return self.__hashed_names_keep
+
+    @property
+    def retention(self) -> Retention | None:
+        if self.__retention is None and "retention" in self.config:
+            retention = self.config["retention"]
+            base = f"Option `retention` for build hook `{self.PLUGIN_NAME}`"
+            if not isinstance(retention, dict):
+                msg = f"{base} must be a dictionary"
+                raise TypeError(msg)
+            unknown = set(retention) - set(Retention.__annotations__)
+            if unknown:
+                msg = f"{base} has unknown properties: {', '.join(sorted(unknown))}"
+                raise ValueError(msg)
+            versions = retention.get("versions")
+            if versions is not None and (
+                not isinstance(versions, int) or isinstance(versions, bool)
+            ):
+                msg = f"{base} `versions` property must be an integer"
+                raise TypeError(msg)
+            if versions is not None and versions < 1:
+                msg = f"{base} `versions` property must be greater than 0"
+                raise ValueError(msg)
+            latest = retention.get("latest_per_kicad_version", False)
+            if not isinstance(latest, bool):
+                msg = f"{base} `latest_per_kicad_version` property must be a boolean"
+                raise TypeError(msg)
+            max_age = retention.get("development_max_age")
+            if max_age is not None and (
+                not isinstance(max_age, (int, float)) or isinstance(max_age, bool)
+            ):
+                msg = f"{base} `development_max_age` property must be a number"
+                raise TypeError(msg)
+            self.__retention = Retention(
+                versions=versions,
+                latest_per_kicad_version=latest,
+                development_max_age=max_age,
+            )
+        return self.__retention
+
+    @property
+    def publish(self) -> PublishConfig | None:
+        if self.__publish is None and "publish" in self.config:
+            config = self.config["publish"]
+            base = f"Option `publish` for build hook `{self.PLUGIN_NAME}`"
+            if not isinstance(config, dict):
+                msg = f"{base} must be a dictionary"
+                raise TypeError(msg)
+            if "target" not in config:
+                msg = f"{base} must have `target` property"
+                raise ValueError(msg)
+            for name in ["target", "endpoint_url", "region"]:
+                if not isinstance(config.get(name, ""), str):
+                    msg = f"{base} `{name}` property must be a string"
+                    raise TypeError(msg)
+            jobs = config.get("jobs", 8)
+            if not isinstance(jobs, int) or isinstance(jobs, bool) or jobs < 1:
+                msg = f"{base} `jobs` property must be a positive integer"
+                raise ValueError(msg)
+            self.__publish = PublishConfig(
+                target=config["target"],
+                endpoint_url=config.get("endpoint_url", ""),
+                region=config.get("region", ""),
+                jobs=jobs,
+            )
+        return self.__publish
+
     def initialize(self, version: str, build_data: dict[str, Any]) -> None:
         pass
 
+    def read_manifest(self) -> dict[str, Any]:
+        try:
+            with open(self.manifest_out, encoding="utf-8") as f:
+                manifest = json.load(f)
+                return manifest if isinstance(manifest, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def write_output(self, name: str, data: bytes) -> None:
+        path = Path(self.repo_directory, name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_if_changed(str(path), data)
+        self.outputs[name] = {
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "size": len(data),
+        }
+
+    def replace_output(self, name: str, src: str) -> None:
+        dst = f"{self.repo_directory}/{name}"
+        replace_if_changed(src, dst)
+        self.outputs[name] = {
+            "sha256": getsha256(dst),
+            "size": os.path.getsize(dst),
+        }
+
+    def publish_output(self, name: str, src: str) -> str:
+        """
+        Place `src` file as `name` output or under content-hashed name
+        when `hashed_names` enabled. Returns path of the output.
+        """
+        if self.hashed_names:
+            stem, ext = os.path.splitext(name)
+            name = f"{stem}.{getsha256(src)[:16]}{ext}"
+        self.replace_output(name, src)
+        return f"{self.repo_directory}/{name}"
+
+    def keep_hashed_outputs(self) -> None:
+        """
+        Keep `hashed_names_keep - 1` most recent previous generations
+        of content-hashed files, so clients which fetched older `repository.json`
+        can still download files it references. Older files are removed as stale.
+        """
+        for name in ["packages.json", "resources.zip"]:
+            stem, ext = os.path.splitext(name)
+            pattern = re.compile(rf"^{stem}\.[0-9a-f]{{16}}{re.escape(ext)}$")
+            candidates = [
+                entry
+                for entry in os.scandir(self.repo_directory)
+                if pattern.match(entry.name) and entry.name not in self.outputs
+            ]
+            candidates.sort(key=lambda e: e.stat().st_mtime_ns, reverse=True)
+            for entry in candidates[: self.hashed_names_keep - 1]:
+                self.outputs[entry.name] = {
+                    "sha256": getsha256(entry.path),
+                    "size": entry.stat().st_size,
+                }
+
+    def place_artifact(
+        self, artifact_path: str, previous: dict[str, ManifestEntry]
+    ) -> None:
+        name = Path(artifact_path).name
+        dst = f"{self.repo_directory}/{name}"
+        entry: ManifestEntry = {
+            "sha256": getsha256(artifact_path),
+            "size": os.path.getsize(artifact_path),
+        }
+        unchanged = previous.get(name) == entry and (
+            os.path.isfile(dst) and os.path.getsize(dst) == entry["size"]
+        )
+        if not unchanged and not (
+            os.path.isfile(dst) and os.path.samefile(artifact_path, dst)
+        ):
+            placement = place_file(artifact_path, dst, self.artifact_placement)
+            self.app.display_debug(f"Placed `{name}` using `{placement}` method")
+        self.outputs[name] = entry
+
+    def remove_stale_files(self, previous: dict[str, ManifestEntry]) -> None:
+        for name in previous:
+            if name not in self.outputs:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(f"{self.repo_directory}/{name}")
+
+    def read_previous_repository(self) -> dict[str, Any]:
+        try:
+            with open(self.repository_out, encoding="utf-8") as f:
+                repository = json.load(f)
+                return repository if isinstance(repository, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def previous_file_metadata(self, key: str) -> DownloadableFileMetadata | None:
+        """
+        Returns `key` file metadata of previous `repository.json`
+        or None when it is missing or malformed.
+        """
+        metadata = self.previous_repository.get(key)
+        if isinstance(metadata, dict) and isinstance(
+            metadata.get("update_timestamp"), int
+        ):
+            return metadata  # type: ignore[return-value]
+        return None
+
+    def previous_output(self, key: str, default: str) -> str:
+        """
+        Returns path of file referenced by `key` of previous `repository.json`.
+        """
+        with contextlib.suppress(KeyError, TypeError):
+            url = self.previous_repository[key]["url"]
+            if isinstance(url, str) and (name := Path(urlparse(url).path).name):
+                return f"{self.repo_directory}/{name}"
+        return f"{self.repo_directory}/{default}"
+
+    def iter_merged_packages(self) -> Iterator[dict[str, Any]]:
+        with open(f"{self.directory}/metadata.json", encoding="utf-8") as f:
+            package = json.load(f)
+        merged = False
+        previous_packages = (
+            iter_packages_file(self.previous_packages) if self.previous_packages else ()
+        )
+        for previous in previous_packages:
+            if previous.get("identifier") == package.get("identifier"):
+                yield merge_package(package, previous)
+                merged = True
+            else:
+                yield previous
+        if not merged:
+            yield package
+
+    def iter_packages(self) -> Iterator[dict[str, Any]]:
+        """
+        Yields merged packages with versions kept by `retention` policy,
+        as decided by `scan_packages`.
+        """
+        for package in self.iter_merged_packages():
+            if not self.retention:
+                yield package
+                continue
+            identifier = package.get("identifier", "")
+            versions = [
+                v
+                for v in package.get("versions", [])
+                if f"{identifier}/{v.get('version', '')}"
+                in self.next_versions_first_seen
+            ]
+            yield {**package, "versions": versions}
+
+    def scan_packages(self) -> None:
+        """
+        Collect package identifiers, referenced artifacts and publication
+        times of merged packages in single pass. `retention` policy is applied
+        here only, kept versions are those with publication time recorded.
+        Previous `packages.json` which turns out to be malformed is ignored.
+        """
+        self.identifiers = set()
+        self.referenced_artifacts = {}
+        self.next_versions_first_seen = {}
+        try:
+            for package in self.iter_merged_packages():
+                identifier = package.get("identifier", "")
+                self.identifiers.add(identifier)
+                first_seen = self.first_seen.get(identifier, {})
+                versions = package.get("versions", [])
+                if self.retention:
+                    versions = apply_retention(
+                        versions, self.retention, first_seen, self.now
+                    )
+                for version in versions:
+                    name = version.get("version", "")
+                    self.next_versions_first_seen[f"{identifier}/{name}"] = (
+                        first_seen.get(name, self.now)
+                    )
+                    # urls are parsed later by concurrently running step
+                    url = version.get("download_url", "")
+                    sha256 = version.get("download_sha256", "")
+                    self.referenced_artifacts[url] = sha256
+        except (OSError, ValueError):
+            if not self.previous_packages:
+                raise
+            self.previous_packages = None
+            self.scan_packages()
+
+    def keep_referenced_artifacts(self) -> None:
+        """
+        Keep artifacts of previous versions which are still referenced
+        by `packages.json` and are hosted in the repository directory.
+        """
+        for url, sha256 in self.referenced_artifacts.items():
+            name = Path(urlparse(url).path).name
+            path = f"{self.repo_directory}/{name}"
+            if name and name not in self.outputs and os.path.isfile(path):
+                self.outputs[name] = {
+                    "sha256": sha256 or getsha256(path),
+                    "size": os.path.getsize(path),
+                }
+
     def create_packages_file(self) -> None:
-        with open(f"{self.directory}/metadata.json") as f:
-            self.packages = {"packages": [json.load(f)]}
-        with open(self.packages_out, "w", encoding="utf-8") as f:
-            json.dump(self.packages, f, indent=4)
+        with temporary_path(f"{self.repo_directory}/packages.json.tmp") as tmp:
+            with open(tmp, "w", encoding="utf-8") as f:
+                for chunk in iter_packages_json(self.iter_packages(), self.json_format):
+                    f.write(chunk)
+            self.packages_out = self.publish_output("packages.json", tmp)
 
     def create_resources_file(self) -> None:
-        with ZipArchive(
-            self.resources_out,
-            reproducible=self.build_config.reproducible,
-        ) as zipf:
-            zipf.write(
-                self.build_config.icon, f"{self.build_config.identifier}/icon.png"
+        # existing `resources.zip` is updated: entries of other packages
+        # which are still part of the repository are copied as they are
+        # (without recompression), entries of the current package are replaced
+        # and entries of packages which are no longer listed are dropped
+        identifier = self.build_config.identifier
+        identifiers = self.identifiers - {identifier}
+
+        previous_resources = self.previous_output("resources", "resources.zip")
+        tmp_path = temporary_path(f"{self.repo_directory}/resources.zip.tmp")
+        with tmp_path as tmp, contextlib.ExitStack() as stack:
+            previous = None
+            with contextlib.suppress(OSError, zipfile.BadZipFile):
+                previous = stack.enter_context(zipfile.ZipFile(previous_resources))
+            zipf = stack.enter_context(
+                ZipArchive(Path(tmp), reproducible=self.build_config.reproducible)
             )
+            members: list[tuple[str, zipfile.ZipInfo | None]] = [
+                (f"{identifier}/icon.png", None)
+            ]
+            if previous:
+                members += [
+                    (info.filename, info)
+                    for info in previous.infolist()
+                    if info.filename.split("/")[0] in identifiers
+                ]
+            # sort entries so result does not depend on update history
+            for name, info in sorted(members, key=lambda m: m[0]):
+                if info and previous:
+                    zipf.copy_raw(previous, info)
+                else:
+                    zipf.write(self.build_config.icon, name)
+            stack.close()
+            self.resources_out = self.publish_output("resources.zip", tmp)
 
     def create_repository_file(self) -> None:
         repository = {
             "$schema": "https://gitlab.com/kicad/code/kicad/-/raw/master/kicad/pcm/schemas/pcm.v2.schema.json#/definitions/Repository",
             "maintainer": self.build_config.author,
             "name": f"{self.repository_url} repository",
-            "packages": get_file_metadata(self.packages_out, self.repository_url),
-            "resources": get_file_metadata(self.resources_out, self.repository_url),
+            "packages": get_file_metadata(
+                self.packages_out,
+                self.repository_url,
+                self.previous_file_metadata("packages"),
+            ),
+            "resources": get_file_metadata(
+                self.resources_out,
+                self.repository_url,
+                self.previous_file_metadata("resources"),
+            ),
         }
-        with open(f"{self.repo_directory}/repository.json", "w", encoding="utf-8") as f:
-            json.dump(repository, f, indent=4)
+        # `sha256` values are calculated from files as written,
+        # i.e. exactly the bytes which are served
+        data = self.json_format.dumps(repository)
+        self.write_output("repository.json", data.encode("utf-8"))
+
+    def create_static_pages(self) -> None:
+        # merged packages are read back from just written `packages.json`,
+        # previous one may have been already replaced
+        for name, page in iter_static_pages(
+            iter_packages_file(self.packages_out),
+            self.repository_url,
+            self.html_page_size,
+            search=self.html_search,
+        ):
+            self.write_output(name, page.encode("utf-8"))
 
     def create_index_html(self) -> None:
-        if self.html_data:
-            with open(f"{self.repo_directory}/index.html", "w") as f:
-                f.write(self.html_data)
+        if "html_data" not in self.config:
+            self.create_static_pages()
+        elif self.html_data:
+            # reuse already serialized `packages.json` instead of serializing
+            # packages again, content is copied in chunks
+            with temporary_path(f"{self.repo_directory}/index.html.tmp") as tmp:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    parts = self.html_data.split(METADATA_STR_MARKER)
+                    f.write(parts[0])
+                    for part in parts[1:]:
+                        with open(self.packages_out, encoding="utf-8") as packages:
+                            shutil.copyfileobj(packages, f)
+                        f.write(part)
+                self.replace_output("index.html", tmp)
+
+    def create_precompressed_files(self, previous: dict[str, ManifestEntry]) -> None:
+        """
+        Compress text outputs in chunks into temporary files. Variants of
+        outputs which content did not change since previous run (recorded
+        in `previous` manifest) are kept without compressing them again.
+        """
+        compressors = get_compressors()
+        text_outputs = [
+            name for name in self.outputs if name.endswith((".json", ".html", ".js"))
+        ]
+
+        def _compress(name: str, ext: str) -> None:
+            variant = f"{name}{ext}"
+            path = f"{self.repo_directory}/{variant}"
+            entry = previous.get(variant)
+            if (
+                entry
+                and previous.get(name) == self.outputs[name]
+                and os.path.isfile(path)
+                and os.path.getsize(path) == entry["size"]
+            ):
+                self.outputs[variant] = entry
+                return
+            with temporary_path(f"{path}.tmp") as tmp:
+                source = f"{self.repo_directory}/{name}"
+                with open(source, "rb") as src, open(tmp, "wb") as dst:
+                    compressors[ext](src, dst)
+                self.replace_output(variant, tmp)
+
+        # zlib and brotli release GIL so threads are sufficient
+        with ThreadPoolExecutor() as executor:
+            jobs = [
+                executor.submit(_compress, name, ext)
+                for name in text_outputs
+                for ext in compressors
+            ]
+            for job in jobs:
+                job.result()
+
+    def get_steps(
+        self, artifact_path: str, previous: dict[str, ManifestEntry]
+    ) -> dict[str, Task]:
+        """
+        Returns repository update steps with their dependencies. Steps
+        producing independent files run concurrently, `repository.json`
+        waits only for files it references.
+        """
+        packages = "create_packages_file"
+        resources = "create_resources_file"
+        steps = {
+            "place_artifact": Task(
+                lambda: self.place_artifact(artifact_path, previous)
+            ),
+            # must not override manifest entry of just placed artifact
+            "keep_referenced_artifacts": Task(
+                self.keep_referenced_artifacts, ("place_artifact",)
+            ),
+            packages: Task(self.create_packages_file),
+            resources: Task(self.create_resources_file),
+            "create_repository_file": Task(
+                self.create_repository_file, (packages, resources)
+            ),
+            # `html_data` template embeds content of `packages.json`,
+            # static pages are rendered from it
+            "create_index_html": Task(self.create_index_html, (packages,)),
+        }
+        if self.hashed_names:
+            steps["keep_hashed_outputs"] = Task(
+                self.keep_hashed_outputs, (packages, resources)
+            )
+        if self.precompress:
+            # compresses all text outputs, so it goes last
+            steps["create_precompressed_files"] = Task(
+                lambda: self.create_precompressed_files(previous), tuple(steps)
+            )
+        return steps
+
+    def run_steps(self, steps: dict[str, Task]) -> None:
+        """
+        Run `steps` concurrently, every failed or skipped step is reported
+        and the error of the first failed step is raised.
+        """
+        errors = run_tasks(steps)
+        for name, error in errors.items():
+            if isinstance(error, SkippedError):
+                self.app.display_error(f"Step `{name}` skipped: {error}")
+            else:
+                self.app.display_error(f"Step `{name}` failed: {error}")
+        if failed := [e for e in errors.values() if not isinstance(e, SkippedError)]:
+            raise failed[0]
 
     def finalize(
         self, version: str, build_data: dict[str, Any], artifact_path: str
     ) -> None:
-        shutil.rmtree(self.repo_directory, ignore_errors=True)
-        os.makedirs(self.repo_directory)
-        shutil.copy(artifact_path, self.repo_directory)
-
-        self.create_packages_file()
-        self.create_resources_file()
-        self.create_repository_file()
-        self.create_index_html()
+        # repository directory is updated in place, only files which content
+        # changed are rewritten and files produced by previous run
+        # (recorded in manifest) which are no longer needed are removed
+        os.makedirs(self.repo_directory, exist_ok=True)
+        manifest = self.read_manifest()
+        previous = manifest.get("files", {})
+        self.versions_first_seen = manifest.get("versions", {})
+        self.first_seen = group_first_seen(self.versions_first_seen)
+        self.now = (
+            get_reproducible_timestamp()
+            if "SOURCE_DATE_EPOCH" in os.environ
+            else int(time.time())
+        )
+        self.outputs = {}
+        self.previous_repository = self.read_previous_repository()
+        self.previous_packages = (
+            self.previous_output("packages", "packages.json")
+            if self.merge_packages
+            else None
+        )
+        self.scan_packages()
+        self.run_steps(self.get_steps(artifact_path, previous))
+        self.remove_stale_files(previous)
+        self.versions_first_seen = self.next_versions_first_seen
+        manifest = {
+            "files": dict(sorted(self.outputs.items())),
+            "versions": dict(sorted(self.versions_first_seen.items())),
+        }
+        write_if_changed(self.manifest_out, json.dumps(manifest, indent=4).encode())
+
+        if config := self.publish:
+            backend = get_backend(
+                config["target"], config["endpoint_url"], config["region"]
+            )
+            result = publish(self.repo_directory, backend, config["jobs"])
+            self.app.display_info(
+                f"Published repository to {config['target']}: "
+                f"{len(result['uploaded'])} uploaded, "
+                f"{len(result['deleted'])} deleted, "
+                f"{len(result['unchanged'])} unchanged"
+            )
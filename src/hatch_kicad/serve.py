@@ -0,0 +1,310 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import email.utils
+import http.client
+import os
+import re
+import threading
+import time
+from collections import Counter
+from functools import lru_cache, partial
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, TypedDict
+from urllib.parse import urlparse
+
+from hatch_kicad.utils import READ_SIZE, getsha256
+
+__all__ = ["RepositoryRequestHandler", "load", "make_server"]
+
+# pre-compressed siblings created by `precompress` option, in order of preference
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+# files created by `hashed_names` option never change and can be cached forever
+HASHED_NAME_REGEX = re.compile(r"\.[0-9a-f]{16}\.(json|zip)$")
+RANGE_REGEX = re.compile(r"^bytes=(\d*)-(\d*)$")
+# number of entity tags kept in memory, least recently used are evicted
+ETAG_CACHE_SIZE = 4096
+
+
+class LoadResult(TypedDict):
+    requests: int
+    errors: int
+    statuses: dict[int, int]
+    bytes: int
+    duration: float
+    requests_per_second: float
+    latency_ms: dict[str, float]
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """
+    Returns content codings accepted by `Accept-Encoding` header value,
+    codings with zero quality value are excluded.
+    """
+    accepted = set()
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+@lru_cache(maxsize=ETAG_CACHE_SIZE)
+def entity_tag(path: str, mtime_ns: int, size: int) -> str:  # noqa: ARG001
+    """
+    Returns entity tag derived from content of `path`. Modification time
+    and size are part of the cache key, so that changed file gets new tag.
+    """
+    return f'"{getsha256(path)[:32]}"'
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Returns inclusive `(first, last)` byte positions of single range
+    `Range` header value. Returns None when header is not supported and
+    raises ValueError when range is not satisfiable.
+    """
+    match = RANGE_REGEX.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if size == 0:
+        raise ValueError
+    if not first:
+        # suffix range, last `n` bytes
+        if int(last) == 0:
+            raise ValueError
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError
+    return start, end
+
+
+class RepositoryRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Static file handler for generated repository directory with support
+    of conditional requests, single byte range requests and pre-compressed
+    variants of files.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        if not getattr(self.server, "quiet", False):
+            super().log_message(format, *args)
+
+    def select_variant(self, path: str) -> tuple[str, str | None]:
+        accepted = accepted_encodings(self.headers.get("Accept-Encoding", ""))
+        for coding, suffix in ENCODINGS.items():
+            if coding in accepted and os.path.isfile(path + suffix):
+                return path + suffix, coding
+        return path, None
+
+    def not_modified(self, etag: str, mtime: float) -> bool:
+        if if_none_match := self.headers.get("If-None-Match"):
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+        if if_modified_since := self.headers.get("If-Modified-Since"):
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            return int(mtime) <= since.timestamp()
+        return False
+
+    def send_head(self):  # type: ignore[override]
+        self.range: tuple[int, int] | None = None
+        path = self.translate_path(self.path)
+        index = os.path.join(path, "index.html")
+        if os.path.isdir(path) and self.path.endswith("/") and os.path.isfile(index):
+            path = index
+        if not os.path.isfile(path):
+            return super().send_head()
+
+        has_variants = any(os.path.isfile(path + s) for s in ENCODINGS.values())
+        variant, coding = self.select_variant(path)
+        try:
+            f = open(variant, "rb")
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        try:
+            stat = os.fstat(f.fileno())
+            etag = entity_tag(variant, stat.st_mtime_ns, stat.st_size)
+            size = stat.st_size
+
+            common_headers = {
+                "ETag": etag,
+                "Last-Modified": self.date_time_string(int(stat.st_mtime)),
+                "Accept-Ranges": "bytes",
+                "Cache-Control": (
+                    "public, max-age=31536000, immutable"
+                    if HASHED_NAME_REGEX.search(path)
+                    else "no-cache"
+                ),
+            }
+            if has_variants:
+                common_headers["Vary"] = "Accept-Encoding"
+
+            if self.not_modified(etag, stat.st_mtime):
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                for key, value in common_headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                f.close()
+                return None
+
+            range_header = self.headers.get("Range")
+            if_range = self.headers.get("If-Range")
+            if range_header and (not if_range or if_range == etag):
+                try:
+                    self.range = parse_range(range_header, size)
+                except ValueError:
+                    self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    f.close()
+                    return None
+
+            self.send_response(
+                HTTPStatus.OK if self.range is None else HTTPStatus.PARTIAL_CONTENT
+            )
+            self.send_header("Content-Type", self.guess_type(path))
+            if coding:
+                self.send_header("Content-Encoding", coding)
+            for key, value in common_headers.items():
+                self.send_header(key, value)
+            if self.range is None:
+                self.send_header("Content-Length", str(size))
+            else:
+                first, last = self.range
+                self.send_header("Content-Range", f"bytes {first}-{last}/{size}")
+                self.send_header("Content-Length", str(last - first + 1))
+            self.end_headers()
+            return f
+        except Exception:
+            f.close()
+            raise
+
+    def copyfile(self, source, outputfile) -> None:  # type: ignore[override]
+        if self.range is None:
+            super().copyfile(source, outputfile)
+            return
+        first, last = self.range
+        source.seek(first)
+        remaining = last - first + 1
+        while remaining > 0 and (data := source.read(min(READ_SIZE, remaining))):
+            outputfile.write(data)
+            remaining -= len(data)
+
+
+def make_server(
+    directory: str, host: str = "127.0.0.1", port: int = 8000, *, quiet: bool = False
+) -> ThreadingHTTPServer:
+    """
+    Returns threaded HTTP server serving repository `directory`,
+    use `serve_forever` to start it.
+    """
+    handler = partial(RepositoryRequestHandler, directory=directory)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.quiet = quiet  # type: ignore[attr-defined]
+    return server
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def load(
+    url: str,
+    clients: int = 10,
+    requests: int = 100,
+    interval: float = 0.0,
+    timeout: float = 10.0,
+) -> LoadResult:
+    """
+    Simulate `clients` package managers polling `url` concurrently.
+    Every client keeps its own persistent connection, sends `requests`
+    conditional requests with `gzip` accepted and waits `interval` seconds
+    between them, the same way as PCM checks `repository.json` for updates.
+    """
+    parsed = urlparse(url)
+    connection_class = (
+        http.client.HTTPSConnection
+        if parsed.scheme == "https"
+        else http.client.HTTPConnection
+    )
+    path = parsed.path or "/"
+    if parsed.query:
+        path += f"?{parsed.query}"
+
+    lock = threading.Lock()
+    latencies: list[float] = []
+    statuses: Counter[int] = Counter()
+    totals = {"bytes": 0, "errors": 0}
+
+    def _client() -> None:
+        connection = connection_class(parsed.netloc, timeout=timeout)
+        etag = None
+        for i in range(requests):
+            if i and interval:
+                time.sleep(interval)
+            headers = {"Accept-Encoding": "gzip"}
+            if etag:
+                headers["If-None-Match"] = etag
+            start = time.perf_counter()
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                with lock:
+                    totals["errors"] += 1
+                continue
+            elapsed = time.perf_counter() - start
+            etag = response.getheader("ETag", etag)
+            with lock:
+                latencies.append(elapsed)
+                statuses[response.status] += 1
+                totals["bytes"] += len(body)
+        connection.close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=_client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - start
+
+    return {
+        "requests": len(latencies),
+        "errors": totals["errors"],
+        "statuses": dict(sorted(statuses.items())),
+        "bytes": totals["bytes"],
+        "duration": round(duration, 3),
+        "requests_per_second": round(len(latencies) / duration, 1) if duration else 0,
+        "latency_ms": {
+            name: round(percentile(latencies, q) * 1000, 3)
+            for name, q in [("p50", 0.5), ("p95", 0.95), ("p99", 0.99)]
+        },
+    }
@@ -0,0 +1,202 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import ast
+import hashlib
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+from functools import partial
+from typing import TypedDict
+
+__all__ = ["DEFAULT_EXCLUDE", "is_excluded", "slim_files"]
+
+# bump when transformation changes, so cached results are not reused
+SLIM_VERSION = 1
+DEFAULT_EXCLUDE = [
+    "test_*.py",
+    "*_test.py",
+    "conftest.py",
+    "tests/*",
+    "*/tests/*",
+    "__pycache__/*",
+    "*/__pycache__/*",
+    "*.pyc",
+    "*.pyo",
+]
+
+# nodes which `body` must not be empty
+BLOCK_NODES = (
+    ast.ClassDef,
+    ast.FunctionDef,
+    ast.AsyncFunctionDef,
+    ast.For,
+    ast.AsyncFor,
+    ast.While,
+    ast.If,
+    ast.With,
+    ast.AsyncWith,
+    ast.Try,
+    ast.ExceptHandler,
+    ast.match_case,
+)
+
+
+class SlimmedFile(TypedDict):
+    # path of slimmed file in cache directory
+    path: str
+    sha256: str
+    size: int
+    slim_size: int
+
+
+def is_excluded(path: str, patterns: list[str]) -> bool:
+    """
+    Returns True when posix `path` or its file name matches any of `patterns`.
+    """
+    name = path.rsplit("/", 1)[-1]
+    return any(fnmatch(path, p) or fnmatch(name, p) for p in patterns)
+
+
+def is_type_checking(node: ast.expr) -> bool:
+    if isinstance(node, ast.Name):
+        return node.id == "TYPE_CHECKING"
+    return isinstance(node, ast.Attribute) and node.attr == "TYPE_CHECKING"
+
+
+class Slimmer(ast.NodeTransformer):
+    """
+    Removes docstrings and `if TYPE_CHECKING:` blocks, which are never
+    executed at runtime. Comments are dropped by parsing itself.
+    """
+
+    def __init__(self, *, strip_docstrings: bool) -> None:
+        self.strip_docstrings = strip_docstrings
+
+    def strip_docstring(self, node):
+        body = node.body
+        if (
+            self.strip_docstrings
+            and body
+            and isinstance(body[0], ast.Expr)
+            and isinstance(body[0].value, ast.Constant)
+            and isinstance(body[0].value.value, str)
+        ):
+            body = body[1:]
+        node.body = body or [ast.Pass()]
+        return node
+
+    def visit_Module(self, node: ast.Module) -> ast.Module:
+        self.generic_visit(node)
+        self.strip_docstring(node)
+        # module consisting only of docstring becomes empty
+        if len(node.body) == 1 and isinstance(node.body[0], ast.Pass):
+            node.body = []
+        return node
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> ast.ClassDef:
+        self.generic_visit(node)
+        return self.strip_docstring(node)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> ast.FunctionDef:
+        self.generic_visit(node)
+        return self.strip_docstring(node)
+
+    def visit_AsyncFunctionDef(
+        self, node: ast.AsyncFunctionDef
+    ) -> ast.AsyncFunctionDef:
+        self.generic_visit(node)
+        return self.strip_docstring(node)
+
+    def visit_If(self, node: ast.If):
+        self.generic_visit(node)
+        if is_type_checking(node.test):
+            return node.orelse or None
+        return node
+
+
+def slim_source(source: bytes, *, strip_docstrings: bool = True) -> bytes:
+    """
+    Returns `source` without comments, type checking blocks and
+    (when `strip_docstrings` enabled) docstrings.
+    Raises SyntaxError when source can't be parsed.
+    """
+    tree = Slimmer(strip_docstrings=strip_docstrings).visit(ast.parse(source))
+    # empty blocks left after dropping `if TYPE_CHECKING:` must stay valid
+    for node in ast.walk(tree):
+        if isinstance(node, BLOCK_NODES) and not node.body:
+            node.body = [ast.Pass()]
+        elif sys.version_info >= (3, 11) and isinstance(node, ast.TryStar):
+            node.body = node.body or [ast.Pass()]
+    result = ast.unparse(ast.fix_missing_locations(tree))
+    return f"{result}\n".encode() if result else b""
+
+
+def cache_key(source: bytes, *, strip_docstrings: bool) -> str:
+    # `ast.unparse` output may differ between interpreter versions
+    version = f"{sys.version_info.major}.{sys.version_info.minor}"
+    salt = f"{SLIM_VERSION}:{version}:{int(strip_docstrings)}:"
+    return hashlib.sha256(salt.encode() + source).hexdigest()
+
+
+def slim_to_cache(source_path: str, cache_path: str, *, strip_docstrings: bool) -> None:
+    """
+    Write slimmed `source_path` to `cache_path`, sources which can't be
+    parsed are stored verbatim. Runs in worker process.
+    """
+    with open(source_path, "rb") as f:
+        source = f.read()
+    try:
+        result = slim_source(source, strip_docstrings=strip_docstrings)
+    except (SyntaxError, ValueError):
+        result = source
+    tmp = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(result)
+    os.replace(tmp, cache_path)
+
+
+def slim_files(
+    sources: list[tuple[str, str]],
+    cache_dir: str,
+    *,
+    strip_docstrings: bool = True,
+    jobs: int | None = None,
+) -> dict[str, SlimmedFile]:
+    """
+    Slim `(path, arcname)` python sources. Results are stored in `cache_dir`
+    under hash of the original content, files missing in cache are processed
+    in parallel. Returns mapping of arcname to slimmed file details.
+    """
+    result: dict[str, SlimmedFile] = {}
+    pending: dict[str, str] = {}
+    for path, arcname in sources:
+        with open(path, "rb") as f:
+            content = f.read()
+        key = cache_key(content, strip_docstrings=strip_docstrings)
+        cache_path = os.path.join(cache_dir, f"{key}.py")
+        if not os.path.isfile(cache_path):
+            pending[cache_path] = path
+        result[arcname] = {
+            "path": cache_path,
+            "sha256": hashlib.sha256(content).hexdigest(),
+            "size": len(content),
+            "slim_size": 0,
+        }
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            list(
+                executor.map(
+                    partial(slim_to_cache, strip_docstrings=strip_docstrings),
+                    pending.values(),
+                    pending.keys(),
+                )
+            )
+
+    for entry in result.values():
+        entry["slim_size"] = os.path.getsize(entry["path"])
+    return result
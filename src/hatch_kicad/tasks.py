@@ -0,0 +1,69 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, NamedTuple
+
+__all__ = ["SkippedError", "Task", "run_tasks"]
+
+
+class Task(NamedTuple):
+    func: Callable[[], None]
+    # names of tasks which must succeed before this one starts
+    requires: tuple[str, ...] = ()
+
+
+class SkippedError(Exception):
+    """
+    Task has not been run because some of its requirements failed.
+    """
+
+
+def run_tasks(
+    tasks: dict[str, Task], jobs: int | None = None
+) -> dict[str, BaseException]:
+    """
+    Run `tasks` on a thread pool, each one as soon as all of its requirements
+    succeeded. Failure does not stop independent tasks, tasks depending
+    on failed ones are skipped. Returns mapping of task name to its error
+    (`SkippedError` for skipped tasks) in `tasks` order, empty on success.
+    """
+    for name, task in tasks.items():
+        if unknown := [r for r in task.requires if r not in tasks]:
+            msg = f"Task `{name}` requires unknown tasks: {', '.join(unknown)}"
+            raise ValueError(msg)
+
+    errors: dict[str, BaseException] = {}
+    done: set[str] = set()
+    pending = dict(tasks)
+    running: dict[Future, str] = {}
+    with ThreadPoolExecutor(max_workers=jobs or len(tasks) or 1) as executor:
+        while pending or running:
+            scheduled = True
+            while scheduled:
+                scheduled = False
+                for name, task in list(pending.items()):
+                    if failed := [r for r in task.requires if r in errors]:
+                        msg = f"requirement `{failed[0]}` failed"
+                        errors[name] = SkippedError(msg)
+                        done.add(name)
+                    elif all(r in done for r in task.requires):
+                        running[executor.submit(task.func)] = name
+                    else:
+                        continue
+                    del pending[name]
+                    scheduled = True
+            if not running:
+                if pending:
+                    msg = f"Tasks with cyclic requirements: {', '.join(pending)}"
+                    raise ValueError(msg)
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                if error := future.exception():
+                    errors[name] = error
+                done.add(name)
+    return {name: errors[name] for name in tasks if name in errors}
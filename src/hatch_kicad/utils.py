@@ -1,9 +1,48 @@
 # SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
 #
 # SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import contextlib
+import filecmp
 import hashlib
+import os
+import shutil
+from collections.abc import Iterator
+from enum import Enum
+from typing import Any
 
 READ_SIZE = 65536
+# Linux `FICLONE` ioctl request, clones file extents on copy-on-write filesystems
+FICLONE = 0x40049409
+
+
+class Placement(str, Enum):
+    AUTO = "auto"
+    HARDLINK = "hardlink"
+    REFLINK = "reflink"
+    COPY = "copy"
+
+    def __str__(self) -> str:
+        return self.value
+
+
+def get_cache_dir(name: str) -> str:
+    """
+    Returns path of `name` subdirectory of user cache directory
+    (`HATCH_KICAD_CACHE_DIR`, `XDG_CACHE_HOME/hatch-kicad` or platform
+    default), the directory is created if missing.
+    """
+    root = os.environ.get("HATCH_KICAD_CACHE_DIR")
+    if not root:
+        if os.name == "nt":
+            base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        else:
+            base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+        root = os.path.join(base, "hatch-kicad")
+    path = os.path.join(root, name)
+    os.makedirs(path, exist_ok=True)
+    return path
 
 
 def getsha256(filename) -> str:
@@ -12,3 +51,109 @@ def getsha256(filename) -> str:
         while data := f.read(READ_SIZE):
             sha256.update(data)
     return sha256.hexdigest()
+
+
+@contextlib.contextmanager
+def temporary_path(path: str) -> Iterator[str]:
+    """
+    Yields `path` of temporary file, which is removed when the block raises.
+    """
+    try:
+        yield path
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+        raise
+
+
+def write_if_changed(filename: str, data: bytes) -> bool:
+    """
+    Write `data` to `filename` unless it already holds identical content.
+    Unchanged files are not touched so their modification time is preserved.
+    Returns True when file has been (re)written.
+    """
+    if os.path.isfile(filename) and os.path.getsize(filename) == len(data):
+        with open(filename, "rb") as f:
+            if f.read() == data:
+                return False
+    with temporary_path(f"{filename}.tmp") as tmp:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, filename)
+    return True
+
+
+def replace_if_changed(src: str, dst: str) -> bool:
+    """
+    Move `src` over `dst` unless `dst` already holds identical content,
+    in which case `src` is removed and `dst` is left untouched.
+    Returns True when `dst` has been replaced.
+    """
+    if os.path.isfile(dst) and filecmp.cmp(src, dst, shallow=False):
+        os.remove(src)
+        return False
+    os.replace(src, dst)
+    return True
+
+
+def _reflink(src: str, dst: str) -> None:
+    try:
+        # POSIX only module, imported lazily so that Windows falls back to copy
+        import fcntl  # noqa: PLC0415
+    except ImportError as e:
+        msg = "reflink not supported on this platform"
+        raise OSError(msg) from e
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+
+
+def _copy_file_range(src: str, dst: str) -> None:
+    if not hasattr(os, "copy_file_range"):
+        msg = "copy_file_range not supported on this platform"
+        raise OSError(msg)
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        remaining = os.fstat(fsrc.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+            if copied == 0:
+                msg = "copy_file_range made no progress"
+                raise OSError(msg)
+            remaining -= copied
+
+
+def place_file(src: str, dst: str, placement: Placement = Placement.AUTO) -> Placement:
+    """
+    Place copy of `src` at `dst` using the cheapest available method.
+    Each method falls back to the next one when not supported by the platform
+    or filesystem: hardlink -> reflink -> copy_file_range -> plain copy.
+    `auto` never uses hardlinks because the linked file would change when
+    source is rewritten in place.
+    Returns the method which succeeded (`copy_file_range` is reported as `reflink`
+    because it may share extents on filesystems which support it).
+    """
+    methods: list[tuple[Placement, Any]] = [
+        (Placement.HARDLINK, os.link),
+        (Placement.REFLINK, _reflink),
+        (Placement.REFLINK, _copy_file_range),
+        (Placement.COPY, shutil.copyfile),
+    ]
+    if placement == Placement.AUTO:
+        methods = methods[1:]
+    else:
+        methods = methods[[m for m, _ in methods].index(placement) :]
+
+    with temporary_path(f"{dst}.tmp") as tmp:
+        for method, func in methods:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp)
+            try:
+                func(src, tmp)
+            except OSError:
+                if method == Placement.COPY:
+                    raise
+                continue
+            break
+        if method != Placement.HARDLINK:
+            shutil.copymode(src, tmp)
+        os.replace(tmp, dst)
+    return method
@@ -0,0 +1,97 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypedDict
+
+from hatch_kicad.build import PackageMetadata
+from hatch_kicad.utils import READ_SIZE
+
+__all__ = ["verify"]
+
+# hashing in chunks of this size releases GIL, so it runs alongside decompression
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class VerifyResult(TypedDict):
+    package: PackageMetadata
+    # member name to error message
+    corrupted: dict[str, str]
+    # field name to `(expected, actual)` values
+    mismatched: dict[str, tuple[object, object]]
+
+
+def check_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> str | None:
+    """
+    Decompress `info` member, returns error message if its content
+    does not match the CRC stored in the archive.
+    """
+    try:
+        with archive.open(info) as f:
+            while f.read(READ_SIZE):
+                pass
+    except (zipfile.BadZipFile, zlib.error, NotImplementedError, EOFError) as e:
+        return str(e) or type(e).__name__
+    return None
+
+
+def sha256_of(buffer: mmap.mmap) -> str:
+    sha256 = hashlib.sha256()
+    view = memoryview(buffer)
+    try:
+        for offset in range(0, len(view), HASH_CHUNK_SIZE):
+            sha256.update(view[offset : offset + HASH_CHUNK_SIZE])
+    finally:
+        view.release()
+    return sha256.hexdigest()
+
+
+def verify(artifact: str, metadata: str, jobs: int | None = None) -> VerifyResult:
+    """
+    Check CRC of every `artifact` member and compare `download_sha256`,
+    `download_size` and `install_size` with the first version listed in
+    `metadata` file. Hashing and decompression of members run concurrently
+    over the same pages of memory mapped file, so it is read from disk
+    about once.
+    Raises `zipfile.BadZipFile` when central directory can't be read.
+    """
+    with open(metadata, encoding="utf-8") as f:
+        versions = json.load(f).get("versions") or [{}]
+    expected = versions[0]
+
+    with open(artifact, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            msg = "File is not a zip file"
+            raise zipfile.BadZipFile(msg) from e
+
+    with buffer, zipfile.ZipFile(artifact) as archive:
+        members = [info for info in archive.infolist() if not info.is_dir()]
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            sha256 = executor.submit(sha256_of, buffer)
+            errors = executor.map(lambda info: check_member(archive, info), members)
+            corrupted = {
+                info.filename: error
+                for info, error in zip(members, errors)
+                if error is not None
+            }
+            package: PackageMetadata = {
+                "download_sha256": sha256.result(),
+                "download_size": len(buffer),
+                "install_size": sum(info.file_size for info in members),
+            }
+
+    mismatched = {
+        key: (expected.get(key), value)
+        for key, value in package.items()
+        if expected.get(key) != value
+    }
+    return {"package": package, "corrupted": corrupted, "mismatched": mismatched}
@@ -0,0 +1,346 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+from __future__ import annotations
+
+import os
+import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from email.parser import HeaderParser
+from pathlib import Path
+from typing import NamedTuple
+
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.specifiers import SpecifierSet
+from packaging.utils import (
+    InvalidWheelFilename,
+    canonicalize_name,
+    parse_wheel_filename,
+)
+from packaging.version import Version
+
+from hatch_kicad.utils import getsha256, place_file
+
+__all__ = [
+    "BUNDLED_WHEELHOUSE",
+    "Wheel",
+    "cache_wheels",
+    "extract_wheels",
+    "lock_requirements",
+    "resolve_wheels",
+]
+
+# directory of bundled wheels, relative to plugin directory
+BUNDLED_WHEELHOUSE = "wheels"
+# marker environment overrides of platforms KiCad runs on, dependencies
+# of wheels resolved with `variants` are collected for all of them
+TARGET_PLATFORMS: dict[str, dict[str, str]] = {
+    "darwin": {
+        "os_name": "posix",
+        "sys_platform": "darwin",
+        "platform_system": "Darwin",
+    },
+    "linux": {"os_name": "posix", "sys_platform": "linux", "platform_system": "Linux"},
+    "win32": {"os_name": "nt", "sys_platform": "win32", "platform_system": "Windows"},
+}
+
+
+class Wheel(NamedTuple):
+    name: str
+    version: Version
+    path: str
+    pure: bool
+    # environment marker of platforms which require the wheel, empty if all
+    marker: str = ""
+
+
+def find_wheels(wheelhouses: list[str]) -> dict[str, list[Wheel]]:
+    """
+    Returns wheels found in `wheelhouses` directories grouped by canonical
+    project name, newest versions first. When the same file exists in
+    multiple directories, the first one is used.
+    """
+    wheels: dict[str, list[Wheel]] = {}
+    seen = set()
+    for wheelhouse in wheelhouses:
+        for entry in sorted(os.scandir(wheelhouse), key=lambda e: e.name):
+            if not entry.name.endswith(".whl") or entry.name in seen:
+                continue
+            try:
+                name, version, _, tags = parse_wheel_filename(entry.name)
+            except InvalidWheelFilename:
+                continue
+            seen.add(entry.name)
+            pure = all(t.abi == "none" and t.platform == "any" for t in tags)
+            wheel = Wheel(name, version, entry.path, pure)
+            wheels.setdefault(name, []).append(wheel)
+    for candidates in wheels.values():
+        candidates.sort(key=lambda w: w.version, reverse=True)
+    return wheels
+
+
+def wheel_requirements(path: str) -> list[Requirement]:
+    """
+    Returns `Requires-Dist` requirements from wheel `METADATA` file.
+    """
+    with zipfile.ZipFile(path) as z:
+        name = next(
+            n
+            for n in z.namelist()
+            if n.count("/") == 1 and n.endswith(".dist-info/METADATA")
+        )
+        metadata = HeaderParser().parsestr(z.read(name).decode("utf-8"))
+    return [Requirement(r) for r in metadata.get_all("Requires-Dist") or []]
+
+
+def platforms_marker(platforms: set[str]) -> str:
+    if platforms >= set(TARGET_PLATFORMS):
+        return ""
+    return " or ".join(f'sys_platform == "{p}"' for p in sorted(platforms))
+
+
+def find_candidate(
+    requirement: Requirement,
+    constraint: SpecifierSet,
+    available: dict[str, list[Wheel]],
+    wheelhouses: list[str],
+    *,
+    pure: bool,
+) -> Wheel:
+    specifier = requirement.specifier & constraint
+    candidates = [
+        w
+        for w in available.get(canonicalize_name(requirement.name), [])
+        if specifier.contains(w.version, prereleases=True)
+    ]
+    if not candidates:
+        locations = ", ".join(f"`{w}`" for w in wheelhouses)
+        msg = f"No wheel satisfying `{requirement}` found in {locations}"
+        if constraint:
+            msg = f"{msg}, conflicting requirements narrowed it to `{specifier}`"
+        raise ValueError(msg)
+    wheel = candidates[0]
+    if pure and not wheel.pure:
+        msg = f"Wheel `{os.path.basename(wheel.path)}` is not pure Python"
+        raise ValueError(msg)
+    return wheel
+
+
+class ConflictError(Exception):
+    """
+    Requirement of `name` project excludes already resolved version,
+    resolution restarts constrained with `specifier` (all specifiers seen).
+    """
+
+    def __init__(self, name: str, specifier: SpecifierSet) -> None:
+        super().__init__(name, specifier)
+        self.name = name
+        self.specifier = specifier
+
+
+def resolve_pass(
+    requirements: list[Requirement],
+    constraints: dict[str, SpecifierSet],
+    available: dict[str, list[Wheel]],
+    wheelhouses: list[str],
+    *,
+    pure: bool,
+    targets: frozenset[str],
+) -> tuple[dict[str, Wheel], dict[str, dict[str, set[str]]]]:
+    """
+    Single resolution pass, newest candidates satisfying `constraints` are
+    picked first come. Returns resolved wheels and platforms requiring each
+    project and its extras ("" stands for the project itself).
+    Raises ConflictError when later requirement excludes picked version.
+    """
+    resolved: dict[str, Wheel] = {}
+    required_by: dict[str, dict[str, set[str]]] = {}
+    specifiers: dict[str, SpecifierSet] = {}
+    dependencies: dict[str, list[Requirement]] = {}
+    pending = [(requirement, "", targets) for requirement in requirements]
+    while pending:
+        requirement, extra, platforms = pending.pop(0)
+        if marker := requirement.marker:
+            platforms = frozenset(
+                p
+                for p in platforms
+                if marker.evaluate({**TARGET_PLATFORMS.get(p, {}), "extra": extra})
+            )
+            if not platforms:
+                continue
+        name = canonicalize_name(requirement.name)
+        if name in resolved:
+            specifiers[name] &= requirement.specifier
+            if not requirement.specifier.contains(
+                resolved[name].version, prereleases=True
+            ):
+                raise ConflictError(
+                    name, constraints.get(name, SpecifierSet()) & specifiers[name]
+                )
+        else:
+            wheel = find_candidate(
+                requirement,
+                constraints.get(name, SpecifierSet()),
+                available,
+                wheelhouses,
+                pure=pure,
+            )
+            resolved[name] = wheel
+            required_by[name] = {}
+            specifiers[name] = requirement.specifier
+            dependencies[name] = wheel_requirements(wheel.path)
+        # dependencies are queued for platforms and extras not seen yet,
+        # those without marker do not depend on extras
+        for e in ["", *sorted(requirement.extras)]:
+            seen = required_by[name].setdefault(e, set())
+            if new := platforms - seen:
+                seen |= new
+                pending.extend(
+                    (dependency, e, frozenset(new))
+                    for dependency in dependencies[name]
+                    if not e or dependency.marker
+                )
+    return resolved, required_by
+
+
+def resolve_wheels(
+    requirements: list[str],
+    wheelhouse: str | list[str],
+    *,
+    pure: bool = False,
+    variants: bool = False,
+) -> list[Wheel]:
+    """
+    Resolve `requirements` and their dependencies against local `wheelhouse`
+    directory (or directories), picking the newest wheel satisfying all
+    specifiers seen for a project: when later requirement excludes already
+    picked version, resolution restarts with specifiers of the project
+    intersected. Environment markers are evaluated for the running
+    interpreter. With `variants` enabled, platform markers are
+    evaluated for every platform of `TARGET_PLATFORMS` and all wheels
+    of resolved versions (for other platforms or interpreters) are returned,
+    each with marker of platforms which need it.
+    Raises ValueError when requirement can't be satisfied or, with `pure`
+    enabled, when resolved wheel is not pure Python.
+    """
+    wheelhouses = [wheelhouse] if isinstance(wheelhouse, str) else wheelhouse
+    available = find_wheels(wheelhouses)
+    parsed = []
+    for requirement_str in requirements:
+        try:
+            parsed.append(Requirement(requirement_str))
+        except InvalidRequirement as e:
+            msg = f"Invalid requirement `{requirement_str}`: {e}"
+            raise ValueError(msg) from None
+
+    # every restart excludes picked version of conflicting project,
+    # so number of passes is bounded by number of available wheels
+    constraints: dict[str, SpecifierSet] = {}
+    while True:
+        try:
+            resolved, required_by = resolve_pass(
+                parsed,
+                constraints,
+                available,
+                wheelhouses,
+                pure=pure,
+                targets=frozenset(TARGET_PLATFORMS if variants else [""]),
+            )
+            break
+        except ConflictError as e:
+            constraints[e.name] = e.specifier
+    if variants:
+        return [
+            w._replace(marker=platforms_marker(required_by[name][""]))
+            for name, wheel in sorted(resolved.items())
+            for w in available[name]
+            if w.version == wheel.version
+        ]
+    return sorted(resolved.values(), key=lambda w: w.name)
+
+
+def extract_wheel(path: str, cache_dir: str) -> str:
+    """
+    Extract wheel to `cache_dir` subdirectory named after its sha256,
+    already extracted wheels are reused. Returns extracted directory path.
+    """
+    target = os.path.join(cache_dir, getsha256(path))
+    if os.path.isdir(target):
+        return target
+    tmp = f"{target}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    with zipfile.ZipFile(path) as z:
+        z.extractall(tmp)
+    try:
+        os.replace(tmp, target)
+    except OSError:
+        # extracted concurrently by another build
+        shutil.rmtree(tmp, ignore_errors=True)
+    return target
+
+
+def extract_wheels(
+    wheels: list[Wheel], cache_dir: str, jobs: int | None = None
+) -> list[str]:
+    """
+    Extract `wheels` in parallel, returns extracted directories in input order.
+    """
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(lambda w: extract_wheel(w.path, cache_dir), wheels))
+
+
+def iter_wheel_files(directory: str) -> list[tuple[str, str]]:
+    """
+    Returns `(path, relative posix path)` of files of extracted wheel which
+    are importable at runtime, `.data` directories (scripts, headers)
+    and bytecode are skipped.
+    """
+    files = []
+    root = Path(directory)
+    for path in sorted(root.rglob("*")):
+        relative = path.relative_to(root)
+        top = relative.parts[0]
+        if (
+            not path.is_file()
+            or top.endswith(".data")
+            or "__pycache__" in relative.parts
+            or path.suffix in (".pyc", ".pyo")
+        ):
+            continue
+        files.append((str(path), relative.as_posix()))
+    return files
+
+
+def cache_wheels(wheels: list[Wheel], cache_dir: str) -> None:
+    """
+    Place copies of `wheels` in shared `cache_dir` wheelhouse,
+    so they can be resolved by builds of other projects.
+    """
+    for wheel in wheels:
+        target = os.path.join(cache_dir, os.path.basename(wheel.path))
+        if not os.path.isfile(target):
+            place_file(wheel.path, target)
+
+
+def lock_requirements(wheels: list[Wheel], find_links: str) -> str:
+    """
+    Returns `requirements.txt` content pinning `wheels` with their hashes,
+    which pip installs from `find_links` directory only. Pins keep markers
+    of wheels, so pip skips them on platforms which do not need them.
+    """
+    hashes: dict[str, list[str]] = {}
+    for wheel in wheels:
+        pin = f"{wheel.name}=={wheel.version}"
+        if wheel.marker:
+            pin = f"{pin}; {wheel.marker}"
+        hashes.setdefault(pin, []).append(getsha256(wheel.path))
+    lines = [
+        "# generated by hatch-kicad, installs bundled wheels only",
+        "--no-index",
+        f"--find-links {find_links}",
+    ]
+    for pin, digests in hashes.items():
+        options = [f"--hash=sha256:{d}" for d in sorted(digests)]
+        lines.append(" \\\n    ".join([pin, *options]))
+    return "\n".join(lines) + "\n"
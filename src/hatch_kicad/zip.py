@@ -4,23 +4,61 @@
 from __future__ import annotations
 
 import os
+import shutil
+import struct
 import time
 import zipfile
 from pathlib import Path
 from types import TracebackType
-from typing import Tuple
+from typing import NamedTuple, Tuple
 
 from hatchling.builders.utils import get_reproducible_timestamp
 
-__all__ = ["ZipArchive"]
+from hatch_kicad.progress import Progress
+
+__all__ = ["MemberStats", "ZipArchive"]
 
 ZipTime = Tuple[int, int, int, int, int, int]
 
+# local file header: signature, versions, flags, method, time, date, crc,
+# sizes, name length and extra length, see APPNOTE.TXT section 4.3.7
+LOCAL_HEADER_FORMAT = "<4s2B4HL2L2H"
+LOCAL_HEADER_SIZE = struct.calcsize(LOCAL_HEADER_FORMAT)
+ZIP64_EXTRA_ID = 0x0001
+DATA_DESCRIPTOR_FLAG = 0x08
+COPY_SIZE = 1024 * 1024
+
+
+def strip_extra(extra: bytes, header_id: int) -> bytes:
+    """
+    Remove fields with given `header_id` from zip `extra` data.
+    """
+    result = b""
+    i = 0
+    while i + 4 <= len(extra):
+        field_id, size = struct.unpack("<HH", extra[i : i + 4])
+        if field_id != header_id:
+            result += extra[i : i + 4 + size]
+        i += 4 + size
+    return result
+
+
+class MemberStats(NamedTuple):
+    name: str
+    size: int
+    compress_size: int
+    # seconds spent writing (compressing) the member
+    time: float
+
 
 class ZipArchive:
-    def __init__(self, file: Path, *, reproducible: bool) -> None:
+    def __init__(
+        self, file: Path, *, reproducible: bool, progress: Progress | None = None
+    ) -> None:
         self.name = file
         self.reproducible = reproducible
+        self.progress = progress
+        self.members: list[MemberStats] = []
         self.timestamp: int | None = (
             get_reproducible_timestamp() if reproducible else None
         )
@@ -33,8 +71,82 @@ class ZipArchive:
         info = zipfile.ZipInfo.from_file(filename, arcname)
         if self.ziptime:
             info.date_time = self.ziptime
-        with open(filename, "rb") as f:
-            self.zip.writestr(info, f.read())
+        start = time.perf_counter()
+        # stream file in chunks, `info.file_size` taken from file status
+        # decides if zip64 header is needed upfront
+        with open(filename, "rb") as src, self.zip.open(info, "w") as dst:
+            if self.progress:
+                while data := src.read(COPY_SIZE):
+                    dst.write(data)
+                    self.progress.advance(len(data))
+                self.progress.advance(files=1)
+            else:
+                shutil.copyfileobj(src, dst, COPY_SIZE)
+        self.members.append(
+            MemberStats(
+                info.filename,
+                info.file_size,
+                info.compress_size,
+                time.perf_counter() - start,
+            )
+        )
+
+    def copy_raw(self, source: zipfile.ZipFile, info: zipfile.ZipInfo) -> None:
+        """
+        Copy member of `source` archive without decompressing and recompressing it.
+        """
+        zinfo = zipfile.ZipInfo(info.filename, self.ziptime or info.date_time)
+        zinfo.compress_type = info.compress_type
+        zinfo.create_system = info.create_system
+        zinfo.external_attr = info.external_attr
+        zinfo.flag_bits = info.flag_bits & ~DATA_DESCRIPTOR_FLAG
+        zinfo.extra = strip_extra(info.extra, ZIP64_EXTRA_ID)
+        zinfo.CRC = info.CRC
+        zinfo.compress_size = info.compress_size
+        zinfo.file_size = info.file_size
+
+        start = time.perf_counter()
+        src = source.fp
+        dst = self.zip.fp
+        if src is None or dst is None:
+            msg = "Attempt to copy member of closed archive"
+            raise ValueError(msg)
+        src.seek(info.header_offset)
+        header = struct.unpack(LOCAL_HEADER_FORMAT, src.read(LOCAL_HEADER_SIZE))
+        # skip file name and extra field of local header
+        src.seek(header[-2] + header[-1], os.SEEK_CUR)
+
+        zinfo.header_offset = dst.tell()
+        zip64 = max(zinfo.file_size, zinfo.compress_size) > zipfile.ZIP64_LIMIT
+        dst.write(zinfo.FileHeader(zip64))
+        remaining = zinfo.compress_size
+        while remaining > 0:
+            data = src.read(min(COPY_SIZE, remaining))
+            if not data:
+                msg = f"Unexpected end of data when copying `{info.filename}`"
+                raise zipfile.BadZipFile(msg)
+            dst.write(data)
+            remaining -= len(data)
+            if self.progress:
+                self.progress.advance(len(data))
+        if self.progress:
+            self.progress.advance(files=1)
+
+        # register member the way `ZipFile.write` does (CPython 3.10 - 3.14):
+        # central directory is written on close from `filelist` at `start_dir`,
+        # only if `_didModify` is set (already true for archives opened with "w")
+        self.zip.filelist.append(zinfo)
+        self.zip.NameToInfo[zinfo.filename] = zinfo
+        self.zip.start_dir = dst.tell()
+        self.zip._didModify = True  # type: ignore[attr-defined]
+        self.members.append(
+            MemberStats(
+                zinfo.filename,
+                zinfo.file_size,
+                zinfo.compress_size,
+                time.perf_counter() - start,
+            )
+        )
 
     def __enter__(self):
         return self
@@ -46,3 +158,5 @@ class ZipArchive:
         traceback: TracebackType | None,
     ) -> None:
         self.zip.close()
+        if self.progress:
+            self.progress.finish()
@@ -0,0 +1,154 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+import json
+import os
+import zipfile
+
+import pytest
+
+from hatch_kicad.audit import audit, default_cache
+from hatch_kicad.build import get_package_metadata
+from hatch_kicad.cli import main
+from hatch_kicad.utils import getsha256
+
+URL = "https://foo.bar/repo"
+
+
+def make_artifact(directory, identifier, version):
+    filename = directory / f"{identifier}-{version}.zip"
+    metadata = {"identifier": identifier, "versions": [{"version": version}]}
+    with zipfile.ZipFile(filename, "w") as z:
+        z.writestr("plugins/__init__.py", f"VERSION = {version!r}\n")
+        z.writestr("metadata.json", json.dumps(metadata))
+    return {
+        "version": version,
+        "download_url": f"{URL}/{filename.name}",
+        **get_package_metadata(filename),
+    }
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(monkeypatch, tmp_path_factory):
+    cache_dir = tmp_path_factory.mktemp("cache")
+    monkeypatch.setenv("HATCH_KICAD_CACHE_DIR", str(cache_dir))
+    return cache_dir
+
+
+@pytest.fixture
+def repository(tmp_path):
+    packages = [
+        {
+            "identifier": "a",
+            "versions": [
+                make_artifact(tmp_path, "a", "0.2"),
+                make_artifact(tmp_path, "a", "0.1"),
+                {"version": "0.0", "download_url": "https://other/a-0.0.zip"},
+            ],
+        },
+        {"identifier": "b", "versions": [make_artifact(tmp_path, "b", "1.0")]},
+    ]
+    (tmp_path / "packages.json").write_text(json.dumps({"packages": packages}))
+    with zipfile.ZipFile(tmp_path / "resources.zip", "w") as z:
+        z.writestr("a/icon.png", b"a")
+        z.writestr("b/icon.png", b"b")
+    repository = {
+        key: {"url": f"{URL}/{name}", "sha256": getsha256(tmp_path / name)}
+        for key, name in [("packages", "packages.json"), ("resources", "resources.zip")]
+    }
+    (tmp_path / "repository.json").write_text(json.dumps(repository))
+    return tmp_path
+
+
+def test_audit(repository, cache_dir):
+    report = audit(str(repository), jobs=2)
+    assert report["errors"] == []
+    assert report["artifacts"] == 3
+    assert report["hashed"] == 3
+    assert report["skipped"] == ["https://other/a-0.0.zip"]
+    # audited directory is left untouched
+    assert os.path.isfile(default_cache(str(repository)))
+    assert sorted(os.listdir(cache_dir / "audit")) == [
+        os.path.basename(default_cache(str(repository)))
+    ]
+
+    report = audit(str(repository), jobs=2)
+    assert report["hashed"] == 0
+    assert report["cached"] == 3
+
+
+def test_audit_errors(repository):
+    audit(str(repository))
+    indexed = json.loads((repository / "packages.json").read_text())
+    indexed = indexed["packages"][0]["versions"][1]
+    # rewrite artifact with different content and metadata
+    artifact = repository / "a-0.1.zip"
+    with zipfile.ZipFile(artifact, "w") as z:
+        z.writestr("plugins/__init__.py", "VERSION = 'changed'\n")
+        z.writestr("metadata.json", json.dumps({"identifier": "c", "versions": []}))
+    (repository / "b-1.0.zip").unlink()
+    with zipfile.ZipFile(repository / "resources.zip", "w") as z:
+        z.writestr("a/icon.png", b"a")
+
+    report = audit(str(repository))
+    assert report["hashed"] == 1
+    sha256 = indexed["download_sha256"]
+    download_size, size = indexed["download_size"], artifact.stat().st_size
+    install_size = indexed["install_size"]
+    actual_install_size = get_package_metadata(artifact)["install_size"]
+    messages = {(e["file"], e["identifier"], e["message"]) for e in report["errors"]}
+    assert messages == {
+        ("resources.zip", "", "sha256 does not match `repository.json` resources"),
+        ("resources.zip", "b", "icon is missing from resources"),
+        ("b-1.0.zip", "b", "artifact is missing"),
+        (
+            "a-0.1.zip",
+            "a",
+            f"`download_sha256` is {sha256!r}, artifact has {getsha256(artifact)!r}",
+        ),
+        (
+            "a-0.1.zip",
+            "a",
+            f"`download_size` is {download_size}, artifact has {size}",
+        ),
+        (
+            "a-0.1.zip",
+            "a",
+            f"`install_size` is {install_size}, artifact has {actual_install_size}",
+        ),
+        ("a-0.1.zip", "a", "embedded `identifier` is 'c', index has 'a'"),
+    }
+
+
+def test_audit_truncated_packages(repository):
+    packages = repository / "packages.json"
+    packages.write_text(packages.read_text()[:-10])
+
+    report = audit(str(repository))
+    messages = [(e["file"], e["message"]) for e in report["errors"]]
+    assert messages[0] == (
+        "packages.json",
+        "sha256 does not match `repository.json` packages",
+    )
+    assert messages[1][0] == "packages.json"
+    assert messages[1][1].startswith("malformed packages file: ")
+    # packages read before the malformed part are still checked
+    assert report["artifacts"] > 0
+
+
+def test_audit_command(repository, tmp_path_factory, capsys):
+    report = tmp_path_factory.mktemp("report") / "report.json"
+    assert main(["audit", str(repository), "--report", str(report)]) == 0
+    assert json.loads(report.read_text())["errors"] == []
+
+    (repository / "a-0.2.zip").write_bytes(b"")
+    assert main(["audit", str(repository)]) == 1
+    assert "a-0.2.zip" in capsys.readouterr().out
+
+
+def test_audit_read_only_cache(repository, tmp_path_factory):
+    # cache which can't be written does not fail the audit
+    cache = tmp_path_factory.mktemp("cache") / "missing" / "cache.json"
+    report = audit(str(repository), cache=str(cache))
+    assert report["errors"] == []
+    assert not cache.exists()
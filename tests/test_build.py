@@ -3,8 +3,12 @@
 # SPDX-License-Identifier: MIT
 from __future__ import annotations
 
+import importlib.util
 import json
+import marshal
+import os
 import re
+import sys
 import tempfile
 import zipfile
 from pathlib import Path
@@ -17,8 +21,10 @@ from jsonschema import validate
 
 from hatch_kicad.build import KicadBuilder, get_package_metadata
 from hatch_kicad.config import Action
+from hatch_kicad.slim import DEFAULT_EXCLUDE
+from hatch_kicad.utils import getsha256
 
-from .utils import assert_zip_content, build_config, merge_dicts
+from .utils import assert_zip_content, build_config, make_wheel, merge_dicts
 
 
 def test_class() -> None:
@@ -326,6 +332,165 @@ def test_compatibility(name, isolation):
     assert str(builder.config.compatibility) == name
 
 
+def test_default_json_format(isolation):
+    builder = KicadBuilder(str(isolation), config={})
+    assert str(builder.config.json_format) == "indent"
+
+
+def test_unrecognized_json_format(isolation):
+    builder = KicadBuilder(
+        str(isolation), config=build_config({"json_format": "pretty"})
+    )
+    with pytest.raises(
+        ValueError,
+        match="Invalid json_format value: `pretty`\n"
+        "Json format can be one of the following values: indent, compact",
+    ):
+        _ = builder.config.json_format
+
+
+def test_bytecode(isolation):
+    builder = KicadBuilder(str(isolation), config={})
+    assert builder.config.bytecode == []
+    builder = KicadBuilder(
+        str(isolation), config=build_config({"bytecode": ["3.11", "3.9", "3.11"]})
+    )
+    assert builder.config.bytecode == ["3.11", "3.9"]
+
+
+@pytest.mark.parametrize("value", [True, "3.11", ["3"], ["python3.11"]])
+def test_bytecode_wrong_value(value, isolation):
+    builder = KicadBuilder(str(isolation), config=build_config({"bytecode": value}))
+    with pytest.raises(
+        ValueError,
+        match="Field `tool.hatch.build.targets.kicad-package.bytecode` must be "
+        "a list of Python versions in `3.X` format",
+    ):
+        _ = builder.config.bytecode
+
+
+def test_slim(isolation):
+    builder = KicadBuilder(str(isolation), config={})
+    assert builder.config.slim is None
+    builder = KicadBuilder(str(isolation), config=build_config({"slim": True}))
+    assert builder.config.slim == {
+        "strip_docstrings": True,
+        "exclude": DEFAULT_EXCLUDE,
+    }
+    config = build_config({"slim": {"strip_docstrings": False, "exclude": []}})
+    builder = KicadBuilder(str(isolation), config=config)
+    assert builder.config.slim == {"strip_docstrings": False, "exclude": []}
+
+
+@pytest.mark.parametrize(
+    "value,error,message",
+    [
+        ("yes", TypeError, "must be a boolean or a dictionary"),
+        ({"foo": 1}, ValueError, "has unknown properties: foo"),
+        (
+            {"strip_docstrings": 1},
+            TypeError,
+            "`strip_docstrings` property must be a boolean",
+        ),
+        ({"exclude": "*.py"}, TypeError, "`exclude` property must be a list"),
+    ],
+)
+def test_slim_wrong_value(value, error, message, isolation):
+    builder = KicadBuilder(str(isolation), config=build_config({"slim": value}))
+    with pytest.raises(
+        error, match=f"Field `tool.hatch.build.targets.kicad-package.slim` {message}"
+    ):
+        _ = builder.config.slim
+
+
+def test_vendor(tmp_path):
+    os.mkdir(tmp_path / "wheels")
+    builder = KicadBuilder(str(tmp_path), config={})
+    assert builder.config.vendor is None
+    config = merge_dicts(
+        {"project": {"name": "Plugin", "version": "0.1", "dependencies": ["foo>=1"]}},
+        build_config({"vendor": "wheels"}),
+    )
+    builder = KicadBuilder(str(tmp_path), config=config)
+    assert builder.config.vendor == {
+        "wheelhouse": str(tmp_path / "wheels"),
+        "requirements": ["foo>=1"],
+    }
+    config = build_config({"vendor": {"wheelhouse": "wheels", "requirements": []}})
+    builder = KicadBuilder(str(tmp_path), config=config)
+    assert builder.config.vendor["requirements"] == []
+
+
+@pytest.mark.parametrize(
+    "value,error,message",
+    [
+        (True, TypeError, "must be a string or a dictionary"),
+        ({"wheelhouse": "wheels", "foo": 1}, ValueError, "has unknown properties: foo"),
+        ({}, TypeError, "`wheelhouse` property must be a non-empty string"),
+        ({"wheelhouse": "missing"}, ValueError, "`wheelhouse` directory `.*` does"),
+        (
+            {"wheelhouse": ".", "requirements": "foo"},
+            TypeError,
+            "`requirements` property must be a list of strings",
+        ),
+    ],
+)
+def test_vendor_wrong_value(value, error, message, isolation):
+    builder = KicadBuilder(str(isolation), config=build_config({"vendor": value}))
+    with pytest.raises(
+        error, match=f"Field `tool.hatch.build.targets.kicad-package.vendor` {message}"
+    ):
+        _ = builder.config.vendor
+
+
+def test_bundle_wheels(tmp_path):
+    os.mkdir(tmp_path / "wheels")
+    config = {
+        "project": {"name": "Plugin", "version": "0.1", "dependencies": ["foo"]},
+        **build_config({"compatibility": "ipc", "bundle_wheels": "wheels"}),
+    }
+    builder = KicadBuilder(str(tmp_path), config=config)
+    assert builder.config.bundle_wheels == {
+        "wheelhouse": str(tmp_path / "wheels"),
+        "requirements": ["foo"],
+    }
+    builder = KicadBuilder(str(tmp_path), config=build_config({"foo": 1}))
+    assert builder.config.bundle_wheels is None
+
+
+def test_bundle_wheels_legacy(tmp_path):
+    os.mkdir(tmp_path / "wheels")
+    config = build_config(
+        {"bundle_wheels": {"wheelhouse": "wheels", "requirements": []}}
+    )
+    builder = KicadBuilder(str(tmp_path), config=config)
+    with pytest.raises(
+        ValueError,
+        match="Field `tool.hatch.build.targets.kicad-package.bundle_wheels` "
+        "is supported only in `ipc` compatibility mode",
+    ):
+        _ = builder.config.bundle_wheels
+
+
+def test_size_report(isolation):
+    builder = KicadBuilder(str(isolation), config=build_config({}))
+    assert builder.config.size_report is False
+    config = build_config({"size_report": True})
+    builder = KicadBuilder(str(isolation), config=config)
+    assert builder.config.size_report is True
+
+
+def test_size_report_wrong_value(isolation):
+    config = build_config({"size_report": "yes"})
+    builder = KicadBuilder(str(isolation), config=config)
+    with pytest.raises(
+        TypeError,
+        match="Field `tool.hatch.build.targets.kicad-package.size_report` "
+        "must be a boolean",
+    ):
+        _ = builder.config.size_report
+
+
 def test_license(isolation):
     config = merge_dicts(
         {"project": {"name": "Plugin", "license": "gpl-3.0"}},
@@ -1116,3 +1281,426 @@ class TestBuildLegacy:
             "plugins/plugin.json",
             test_dir / "schemas/api.v1.schema.json",
         )
+
+    def test_build_compact_json(self, isolation, fake_project, dist_dir):
+        icon, _ = fake_project
+        data = merge_dicts(
+            self._CONFIG_BASE,
+            {
+                "icon": icon.name,
+                "sources": ["src"],
+                "include": ["src/*.py"],
+                "json_format": "compact",
+            },
+        )
+        config = merge_dicts(
+            {"project": {"name": "Plugin", "version": "0.0.1"}}, build_config(data)
+        )
+        builder = KicadBuilder(str(isolation), config=config)
+        builder.build_standard(dist_dir)
+        with open(f"{dist_dir}/metadata.json") as f:
+            content = f.read()
+        metadata_result = json.loads(content)
+        assert content == json.dumps(
+            metadata_result, separators=(",", ":"), sort_keys=True
+        )
+        self.assert_versions(metadata_result, version="0.0.1")
+
+    def test_build_bytecode(self, isolation, fake_project, dist_dir):
+        icon, sources = fake_project
+        for i, source in enumerate(sources):
+            Path(source.name).write_text(f"VALUE = {i}\n")
+        current = f"{sys.version_info.major}.{sys.version_info.minor}"
+        data = merge_dicts(
+            self._CONFIG_BASE,
+            {
+                "icon": icon.name,
+                "sources": ["src"],
+                "include": ["src/*.py"],
+                "bytecode": [current],
+            },
+        )
+        config = merge_dicts(
+            {"project": {"name": "Plugin", "version": "0.0.1"}}, build_config(data)
+        )
+        builder = KicadBuilder(str(isolation), config=config)
+        zip_path = builder.build_standard(dist_dir)
+        first_sha256 = get_package_metadata(zip_path)["download_sha256"]
+
+        tag = sys.implementation.cache_tag
+        expected = ["resources/icon.png", "metadata.json"]
+        for s in sources:
+            name = Path(s.name).stem
+            expected += [f"plugins/{name}.py", f"plugins/__pycache__/{name}.{tag}.pyc"]
+        assert_zip_content(zip_path, expected)
+
+        with zipfile.ZipFile(zip_path) as z:
+            name = Path(sources[0].name).stem
+            pyc = z.read(f"plugins/__pycache__/{name}.{tag}.pyc")
+        assert pyc[:4] == importlib.util.MAGIC_NUMBER
+        # checked-hash pyc: flags with `hash_based` and `check_source` bits set
+        assert int.from_bytes(pyc[4:8], "little") == 0b11
+        namespace: dict = {}
+        # bytecode has just been compiled from test sources
+        exec(marshal.loads(pyc[16:]), namespace)  # noqa: S102, S302
+        assert namespace["VALUE"] == 0
+
+        # bytecode does not depend on source modification time
+        for source in sources:
+            os.utime(source.name, (10**9, 10**9))
+        builder = KicadBuilder(str(isolation), config=config)
+        zip_path = builder.build_standard(dist_dir)
+        assert get_package_metadata(zip_path)["download_sha256"] == first_sha256
+
+    def test_build_bytecode_syntax_error(
+        self, monkeypatch, isolation, fake_project, dist_dir
+    ):
+        abort_mock = Mock()
+        monkeypatch.setattr("hatchling.bridge.app.Application.abort", abort_mock)
+        display_error_mock = Mock()
+        monkeypatch.setattr(
+            "hatchling.bridge.app.Application.display_error", display_error_mock
+        )
+        icon, sources = fake_project
+        Path(sources[0].name).write_text("def broken(:\n")
+        current = f"{sys.version_info.major}.{sys.version_info.minor}"
+        data = merge_dicts(
+            self._CONFIG_BASE,
+            {
+                "icon": icon.name,
+                "sources": ["src"],
+                "include": ["src/*.py"],
+                "bytecode": [current],
+            },
+        )
+        config = merge_dicts(
+            {"project": {"name": "Plugin", "version": "0.0.1"}}, build_config(data)
+        )
+        builder = KicadBuilder(str(isolation), config=config)
+        builder.build_standard(dist_dir)
+        (message,), _ = display_error_mock.call_args
+        assert message.startswith("Bytecode compilation with")
+        assert "SyntaxError" in message
+        abort_mock.assert_called_once_with("Build failed!")
+
+    def test_build_slim(self, monkeypatch, isolation, fake_project, dist_dir):
+        monkeypatch.setenv("HATCH_KICAD_CACHE_DIR", f"{dist_dir}/cache")
+        icon, sources = fake_project
+        for source in sources:
+            Path(source.name).write_text('"""Docstring."""\nVALUE = 1  # comment\n')
+        os.mkdir(f"{isolation}/src/tests")
+        Path(f"{isolation}/src/tests/test_plugin.py").write_text("assert True\n")
+        data = merge_dicts(
+            self._CONFIG_BASE,
+            {
+                "icon": icon.name,
+                "sources": ["src"],
+                "include": ["src/**/*.py"],
+                "slim": True,
+            },
+        )
+        config = merge_dicts(
+            {"project": {"name": "Plugin", "version": "0.0.1"}}, build_config(data)
+        )
+        builder = KicadBuilder(str(isolation), config=config)
+        zip_path = builder.build_standard(dist_dir)
+
+        expected = ["resources/icon.png", "metadata.json"]
+        expected += [f"plugins/{Path(s.name).name}" for s in sources]
+        assert_zip_content(zip_path, expected)
+        with zipfile.ZipFile(zip_path) as z:
+            assert z.read(f"plugins/{Path(sources[0].name).name}") == b"VALUE = 1\n"
+
+        with open(f"{dist_dir}/slim-map.json") as f:
+            slim_map = json.load(f)
+        assert slim_map["excluded"] == ["plugins/tests/test_plugin.py"]
+        entry = slim_map["files"][f"plugins/{Path(sources[0].name).name}"]
+        assert entry["source"] == f"src/{Path(sources[0].name).name}"
+        assert entry["size"] == 38
+        assert entry["slim_size"] == 10
+
+    def test_build_vendor(self, monkeypatch, isolation, fake_project, dist_dir):
+        monkeypatch.setenv("HATCH_KICAD_CACHE_DIR", f"{dist_dir}/cache")
+        icon, sources = fake_project
+        wheelhouse = isolation / "src" / "wheels"
+        wheelhouse.mkdir()
+        make_wheel(
+            wheelhouse,
+            "foo",
+            "1.0",
+            {"foo/__init__.py": "import bar\n", "foo-1.0.data/scripts/foo": ""},
+            requires=["bar"],
+        )
+        make_wheel(wheelhouse, "bar", "2.0", {"bar.py": "VALUE = 1\n"})
+        make_wheel(wheelhouse, "unused", "1.0", {"unused.py": ""})
+        data = merge_dicts(
+            self._CONFIG_BASE,
+            {
+                "icon": icon.name,
+                "sources": ["src"],
+                "include": ["src/*.py"],
+                "vendor": "src/wheels",
+            },
+        )
+        config = merge_dicts(
+            {
+                "project": {
+                    "name": "Plugin",
+                    "version": "0.0.1",
+                    "dependencies": ["foo"],
+                }
+            },
+            build_config(data),
+        )
+        builder = KicadBuilder(str(isolation), config=config)
+        zip_path = builder.build_standard(dist_dir)
+
+        expected = ["resources/icon.png", "metadata.json"]
+        expected += [f"plugins/{Path(s.name).name}" for s in sources]
+        expected += [
+            f"plugins/_vendor/{name}"
+            for name in [
+                "bar.py",
+                "bar-2.0.dist-info/METADATA",
+                "bar-2.0.dist-info/RECORD",
+                "bar-2.0.dist-info/WHEEL",
+                "foo/__init__.py",
+                "foo-1.0.dist-info/METADATA",
+                "foo-1.0.dist-info/RECORD",
+                "foo-1.0.dist-info/WHEEL",
+            ]
+        ]
+        assert_zip_content(zip_path, expected)
+        with zipfile.ZipFile(zip_path) as z:
+            assert z.read("plugins/_vendor/bar.py") == b"VALUE = 1\n"
+        assert len(os.listdir(f"{dist_dir}/cache/wheels")) == 2
+
+    def test_build_vendor_without_sources(
+        self, monkeypatch, isolation, fake_project, dist_dir
+    ):
+        monkeypatch.setenv("HATCH_KICAD_CACHE_DIR", f"{dist_dir}/cache")
+        error_mock = Mock()
+        monkeypatch.setattr(
+            "hatchling.bridge.app.Application.display_error", error_mock
+        )
+        icon, _ = fake_project
+        wheelhouse = isolation / "src" / "wheels"
+        wheelhouse.mkdir()
+        make_wheel(wheelhouse, "foo", "1.0", {"foo.py": ""})
+        data = merge_dicts(
+            self._CONFIG_BASE,
+            {"icon": icon.name, "include": ["src/*.txt"], "vendor": "src/wheels"},
+        )
+        config = merge_dicts(
+            {
+                "project": {
+                    "name": "Plugin",
+                    "version": "0.0.1",
+                    "dependencies": ["foo"],
+                }
+            },
+            build_config(data),
+        )
+        builder = KicadBuilder(str(isolation), config=config)
+        builder.build_standard(dist_dir)
+        # vendored modules are not plugin sources
+        error_mock.assert_called_once_with(
+            "No plugin files found, please check your configuration"
+        )
+
+    def test_build_vendor_missing(self, monkeypatch, isolation, fake_project, dist_dir):
+        monkeypatch.setenv("HATCH_KICAD_CACHE_DIR", f"{dist_dir}/cache")
+        abort_mock = Mock()
+        monkeypatch.setattr("hatchling.bridge.app.Application.abort", abort_mock)
+        display_error_mock = Mock()
+        monkeypatch.setattr(
+            "hatchling.bridge.app.Application.display_error", display_error_mock
+        )
+        icon, _ = fake_project
+        os.mkdir(f"{isolation}/src/wheels")
+        data = merge_dicts(
+            self._CONFIG_BASE,
+            {
+                "icon": icon.name,
+                "sources": ["src"],
+                "include": ["src/*.py"],
+                "vendor": {"wheelhouse": "src/wheels", "requirements": ["foo"]},
+            },
+        )
+        config = merge_dicts(
+            {"project": {"name": "Plugin", "version": "0.0.1"}}, build_config(data)
+        )
+        builder = KicadBuilder(str(isolation), config=config)
+        builder.build_standard(dist_dir)
+        (message,), _ = display_error_mock.call_args
+        assert message.startswith("No wheel satisfying `foo` found in")
+        abort_mock.assert_called_once_with("Build failed!")
+
+    def test_build_vendor_conflict(
+        self, monkeypatch, isolation, fake_project, dist_dir
+    ):
+        monkeypatch.setenv("HATCH_KICAD_CACHE_DIR", f"{dist_dir}/cache")
+        abort_mock = Mock()
+        monkeypatch.setattr("hatchling.bridge.app.Application.abort", abort_mock)
+        display_error_mock = Mock()
+        monkeypatch.setattr(
+            "hatchling.bridge.app.Application.display_error", display_error_mock
+        )
+        icon, _ = fake_project
+        os.makedirs(f"{isolation}/src/_vendor")
+        Path(f"{isolation}/src/_vendor/foo.py").write_text("")
+        os.mkdir(f"{isolation}/src/wheels")
+        data = merge_dicts(
+            self._CONFIG_BASE,
+            {
+                "icon": icon.name,
+                "sources": ["src"],
+                "include": ["src/*.py", "src/_vendor/*.py"],
+                "vendor": {"wheelhouse": "src/wheels", "requirements": []},
+            },
+        )
+        config = merge_dicts(
+            {"project": {"name": "Plugin", "version": "0.0.1"}}, build_config(data)
+        )
+        builder = KicadBuilder(str(isolation), config=config)
+        builder.build_standard(dist_dir)
+        display_error_mock.assert_called_once_with(
+            "Included files conflict with `plugins/_vendor` generated by `vendor`"
+        )
+        abort_mock.assert_called_once_with("Build failed!")
+
+    def test_ipc_mode_bundle_wheels(
+        self, monkeypatch, isolation, fake_project, dist_dir
+    ):
+        monkeypatch.setenv("HATCH_KICAD_CACHE_DIR", f"{dist_dir}/cache")
+        icon, sources = fake_project
+        wheelhouse = isolation / "src" / "wheels"
+        wheelhouse.mkdir()
+        foo = make_wheel(wheelhouse, "foo", "1.0", {"foo.py": ""}, requires=["bar"])
+        bar = make_wheel(wheelhouse, "bar", "2.0", {"bar.py": ""})
+        bar_native = make_wheel(
+            wheelhouse, "bar", "2.0", {"bar.so": ""}, tag="cp311-cp311-win_amd64"
+        )
+        make_wheel(wheelhouse, "unused", "1.0", {"unused.py": ""})
+        data = merge_dicts(
+            self._CONFIG_BASE,
+            {
+                "compatibility": "ipc",
+                "icon": icon.name,
+                "sources": ["src"],
+                "include": ["src/*.py"],
+                "actions": [
+                    {
+                        "identifier": "test-plugin",
+                        "name": "Run",
+                        "description": "Run test-plugin entrypoint",
+                        "entrypoint": "main.py",
+                        "show_button": False,
+                    },
+                ],
+                "bundle_wheels": "src/wheels",
+            },
+        )
+        config = merge_dicts(
+            {
+                "project": {
+                    "name": "Plugin",
+                    "version": "0.0.1",
+                    "dependencies": ["foo"],
+                }
+            },
+            build_config(data),
+        )
+        builder = KicadBuilder(str(isolation), config=config)
+        zip_path = builder.build_standard(dist_dir)
+
+        wheels = [Path(w).name for w in [foo, bar, bar_native]]
+        expected = ["resources/icon.png", "metadata.json", "plugins/plugin.json"]
+        expected += [f"plugins/{Path(s.name).name}" for s in sources]
+        expected += ["plugins/requirements.txt"]
+        expected += [f"plugins/wheels/{name}" for name in wheels]
+        assert_zip_content(zip_path, expected)
+        with zipfile.ZipFile(zip_path) as z:
+            requirements = z.read("plugins/requirements.txt").decode()
+            plugin = json.loads(z.read("plugins/plugin.json"))
+        assert requirements.splitlines()[1:4] == [
+            "--no-index",
+            "--find-links wheels",
+            "bar==2.0 \\",
+        ]
+        assert f"--hash=sha256:{getsha256(bar_native)}" in requirements
+        assert requirements.endswith(
+            f"foo==1.0 \\\n    --hash=sha256:{getsha256(foo)}\n"
+        )
+        assert plugin["runtime"]["wheelhouse"] == "wheels"
+        self.assert_json_in_zip(
+            Path(zip_path),
+            "plugins/plugin.json",
+            Path(__file__).parent / "schemas/api.v1.schema.json",
+        )
+
+        # wheels are shared with other builds through cache
+        assert sorted(os.listdir(f"{dist_dir}/cache/wheelhouse")) == sorted(wheels)
+        for wheel in wheels:
+            os.remove(wheelhouse / wheel)
+        zip_path = builder.build_standard(dist_dir)
+        assert_zip_content(zip_path, expected)
+
+    def test_build_zip64(self, monkeypatch, isolation, fake_project, dist_dir):
+        # lowered limits force zip64 records for members and entry count
+        monkeypatch.setattr(zipfile, "ZIP64_LIMIT", 16)
+        monkeypatch.setattr(zipfile, "ZIP_FILECOUNT_LIMIT", 4)
+        icon, sources = fake_project
+        for source in sources:
+            Path(source.name).write_text("VALUE = 1\n" * 100)
+        data = merge_dicts(
+            self._CONFIG_BASE,
+            {"icon": icon.name, "sources": ["src"], "include": ["src/*.py"]},
+        )
+        config = merge_dicts(
+            {"project": {"name": "Plugin", "version": "0.0.1"}}, build_config(data)
+        )
+        builder = KicadBuilder(str(isolation), config=config)
+        zip_path = builder.build_standard(dist_dir)
+        monkeypatch.undo()
+
+        assert b"PK\x06\x06" in Path(zip_path).read_bytes()
+        with zipfile.ZipFile(zip_path) as z:
+            assert z.testzip() is None
+            assert len(z.infolist()) == len(sources) + 2
+        with open(f"{dist_dir}/metadata.json") as f:
+            version = json.load(f)["versions"][0]
+        assert version["install_size"] == get_package_metadata(zip_path)["install_size"]
+
+    def test_build_size_report(self, isolation, fake_project, dist_dir):
+        icon, sources = fake_project
+        data = merge_dicts(
+            self._CONFIG_BASE,
+            {
+                "icon": icon.name,
+                "sources": ["src"],
+                "include": ["src/*.py"],
+                "size_report": True,
+            },
+        )
+        config = merge_dicts(
+            {"project": {"name": "Plugin", "version": "0.0.1"}}, build_config(data)
+        )
+        builder = KicadBuilder(str(isolation), config=config)
+        zip_path = builder.build_standard(dist_dir)
+
+        with open(f"{dist_dir}/size-report.json") as f:
+            report = json.load(f)
+        with zipfile.ZipFile(zip_path) as z:
+            infos = z.infolist()
+        assert report["download_size"] == os.path.getsize(zip_path)
+        assert report["total"]["files"] == len(infos)
+        assert report["total"]["size"] == sum(i.file_size for i in infos)
+        assert sorted(m["name"] for m in report["members"]) == sorted(
+            i.filename for i in infos
+        )
+        assert report["directories"]["plugins"]["files"] == len(sources)
+        assert report["extensions"][".py"]["files"] == len(sources)
+        text = Path(f"{dist_dir}/size-report.txt").read_text()
+        assert text.startswith(f"download size: {report['download_size']}\n")
+        assert "metadata.json" in text
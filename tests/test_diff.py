@@ -0,0 +1,155 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+import json
+import shutil
+import zipfile
+
+import pytest
+
+from hatch_kicad.cli import main
+from hatch_kicad.diff import CentralDirectory, diff_archives
+
+TIMESTAMP = (2020, 2, 2, 0, 0, 0)
+
+
+def make_archive(path, members, metadata=None, *, date_time=TIMESTAMP):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, content in members.items():
+            z.writestr(zipfile.ZipInfo(name, date_time), content)
+        metadata = metadata or {"name": "Plugin", "versions": [{"version": "0.1"}]}
+        z.writestr(zipfile.ZipInfo("metadata.json", date_time), json.dumps(metadata))
+    return str(path)
+
+
+@pytest.fixture
+def old_archive(tmp_path):
+    members = {f"plugins/file{i}.py": f"print({i})\n" for i in range(5)}
+    return make_archive(tmp_path / "old.zip", members)
+
+
+def test_central_directory(old_archive):
+    with open(old_archive, "rb") as f:
+        directory = CentralDirectory(f)
+    with zipfile.ZipFile(old_archive) as z:
+        infos = z.infolist()
+    assert list(directory.index) == [info.filename for info in infos]
+    for info in infos:
+        member = directory.member(info.filename)
+        assert member.crc == info.CRC
+        assert member.file_size == info.file_size
+        assert member.compress_size == info.compress_size
+        assert member.date_time == info.date_time
+        assert member.header_offset == info.header_offset
+
+
+def test_central_directory_prepended_data(old_archive, tmp_path):
+    # offsets stored in archive are relative to its start
+    prepended = tmp_path / "prepended.zip"
+    with open(prepended, "wb") as f, open(old_archive, "rb") as src:
+        f.write(b"#!/bin/sh\n" * 10)
+        shutil.copyfileobj(src, f)
+    assert diff_archives(old_archive, str(prepended))["changed"] == {}
+
+
+def test_central_directory_not_zip(tmp_path):
+    path = tmp_path / "empty.zip"
+    path.write_bytes(b"not a zip file")
+    with open(path, "rb") as f, pytest.raises(zipfile.BadZipFile):
+        CentralDirectory(f)
+
+
+def test_diff_identical(old_archive, tmp_path):
+    copy = tmp_path / "copy.zip"
+    shutil.copy(old_archive, copy)
+    result = diff_archives(old_archive, str(copy))
+    assert result == {
+        "added": [],
+        "removed": [],
+        "changed": {},
+        "reordered": False,
+        "embedded": {},
+        "identical": True,
+    }
+    assert main(["diff", old_archive, str(copy), "--reproducible"]) == 0
+
+
+def test_diff(old_archive, tmp_path, capsys):
+    members = {f"plugins/file{i}.py": f"print({i})\n" for i in range(1, 5)}
+    members["plugins/file2.py"] = "print('changed')\n"
+    members["plugins/new.py"] = ""
+    metadata = {"name": "Plugin", "versions": [{"version": "0.2"}]}
+    new = make_archive(tmp_path / "new.zip", members, metadata)
+    with zipfile.ZipFile(new, "a") as z:
+        info = zipfile.ZipInfo("plugins/file3.py.tmp", TIMESTAMP)
+        z.writestr(info, "")
+
+    result = diff_archives(old_archive, new)
+    assert result["added"] == ["plugins/new.py", "plugins/file3.py.tmp"]
+    assert result["removed"] == ["plugins/file0.py"]
+    assert result["changed"] == {
+        "metadata.json": ["content"],
+        "plugins/file2.py": ["content"],
+    }
+    assert result["embedded"] == {
+        "metadata.json": {"versions[0].version": ["0.1", "0.2"]}
+    }
+    assert not result["reordered"]
+    assert not result["identical"]
+
+    assert main(["diff", old_archive, new]) == 1
+    assert capsys.readouterr().out.splitlines() == [
+        "+ plugins/new.py",
+        "+ plugins/file3.py.tmp",
+        "- plugins/file0.py",
+        "~ metadata.json (content)",
+        "~ plugins/file2.py (content)",
+        "metadata.json: versions[0].version: '0.1' -> '0.2'",
+    ]
+
+
+def test_diff_timestamps_and_order(old_archive, tmp_path, capsys):
+    members = {f"plugins/file{i}.py": f"print({i})\n" for i in reversed(range(5))}
+    new = make_archive(tmp_path / "new.zip", members, date_time=(2024, 1, 1, 0, 0, 0))
+
+    result = diff_archives(old_archive, new)
+    assert set(result["changed"]) == {*members, "metadata.json"}
+    assert all(fields == ["timestamp"] for fields in result["changed"].values())
+    assert result["reordered"]
+
+    result = diff_archives(old_archive, new, ignore_timestamps=True)
+    assert result["changed"] == {}
+    assert main(["diff", old_archive, new, "--ignore-timestamps", "--json"]) == 1
+    assert json.loads(capsys.readouterr().out)["reordered"]
+
+
+def test_diff_not_reproducible(old_archive, tmp_path, capsys):
+    # same members, but different archive comment
+    copy = tmp_path / "copy.zip"
+    shutil.copy(old_archive, copy)
+    with zipfile.ZipFile(copy, "a") as z:
+        z.comment = b"built on CI"
+    assert main(["diff", old_archive, str(copy)]) == 0
+    assert main(["diff", old_archive, str(copy), "--reproducible"]) == 1
+    assert capsys.readouterr().out == "archives are not byte identical\n"
+
+
+def test_diff_zip64(old_archive, tmp_path, monkeypatch):
+    # force zip64 records for all members and end of central directory
+    monkeypatch.setattr(zipfile, "ZIP64_LIMIT", 0)
+    monkeypatch.setattr(zipfile, "ZIP_FILECOUNT_LIMIT", 0)
+    members = {f"plugins/file{i}.py": f"print({i})\n" for i in range(5)}
+    members["plugins/file4.py"] = "print('changed')\n"
+    new = make_archive(tmp_path / "new.zip", members)
+    monkeypatch.undo()
+
+    with open(new, "rb") as f:
+        directory = CentralDirectory(f)
+    with zipfile.ZipFile(new) as z:
+        for info in z.infolist():
+            member = directory.member(info.filename)
+            assert member.file_size == info.file_size
+            assert member.header_offset == info.header_offset
+    result = diff_archives(old_archive, new)
+    assert result["changed"] == {"plugins/file4.py": ["content"]}
+    assert result["added"] == result["removed"] == []
@@ -0,0 +1,120 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+import os
+import shutil
+import tracemalloc
+from contextlib import contextmanager
+
+import pytest
+
+from hatch_kicad.build import KicadBuilder, get_package_metadata
+from hatch_kicad.config import JsonFormat
+from hatch_kicad.repository import KicadRepositoryHook, iter_packages_json
+from hatch_kicad.utils import Placement
+
+from .utils import build_config, merge_dicts
+
+# size of synthetic asset, several times over the budget is enough to prove
+# streaming, use `HATCH_KICAD_MEMORY_TEST_MB` to check multi-gigabyte packages
+ASSET_SIZE = int(os.environ.get("HATCH_KICAD_MEMORY_TEST_MB", "128")) * 2**20
+# peak of memory allocated by python must not depend on size of processed files
+MEMORY_BUDGET = 32 * 2**20
+
+
+@contextmanager
+def memory_budget(budget=MEMORY_BUDGET):
+    tracemalloc.start()
+    try:
+        yield
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < budget, f"peak memory {peak} exceeds budget {budget}"
+
+
+def project_builder(isolation, icon):
+    data = {
+        "name": "Plugin Name",
+        "description": "Short Decription",
+        "description_full": "Full description",
+        "identifier": "com.plugin.identifier",
+        "author": {"name": "bar", "email": "bar@domain"},
+        "license": "MIT",
+        "status": "stable",
+        "kicad_version": "6.0",
+        "icon": icon.name,
+        "sources": ["src"],
+        "include": ["src/*.py", "src/*.bin"],
+        "download_url": "http://foo.bar/{zip_name}",
+    }
+    config = merge_dicts(
+        {"project": {"name": "Plugin", "version": "0.0.1"}}, build_config(data)
+    )
+    return KicadBuilder(str(isolation), config=config)
+
+
+@pytest.fixture
+def large_project(isolation, fake_project, dist_dir):
+    # asset itself is sparse, but it is stored in package archive
+    # and then copied to repository directory
+    if shutil.disk_usage(dist_dir).free < 3 * ASSET_SIZE:
+        pytest.skip("not enough disk space for large package")
+    icon, _ = fake_project
+    with open(f"{isolation}/src/asset.bin", "wb") as f:
+        f.truncate(ASSET_SIZE)
+    return project_builder(isolation, icon)
+
+
+def test_memory_budget(isolation, large_project, dist_dir):
+    with memory_budget():
+        artifact = large_project.build_standard(dist_dir)
+    assert os.path.getsize(artifact) > ASSET_SIZE
+
+    with memory_budget():
+        metadata = get_package_metadata(artifact)
+    assert metadata["install_size"] > ASSET_SIZE
+
+    # plain copy, other placements do not move data through python at all
+    hook = KicadRepositoryHook(
+        str(isolation),
+        {"artifact_placement": str(Placement.COPY)},
+        large_project.config,
+        None,
+        dist_dir,
+        "",
+    )
+    with memory_budget():
+        hook.finalize("", {}, artifact)
+    placed = f"{dist_dir}/repository/{os.path.basename(artifact)}"
+    assert os.path.getsize(placed) == os.path.getsize(artifact)
+
+
+def test_previous_packages_memory(isolation, fake_project, dist_dir):
+    icon, _ = fake_project
+    builder = project_builder(isolation, icon)
+    artifact = builder.build_standard(dist_dir)
+    # previous `packages.json` of 16 MiB is streamed, never loaded whole
+    os.mkdir(f"{dist_dir}/repository")
+    packages = (
+        {
+            "identifier": f"com.plugin.other-{i}",
+            "name": f"Plugin {i}",
+            "description": "Short description",
+            "description_full": "x" * 2**14,
+            "versions": [
+                {"version": "1.0", "download_url": f"http://foo.bar/other-{i}.zip"}
+            ],
+        }
+        for i in range(1024)
+    )
+    with open(f"{dist_dir}/repository/packages.json", "w") as f:
+        f.writelines(iter_packages_json(packages, JsonFormat.COMPACT))
+
+    hook = KicadRepositoryHook(
+        str(isolation), {"merge_packages": True}, builder.config, None, dist_dir, ""
+    )
+    with memory_budget(4 * 2**20):
+        hook.finalize("", {}, artifact)
+    assert len(hook.identifiers) == 1025
+    assert os.path.getsize(f"{dist_dir}/repository/packages.json") > 2**24
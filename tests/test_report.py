@@ -0,0 +1,75 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+from hatch_kicad.report import format_size_report, size_report
+from hatch_kicad.zip import MemberStats
+
+
+def members():
+    return [
+        MemberStats("metadata.json", 100, 60, 0.001),
+        MemberStats("plugins/__init__.py", 200, 100, 0.002),
+        MemberStats("plugins/icon.PNG", 1000, 990, 0.004),
+        MemberStats("plugins/LICENSE", 0, 0, 0.0),
+        MemberStats("resources/icon.png", 500, 500, 0.003),
+    ]
+
+
+def test_size_report():
+    report = size_report(members(), 2000)
+
+    assert report["download_size"] == 2000
+    assert report["total"] == {
+        "files": 5,
+        "size": 1800,
+        "compress_size": 1650,
+        "time": 0.01,
+    }
+    assert [m["name"] for m in report["members"]] == [
+        "plugins/icon.PNG",
+        "resources/icon.png",
+        "plugins/__init__.py",
+        "metadata.json",
+        "plugins/LICENSE",
+    ]
+    assert report["members"][3] == {
+        "name": "metadata.json",
+        "size": 100,
+        "compress_size": 60,
+        "time": 0.001,
+    }
+    assert list(report["directories"]) == ["plugins", "resources", "."]
+    assert report["directories"]["plugins"] == {
+        "files": 3,
+        "size": 1200,
+        "compress_size": 1090,
+        "time": 0.006,
+    }
+    assert list(report["extensions"]) == [".png", ".py", ".json", "(none)"]
+    assert report["extensions"][".png"]["files"] == 2
+
+
+def test_size_report_empty():
+    report = size_report([], 22)
+
+    assert report["total"] == {"files": 0, "size": 0, "compress_size": 0, "time": 0}
+    assert report["members"] == []
+    assert "members: 0" in format_size_report(report)
+
+
+def test_format_size_report():
+    text = format_size_report(size_report(members(), 2000), top=2)
+    lines = text.splitlines()
+
+    assert lines[:3] == [
+        "download size: 2000",
+        "install size: 1800",
+        "members: 5, compressed: 1650, time: 0.010s",
+    ]
+    assert "Largest members (top 2):" in lines
+    assert lines[6].endswith("  plugins/icon.PNG")
+    assert lines[7].endswith("  resources/icon.png")
+    assert not any(line.endswith("plugins/__init__.py") for line in lines)
+    # 3 directories and 4 extensions, each limited to top 2
+    assert lines.count("... 1 more") == 1
+    assert lines.count("... 2 more") == 1
@@ -1,6 +1,7 @@
 # SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
 #
 # SPDX-License-Identifier: MIT
+import gzip
 import json
 import os
 import re
@@ -8,11 +9,24 @@ import shutil
 import tempfile
 import zipfile
 from pathlib import Path
+from unittest.mock import Mock
 
 import pytest
 
 from hatch_kicad.build import KicadBuilder
-from hatch_kicad.repository import KicadRepositoryHook
+from hatch_kicad.config import JsonFormat
+from hatch_kicad.pages import iter_static_pages
+from hatch_kicad.repository import (
+    KicadRepositoryHook,
+    Retention,
+    apply_retention,
+    group_first_seen,
+    gzip_stream,
+    iter_packages_file,
+    iter_packages_json,
+)
+from hatch_kicad.utils import Placement, getsha256, place_file
+from hatch_kicad.zip import ZipArchive
 
 from .utils import assert_zip_content, build_config, merge_dicts
 
@@ -161,3 +175,709 @@ def test_finalize(isolation, dist_dir, fake_project, fake_artifacts):
         # we use empty mocked `metadata.json` artifact so there is no
         # packages there:
         assert packages == {"packages": [{}]}
+
+
+@pytest.fixture
+def repository_hook(isolation, dist_dir, fake_project):
+    icon, _ = fake_project
+
+    def _hook(hook_config=None, **target_config):
+        config = merge_dicts(
+            {"project": {"name": "Plugin", "version": "0.1.0"}},
+            build_config(
+                merge_dicts(
+                    {
+                        "reproducible": True,
+                        "icon": icon.name,
+                        "author": {"name": "bar", "email": "bar@domain"},
+                        "identifier": "id",
+                        "download_url": "http://foo.bar/{zip_name}",
+                        "status": "stable",
+                    },
+                    target_config,
+                )
+            ),
+        )
+        builder = KicadBuilder(str(isolation), config=config)
+        return KicadRepositoryHook(
+            str(isolation), hook_config or {}, builder.config, None, dist_dir, ""
+        )
+
+    return _hook
+
+
+def test_finalize_incremental(dist_dir, fake_artifacts, repository_hook):
+    archive, _ = fake_artifacts
+    repository = f"{dist_dir}/repository"
+    repository_hook().finalize("", {}, archive)
+
+    outputs = ["example.zip", "packages.json", "resources.zip", "repository.json"]
+    outputs += ["index.html", "packages/_.html", "search-index.json", "search.js"]
+    mtimes = {}
+    for name in outputs:
+        path = f"{repository}/{name}"
+        os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+        mtimes[name] = os.stat(path).st_mtime_ns
+
+    with open(f"{repository}/.manifest.json") as f:
+        manifest = json.load(f)["files"]
+    assert sorted(manifest) == sorted(outputs)
+    assert manifest["example.zip"]["size"] == 174
+
+    # file not created by hook must survive the update
+    Path(f"{repository}/foreign.txt").touch()
+
+    empty_template = Path(dist_dir, "empty.html")
+    empty_template.touch()
+    repository_hook({"html_data": str(empty_template)}).finalize("", {}, archive)
+    # unchanged outputs must keep modification times
+    for name in ["example.zip", "packages.json", "resources.zip"]:
+        assert os.stat(f"{repository}/{name}").st_mtime_ns == mtimes[name]
+    # no longer produced files are removed using previous manifest
+    assert not os.path.exists(f"{repository}/index.html")
+    assert os.path.isfile(f"{repository}/foreign.txt")
+    with open(f"{repository}/.manifest.json") as f:
+        assert "index.html" not in json.load(f)["files"]
+
+
+def test_finalize_step_failure(monkeypatch, dist_dir, fake_artifacts, repository_hook):
+    archive, _ = fake_artifacts
+    repository = f"{dist_dir}/repository"
+    display_error_mock = Mock()
+    monkeypatch.setattr(
+        "hatchling.bridge.app.Application.display_error", display_error_mock
+    )
+
+    def _fail(_self):
+        msg = "no space left"
+        raise OSError(msg)
+
+    monkeypatch.setattr(KicadRepositoryHook, "create_resources_file", _fail)
+    with pytest.raises(OSError, match="no space left"):
+        repository_hook().finalize("", {}, archive)
+
+    assert [c.args[0] for c in display_error_mock.call_args_list] == [
+        "Step `create_resources_file` failed: no space left",
+        (
+            "Step `create_repository_file` skipped: "
+            "requirement `create_resources_file` failed"
+        ),
+    ]
+    # independent steps completed, manifest is not updated
+    assert os.path.isfile(f"{repository}/packages.json")
+    assert os.path.isfile(f"{repository}/index.html")
+    assert not os.path.exists(f"{repository}/repository.json")
+    assert not os.path.exists(f"{repository}/.manifest.json")
+
+
+def test_finalize_step_failure_removes_temporary_files(
+    monkeypatch, dist_dir, fake_artifacts, repository_hook
+):
+    archive, _ = fake_artifacts
+    repository = f"{dist_dir}/repository"
+    monkeypatch.setattr(
+        "hatchling.bridge.app.Application.display_error", lambda *_: None
+    )
+
+    def _fail_json(_packages, _json_format):
+        yield "{"
+        msg = "no space left"
+        raise OSError(msg)
+
+    def _fail_zip(_self, *_args):
+        msg = "no space left"
+        raise OSError(msg)
+
+    monkeypatch.setattr("hatch_kicad.repository.iter_packages_json", _fail_json)
+    monkeypatch.setattr(ZipArchive, "write", _fail_zip)
+    with pytest.raises(OSError, match="no space left"):
+        repository_hook().finalize("", {}, archive)
+
+    assert not list(Path(repository).glob("*.tmp"))
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "[]",
+        '{"packages": "x"}',
+        '{"packages": {"url": 5, "update_timestamp": "1"}, "resources": []}',
+        "{",
+    ],
+)
+def test_finalize_malformed_previous_repository(
+    dist_dir, fake_artifacts, repository_hook, content
+):
+    archive, _ = fake_artifacts
+    repository = Path(dist_dir, "repository")
+    repository.mkdir()
+    (repository / "repository.json").write_text(content)
+
+    repository_hook().finalize("", {}, archive)
+    with open(repository / "repository.json") as f:
+        data = json.load(f)
+    assert data["packages"]["url"].endswith("/packages.json")
+    assert isinstance(data["resources"]["update_timestamp"], int)
+
+
+def test_finalize_updates_changed_files(dist_dir, fake_artifacts, repository_hook):
+    archive, metadata = fake_artifacts
+    repository = f"{dist_dir}/repository"
+    repository_hook().finalize("", {}, archive)
+    with open(metadata, "w") as f:
+        json.dump({"name": "changed"}, f)
+
+    repository_hook().finalize("", {}, archive)
+    with open(f"{repository}/packages.json") as f:
+        assert json.load(f) == {"packages": [{"name": "changed"}]}
+
+
+@pytest.mark.parametrize("placement", ["auto", "hardlink", "reflink", "copy"])
+def test_finalize_artifact_placement(
+    placement, dist_dir, fake_artifacts, repository_hook
+):
+    archive, _ = fake_artifacts
+    repository_hook({"artifact_placement": placement}).finalize("", {}, archive)
+    placed = f"{dist_dir}/repository/example.zip"
+    with open(archive, "rb") as a, open(placed, "rb") as b:
+        assert a.read() == b.read()
+    assert os.path.samefile(archive, placed) == (placement == "hardlink")
+
+
+def test_artifact_placement_wrong_value(isolation):
+    config = {"artifact_placement": "symlink"}
+    build_hook = KicadRepositoryHook(str(isolation), config, None, None, "", "")
+    with pytest.raises(
+        ValueError,
+        match="Invalid `artifact_placement` value: `symlink`\n"
+        "Option `artifact_placement` for build hook `kicad-repository` can be one of "
+        "the following values: auto, hardlink, reflink, copy",
+    ):
+        _ = build_hook.artifact_placement
+
+
+def test_place_file_fallback(monkeypatch, dist_dir, fake_artifacts):
+    archive, _ = fake_artifacts
+
+    def unsupported(*args):
+        raise OSError(*args)
+
+    monkeypatch.setattr("os.link", unsupported)
+    monkeypatch.setattr("hatch_kicad.utils._reflink", unsupported)
+    monkeypatch.setattr("hatch_kicad.utils._copy_file_range", unsupported)
+    dst = f"{dist_dir}/copy.zip"
+    assert place_file(archive, dst, Placement.HARDLINK) == Placement.COPY
+    assert not os.path.samefile(archive, dst)
+    assert not os.path.exists(f"{dst}.tmp")
+
+
+def test_finalize_precompress(monkeypatch, dist_dir, fake_artifacts, repository_hook):
+    archive, metadata = fake_artifacts
+    repository = f"{dist_dir}/repository"
+    repository_hook({"precompress": True}).finalize("", {}, archive)
+    for name in ["packages.json", "repository.json", "index.html"]:
+        with open(f"{repository}/{name}", "rb") as f:
+            content = f.read()
+        with gzip.open(f"{repository}/{name}.gz", "rb") as f:
+            assert f.read() == content
+    assert not os.path.exists(f"{repository}/resources.zip.gz")
+    assert not os.path.exists(f"{repository}/example.zip.gz")
+
+    # compressed files are reproducible so unchanged content is not rewritten
+    os.utime(f"{repository}/packages.json.gz", ns=(0, 0))
+    repository_hook({"precompress": True}).finalize("", {}, archive)
+    assert os.stat(f"{repository}/packages.json.gz").st_mtime_ns == 0
+
+    # only variants of changed or damaged files are compressed again
+    compressed = []
+
+    def _gzip_stream(src, dst):
+        compressed.append(Path(src.name).name)
+        gzip_stream(src, dst)
+
+    monkeypatch.setattr(
+        "hatch_kicad.repository.get_compressors", lambda: {".gz": _gzip_stream}
+    )
+    repository_hook({"precompress": True}).finalize("", {}, archive)
+    assert compressed == []
+    with open(f"{repository}/index.html.gz", "r+b") as f:
+        f.truncate(10)
+    repository_hook({"precompress": True}).finalize("", {}, archive)
+    assert compressed == ["index.html"]
+    with gzip.open(f"{repository}/index.html.gz", "rb") as f:
+        assert f.read() == Path(repository, "index.html").read_bytes()
+    with open(metadata, "w") as f:
+        json.dump({"name": "changed"}, f)
+    repository_hook({"precompress": True}).finalize("", {}, archive)
+    assert {"packages.json", "repository.json"} <= set(compressed[1:])
+    with gzip.open(f"{repository}/packages.json.gz", "rb") as f:
+        assert json.load(f) == {"packages": [{"name": "changed"}]}
+
+    repository_hook().finalize("", {}, archive)
+    assert not os.path.exists(f"{repository}/packages.json.gz")
+
+
+def test_precompress_wrong_type(isolation):
+    config = {"precompress": "yes"}
+    build_hook = KicadRepositoryHook(str(isolation), config, None, None, "", "")
+    with pytest.raises(
+        TypeError,
+        match="Option `precompress` for build hook "
+        "`kicad-repository` must be a boolean",
+    ):
+        _ = build_hook.precompress
+
+
+def test_finalize_compact_json(dist_dir, fake_artifacts, repository_hook):
+    archive, _ = fake_artifacts
+    repository = f"{dist_dir}/repository"
+    repository_hook({"json_format": "compact"}).finalize("", {}, archive)
+    with open(f"{repository}/repository.json") as f:
+        content = f.read()
+    assert "\n" not in content
+    repository_data = json.loads(content)
+    for item in ["packages", "resources"]:
+        served = Path(repository, Path(repository_data[item]["url"]).name)
+        assert repository_data[item]["sha256"] == getsha256(served)
+    with open(f"{repository}/packages.json") as f:
+        assert f.read() == '{"packages":[{}]}'
+
+
+def test_json_format_fallback(isolation):
+    config = build_config({"json_format": "compact"})
+    builder = KicadBuilder(str(isolation), config=config)
+    build_hook = KicadRepositoryHook(str(isolation), {}, builder.config, None, "", "")
+    assert str(build_hook.json_format) == "compact"
+
+
+def test_json_format_wrong_value(isolation):
+    config = {"json_format": "pretty"}
+    build_hook = KicadRepositoryHook(str(isolation), config, None, None, "", "")
+    with pytest.raises(
+        ValueError,
+        match="Invalid `json_format` value: `pretty`\n"
+        "Option `json_format` for build hook `kicad-repository` can be one of "
+        "the following values: indent, compact",
+    ):
+        _ = build_hook.json_format
+
+
+@pytest.mark.parametrize("json_format", list(JsonFormat))
+@pytest.mark.parametrize("count", [0, 1, 3])
+def test_iter_packages_json(json_format, count):
+    packages = [
+        {"identifier": f"id-{i}", "versions": [{"version": "1.0"}], "tags": []}
+        for i in range(count)
+    ]
+    streamed = "".join(iter_packages_json(iter(packages), json_format))
+    assert streamed == json_format.dumps({"packages": packages})
+
+
+@pytest.mark.parametrize("json_format", list(JsonFormat))
+@pytest.mark.parametrize("count", [0, 1, 3])
+@pytest.mark.parametrize("read_size", [1, 7, 65536])
+def test_iter_packages_file(tmp_path, json_format, count, read_size):
+    packages = [
+        {"identifier": f"id-{i}", "versions": [{"version": "1.0"}], "size": 12345}
+        for i in range(count)
+    ]
+    path = tmp_path / "packages.json"
+    path.write_text(json_format.dumps({"other": [1], "packages": packages}))
+    assert list(iter_packages_file(str(path), read_size)) == packages
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "",
+        "{}",
+        '{"packages": {}}',
+        '{"packages": [1]}',
+        '{"packages": [{},]}',
+        '{"packages": [{}] "other": 1}',
+        '{"packages": [{}]',
+        '{"packages": []} []',
+    ],
+)
+def test_iter_packages_file_malformed(tmp_path, content):
+    path = tmp_path / "packages.json"
+    path.write_text(content)
+    with pytest.raises(ValueError):
+        list(iter_packages_file(str(path), 4))
+
+
+def test_finalize_html_reuses_packages(dist_dir, fake_artifacts, repository_hook):
+    archive, _ = fake_artifacts
+    repository = f"{dist_dir}/repository"
+    template = Path(dist_dir, "template.html")
+    template.write_text("<pre>{metadata_str}</pre><p>{repository_url}</p>")
+    repository_hook({"html_data": str(template)}).finalize("", {}, archive)
+    with open(f"{repository}/packages.json") as f:
+        packages = f.read()
+    with open(f"{repository}/index.html") as f:
+        assert f.read() == f"<pre>{packages}</pre><p>http://foo.bar</p>"
+
+
+def test_finalize_static_pages(dist_dir, fake_artifacts, repository_hook):
+    archive, metadata = fake_artifacts
+    repository = f"{dist_dir}/repository"
+    with open(metadata, "w") as f:
+        json.dump(
+            {
+                "name": "Plugin <b>",
+                "identifier": "com.plugin",
+                "description": "see https://foo.bar/docs",
+                "author": {"name": "bar", "contact": {"email": "bar@domain"}},
+                "versions": [
+                    {"version": "0.1", "download_url": "http://foo.bar/plugin.zip"}
+                ],
+            },
+            f,
+        )
+    repository_hook().finalize("", {}, archive)
+    with open(f"{repository}/index.html") as f:
+        index = f.read()
+    assert '<script src="search.js" defer></script>' in index
+    assert "cdn." not in index
+    assert '<a href="packages/com.plugin.html">Plugin &lt;b&gt;</a>' in index
+    assert '<a href="https://foo.bar/docs">https://foo.bar/docs</a>' in index
+    assert "Next" not in index
+    with open(f"{repository}/packages/com.plugin.html") as f:
+        page = f.read()
+    assert '<a href="mailto:bar@domain">bar@domain</a>' in page
+    assert '<a href="http://foo.bar/plugin.zip">plugin.zip</a>' in page
+
+
+def test_static_pages_pagination():
+    packages = [{"identifier": f"id-{i}", "versions": []} for i in range(5)]
+    pages = dict(iter_static_pages(iter(packages), "http://foo.bar", 2))
+    assert sorted(pages) == [
+        "index-2.html",
+        "index-3.html",
+        "index.html",
+        *[f"packages/id-{i}.html" for i in range(5)],
+        "search-index.json",
+        "search.js",
+    ]
+    assert '<a href="index-2.html">Next</a>' in pages["index.html"]
+    assert '<a href="index.html">Previous</a>' in pages["index-2.html"]
+    assert '<a href="index-3.html">Next</a>' in pages["index-2.html"]
+    assert "Next" not in pages["index-3.html"]
+    assert "packages/id-4.html" in pages["index-3.html"]
+
+
+def test_html_page_size_wrong_value(isolation):
+    config = {"html_page_size": 0}
+    build_hook = KicadRepositoryHook(str(isolation), config, None, None, "", "")
+    with pytest.raises(
+        ValueError,
+        match="Option `html_page_size` for build hook "
+        "`kicad-repository` must be greater than 0",
+    ):
+        _ = build_hook.html_page_size
+
+
+def test_search_index():
+    packages = [
+        {
+            "name": "Keyboard placer",
+            "identifier": "com.github.kbplacer",
+            "description": "Places switches",
+            "author": {"name": "adamws"},
+            "tags": ["keyboard"],
+        },
+        {"name": "Other", "identifier": "other", "description": "Keyboard tool"},
+    ]
+    pages = dict(iter_static_pages(iter(packages), "http://foo.bar", 50))
+    index = json.loads(pages["search-index.json"])
+    assert index["docs"] == [
+        ["Keyboard placer", "packages/com.github.kbplacer.html", "Places switches"],
+        ["Other", "packages/other.html", "Keyboard tool"],
+    ]
+    assert index["terms"]["keyboard"] == [0, 1]
+    assert index["terms"]["adamws"] == [0]
+    assert index["terms"]["kbplacer"] == [0]
+    assert "tool" in index["terms"]
+
+
+def test_finalize_without_search(dist_dir, fake_artifacts, repository_hook):
+    archive, _ = fake_artifacts
+    repository = f"{dist_dir}/repository"
+    repository_hook().finalize("", {}, archive)
+    repository_hook({"html_search": False}).finalize("", {}, archive)
+    assert not os.path.exists(f"{repository}/search-index.json")
+    with open(f"{repository}/index.html") as f:
+        assert "search" not in f.read()
+
+
+def write_metadata(path, identifier, *versions):
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "identifier": identifier,
+                "versions": [
+                    {
+                        "version": v,
+                        "download_url": f"http://foo.bar/{identifier}-{v}.zip",
+                    }
+                    for v in versions
+                ],
+            },
+            f,
+        )
+
+
+def test_finalize_merge_packages(dist_dir, fake_artifacts, repository_hook):
+    archive, metadata = fake_artifacts
+    repository = f"{dist_dir}/repository"
+    config = {"merge_packages": True}
+
+    write_metadata(metadata, "first", "0.1")
+    repository_hook(config, identifier="first").finalize("", {}, archive)
+    # artifacts of previous versions hosted in repository are kept
+    Path(f"{repository}/first-0.1.zip").touch()
+    write_metadata(metadata, "second", "1.0")
+    repository_hook(config, identifier="second").finalize("", {}, archive)
+    with zipfile.ZipFile(f"{repository}/resources.zip") as z:
+        first_icon = z.getinfo("first/icon.png")
+    write_metadata(metadata, "first", "0.2")
+    repository_hook(config, identifier="first").finalize("", {}, archive)
+
+    with open(f"{repository}/packages.json") as f:
+        packages = json.load(f)["packages"]
+    assert [p["identifier"] for p in packages] == ["first", "second"]
+    assert [v["version"] for v in packages[0]["versions"]] == ["0.2", "0.1"]
+    assert os.path.isfile(f"{repository}/first-0.1.zip")
+
+    assert_zip_content(
+        f"{repository}/resources.zip", ["first/icon.png", "second/icon.png"]
+    )
+    with zipfile.ZipFile(f"{repository}/resources.zip") as z:
+        assert z.testzip() is None
+        assert z.getinfo("first/icon.png").CRC == first_icon.CRC
+        assert [i.filename for i in z.infolist()] == [
+            "first/icon.png",
+            "second/icon.png",
+        ]
+
+    # truncated previous `packages.json` is ignored
+    with open(f"{repository}/packages.json", "r+") as f:
+        f.truncate(100)
+    write_metadata(metadata, "second", "1.1")
+    repository_hook(config, identifier="second").finalize("", {}, archive)
+    with open(f"{repository}/packages.json") as f:
+        packages = json.load(f)["packages"]
+    assert [p["identifier"] for p in packages] == ["second"]
+
+    # without merging, only current package remains
+    write_metadata(metadata, "first", "0.2")
+    repository_hook(identifier="first").finalize("", {}, archive)
+    assert_zip_content(f"{repository}/resources.zip", ["first/icon.png"])
+    assert not os.path.exists(f"{repository}/first-0.1.zip")
+
+
+def test_zip_copy_raw(dist_dir, fake_artifacts):
+    archive, _ = fake_artifacts
+    target = Path(dist_dir, "copy.zip")
+    with (
+        zipfile.ZipFile(archive) as source,
+        ZipArchive(target, reproducible=True) as zipf,
+    ):
+        for info in source.infolist():
+            zipf.copy_raw(source, info)
+    with zipfile.ZipFile(archive) as a, zipfile.ZipFile(target) as b:
+        assert b.testzip() is None
+        assert [(i.filename, i.CRC, i.compress_size) for i in a.infolist()] == [
+            (i.filename, i.CRC, i.compress_size) for i in b.infolist()
+        ]
+        for info in a.infolist():
+            assert a.read(info) == b.read(info.filename)
+
+
+def test_finalize_hashed_names(dist_dir, fake_artifacts, repository_hook):
+    archive, metadata = fake_artifacts
+    repository = Path(dist_dir, "repository")
+    config = {"hashed_names": True, "hashed_names_keep": 2, "merge_packages": True}
+
+    generations = []
+    for i in range(4):
+        write_metadata(metadata, "id", f"0.{i}")
+        repository_hook(config).finalize("", {}, archive)
+        with open(repository / "repository.json") as f:
+            repository_data = json.load(f)
+        name = Path(repository_data["packages"]["url"]).name
+        assert re.match(r"^packages\.[0-9a-f]{16}\.json$", name)
+        assert repository_data["packages"]["sha256"].startswith(name[9:25])
+        # make generation order independent of filesystem timestamp resolution
+        os.utime(repository / name, ns=(i * 10**9, i * 10**9))
+        generations.append(name)
+
+    # merging reads previous packages through hashed name
+    with open(repository / generations[-1]) as f:
+        versions = json.load(f)["packages"][0]["versions"]
+    assert [v["version"] for v in versions] == ["0.3", "0.2", "0.1", "0.0"]
+
+    assert sorted(p.name for p in repository.glob("packages*.json")) == sorted(
+        generations[-2:]
+    )
+    resources = list(repository.glob("resources*.zip"))
+    # icon did not change so there is single resources generation
+    assert len(resources) == 1
+    assert re.match(r"^resources\.[0-9a-f]{16}\.zip$", resources[0].name)
+    assert not (repository / "packages.json").exists()
+
+
+def test_finalize_stable_timestamps(
+    monkeypatch, dist_dir, fake_artifacts, repository_hook
+):
+    archive, metadata = fake_artifacts
+    repository = Path(dist_dir, "repository")
+
+    def read_repository():
+        with open(repository / "repository.json") as f:
+            return json.load(f)
+
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+    repository_hook().finalize("", {}, archive)
+    first = read_repository()
+    assert first["packages"]["update_timestamp"] == 1700000000
+    assert first["packages"]["update_time_utc"] == "2023-11-14 22:13:20"
+
+    # unchanged content keeps previous update time
+    (repository / "packages.json").touch()
+    repository_hook().finalize("", {}, archive)
+    assert read_repository() == first
+
+    # changed content gets new update time, always later than previous one
+    write_metadata(metadata, "id", "0.2")
+    repository_hook().finalize("", {}, archive)
+    second = read_repository()
+    assert second["packages"]["update_timestamp"] == 1700000001
+    assert second["resources"] == first["resources"]
+
+
+def test_apply_retention():
+    def version(v, kicad="8.0", status="stable"):
+        return {"version": v, "kicad_version": kicad, "status": status}
+
+    versions = [
+        version("1.10"),
+        version("1.9", kicad="7.0"),
+        version("1.2", kicad="7.0"),
+        version("1.1", kicad="6.0"),
+        version("2.0", status="development"),
+        version("1.11", status="development"),
+    ]
+    retention = Retention(
+        versions=2, latest_per_kicad_version=False, development_max_age=None
+    )
+    kept = apply_retention(versions, retention, {}, 0)
+    assert [v["version"] for v in kept] == ["2.0", "1.11"]
+
+    retention["latest_per_kicad_version"] = True
+    kept = apply_retention(versions, retention, {}, 0)
+    assert [v["version"] for v in kept] == ["1.9", "1.1", "2.0", "1.11"]
+
+    retention["development_max_age"] = 1
+    first_seen = {"1.11": 0, "2.0": 2 * 86400}
+    kept = apply_retention(versions, retention, first_seen, 2 * 86400)
+    assert [v["version"] for v in kept] == ["1.9", "1.1", "2.0"]
+
+
+def test_group_first_seen():
+    grouped = group_first_seen({"a/1.0": 1, "a/2.0/rc": 2, "b/1.0": 3})
+    assert grouped == {"a": {"1.0": 1, "2.0/rc": 2}, "b": {"1.0": 3}}
+
+
+def test_finalize_retention(monkeypatch, dist_dir, fake_artifacts, repository_hook):
+    archive, metadata = fake_artifacts
+    repository = Path(dist_dir, "repository")
+    config = {"merge_packages": True, "retention": {"versions": 2}}
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+    for i in range(4):
+        write_metadata(metadata, "id", f"0.{i}")
+        repository_hook(config).finalize("", {}, archive)
+    with open(repository / "packages.json") as f:
+        versions = json.load(f)["packages"][0]["versions"]
+    assert [v["version"] for v in versions] == ["0.3", "0.2"]
+    with open(repository / ".manifest.json") as f:
+        assert json.load(f)["versions"] == {
+            "id/0.2": 1700000000,
+            "id/0.3": 1700000000,
+        }
+
+
+@pytest.mark.parametrize(
+    "retention,error,message",
+    [
+        ([], TypeError, "must be a dictionary"),
+        ({"foo": 1}, ValueError, "has unknown properties: foo"),
+        ({"versions": 0}, ValueError, "`versions` property must be greater than 0"),
+        ({"versions": "1"}, TypeError, "`versions` property must be an integer"),
+        (
+            {"latest_per_kicad_version": 1},
+            TypeError,
+            "`latest_per_kicad_version` property must be a boolean",
+        ),
+        (
+            {"development_max_age": "1d"},
+            TypeError,
+            "`development_max_age` property must be a number",
+        ),
+    ],
+)
+def test_retention_wrong_value(isolation, retention, error, message):
+    config = {"retention": retention}
+    build_hook = KicadRepositoryHook(str(isolation), config, None, None, "", "")
+    with pytest.raises(
+        error,
+        match=f"Option `retention` for build hook `kicad-repository` {message}",
+    ):
+        _ = build_hook.retention
+
+
+def test_finalize_publish(dist_dir, fake_artifacts, repository_hook):
+    archive, _ = fake_artifacts
+    repository = Path(dist_dir, "repository")
+    with tempfile.TemporaryDirectory() as target:
+        config = {"publish": {"target": f"file://{target}"}}
+        repository_hook(config).finalize("", {}, archive)
+        published = sorted(
+            str(p.relative_to(target)) for p in Path(target).rglob("*") if p.is_file()
+        )
+        expected = sorted(
+            str(p.relative_to(repository)) for p in repository.rglob("*") if p.is_file()
+        )
+        assert published == expected
+        assert (
+            Path(target, "repository.json").read_bytes()
+            == (repository / "repository.json").read_bytes()
+        )
+
+
+@pytest.mark.parametrize(
+    "publish,error,message",
+    [
+        ("s3://bucket", TypeError, "must be a dictionary"),
+        ({}, ValueError, "must have `target` property"),
+        ({"target": 1}, TypeError, "`target` property must be a string"),
+        (
+            {"target": "out", "region": None},
+            TypeError,
+            "`region` property must be a string",
+        ),
+        (
+            {"target": "out", "jobs": 0},
+            ValueError,
+            "`jobs` property must be a positive integer",
+        ),
+    ],
+)
+def test_publish_wrong_value(isolation, publish, error, message):
+    config = {"publish": publish}
+    build_hook = KicadRepositoryHook(str(isolation), config, None, None, "", "")
+    with pytest.raises(
+        error,
+        match=f"Option `publish` for build hook `kicad-repository` {message}",
+    ):
+        _ = build_hook.publish
@@ -0,0 +1,173 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+import gzip
+import http.client
+import threading
+
+import pytest
+
+from hatch_kicad.serve import (
+    ETAG_CACHE_SIZE,
+    accepted_encodings,
+    entity_tag,
+    load,
+    make_server,
+    parse_range,
+)
+
+CONTENT = b'{"name": "test repository"}' * 10
+
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / "repository.json").write_bytes(CONTENT)
+    (tmp_path / "repository.json.gz").write_bytes(gzip.compress(CONTENT, mtime=0))
+    (tmp_path / "packages.0123456789abcdef.json").write_bytes(b"{}")
+    (tmp_path / "index.html").write_bytes(b"<html></html>")
+    server = make_server(str(tmp_path), port=0, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_entity_tag_cache(tmp_path):
+    path = tmp_path / "packages.json"
+    path.write_bytes(b"{}")
+    stat = path.stat()
+    etag = entity_tag(str(path), stat.st_mtime_ns, stat.st_size)
+    path.write_bytes(b"[]")
+    # cached by modification time and size, not by content
+    assert entity_tag(str(path), stat.st_mtime_ns, stat.st_size) == etag
+    assert entity_tag(str(path), stat.st_mtime_ns + 1, stat.st_size) != etag
+    assert entity_tag.cache_info().maxsize == ETAG_CACHE_SIZE
+
+
+def get(server, path, headers=None, method="GET"):
+    connection = http.client.HTTPConnection(*server.server_address[:2])
+    connection.request(method, path, headers=headers or {})
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response, body
+
+
+def test_serve_conditional(server):
+    response, body = get(server, "/repository.json")
+    assert response.status == 200
+    assert body == CONTENT
+    assert response.getheader("Accept-Ranges") == "bytes"
+    assert response.getheader("Cache-Control") == "no-cache"
+    assert response.getheader("Vary") == "Accept-Encoding"
+    etag = response.getheader("ETag")
+    last_modified = response.getheader("Last-Modified")
+
+    response, body = get(server, "/repository.json", {"If-None-Match": etag})
+    assert response.status == 304
+    assert body == b""
+    assert response.getheader("ETag") == etag
+
+    response, _ = get(server, "/repository.json", {"If-None-Match": '"other"'})
+    assert response.status == 200
+
+    response, _ = get(server, "/repository.json", {"If-Modified-Since": last_modified})
+    assert response.status == 304
+
+    response, _ = get(
+        server,
+        "/repository.json",
+        {"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"},
+    )
+    assert response.status == 200
+
+
+def test_serve_precompressed(server):
+    response, body = get(server, "/repository.json", {"Accept-Encoding": "br, gzip"})
+    assert response.status == 200
+    assert response.getheader("Content-Encoding") == "gzip"
+    assert response.getheader("Content-Type") == "application/json"
+    assert gzip.decompress(body) == CONTENT
+    identity_etag = get(server, "/repository.json")[0].getheader("ETag")
+    assert response.getheader("ETag") != identity_etag
+
+    response, body = get(server, "/repository.json", {"Accept-Encoding": "gzip;q=0"})
+    assert response.getheader("Content-Encoding") is None
+    assert body == CONTENT
+
+
+def test_serve_range(server):
+    response, body = get(server, "/repository.json", {"Range": "bytes=2-5"})
+    assert response.status == 206
+    assert body == CONTENT[2:6]
+    assert response.getheader("Content-Range") == f"bytes 2-5/{len(CONTENT)}"
+
+    response, body = get(server, "/repository.json", {"Range": "bytes=-4"})
+    assert response.status == 206
+    assert body == CONTENT[-4:]
+
+    response, body = get(
+        server, "/repository.json", {"Range": "bytes=0-1", "If-Range": '"other"'}
+    )
+    assert response.status == 200
+    assert body == CONTENT
+
+    response, _ = get(server, "/repository.json", {"Range": f"bytes={len(CONTENT)}-"})
+    assert response.status == 416
+    assert response.getheader("Content-Range") == f"bytes */{len(CONTENT)}"
+
+
+def test_serve_other(server):
+    response, body = get(server, "/packages.0123456789abcdef.json")
+    assert response.getheader("Cache-Control") == "public, max-age=31536000, immutable"
+    assert response.getheader("Vary") is None
+
+    response, body = get(server, "/")
+    assert response.status == 200
+    assert body == b"<html></html>"
+    assert response.getheader("ETag")
+
+    response, body = get(server, "/repository.json", method="HEAD")
+    assert response.status == 200
+    assert response.getheader("Content-Length") == str(len(CONTENT))
+    assert body == b""
+
+    response, _ = get(server, "/missing.json")
+    assert response.status == 404
+
+
+def test_load(server):
+    host, port = server.server_address[:2]
+    result = load(f"http://{host}:{port}/repository.json", clients=4, requests=5)
+    assert result["requests"] == 20
+    assert result["errors"] == 0
+    # first request of every client downloads, following are revalidations
+    assert result["statuses"] == {200: 4, 304: 16}
+    assert result["bytes"] == 4 * len(gzip.compress(CONTENT, mtime=0))
+
+
+@pytest.mark.parametrize(
+    "header,size,expected",
+    [
+        ("bytes=0-0", 10, (0, 0)),
+        ("bytes=5-", 10, (5, 9)),
+        ("bytes=5-100", 10, (5, 9)),
+        ("bytes=-100", 10, (0, 9)),
+        ("bytes=0-1,3-4", 10, None),
+        ("items=0-1", 10, None),
+    ],
+)
+def test_parse_range(header, size, expected):
+    assert parse_range(header, size) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=10-", "bytes=-0", "bytes=5-2"])
+def test_parse_range_not_satisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 10)
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, deflate;q=0.5, br;q=0") == {"gzip", "deflate"}
+    assert accepted_encodings("") == set()
@@ -0,0 +1,116 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+import os
+
+import pytest
+
+from hatch_kicad.slim import DEFAULT_EXCLUDE, is_excluded, slim_files, slim_source
+
+SOURCE = b'''"""Module docstring."""
+# comment
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from foo import Bar
+
+
+class Plugin:
+    """Class docstring."""
+
+    def run(self, value: Bar) -> int:
+        """Method docstring."""
+        return 1  # trailing comment
+
+
+def check():
+    if TYPE_CHECKING:
+        import baz
+'''
+
+
+def test_slim_source():
+    result = slim_source(SOURCE)
+    assert result == (
+        b"from __future__ import annotations\n"
+        b"from typing import TYPE_CHECKING\n\n"
+        b"class Plugin:\n\n"
+        b"    def run(self, value: Bar) -> int:\n"
+        b"        return 1\n\n"
+        b"def check():\n"
+        b"    pass\n"
+    )
+    namespace: dict = {}
+    exec(compile(result, "plugin.py", "exec"), namespace)  # noqa: S102
+    assert namespace["Plugin"]().run(None) == 1
+
+
+@pytest.mark.parametrize(
+    "block",
+    [
+        "for x in []:",
+        "while False:",
+        "with open(__file__):",
+        "try:",
+        "if True:",
+    ],
+)
+def test_slim_source_empty_block(block):
+    tail = "\nexcept ImportError:\n    pass" if block == "try:" else ""
+    source = f"{block}\n    if TYPE_CHECKING:\n        import foo{tail}\n"
+    result = slim_source(source.encode())
+    compile(result, "plugin.py", "exec")
+    assert b"foo" not in result
+
+
+def test_slim_source_keep_docstrings():
+    result = slim_source(SOURCE, strip_docstrings=False)
+    assert b"Method docstring." in result
+    assert b"comment" not in result
+    assert slim_source(b'"""Only docstring."""\n') == b""
+
+
+@pytest.mark.parametrize(
+    "path,expected",
+    [
+        ("plugin.py", False),
+        ("tests/helpers.py", True),
+        ("pkg/tests/data.json", True),
+        ("pkg/test_plugin.py", True),
+        ("pkg/plugin_test.py", True),
+        ("conftest.py", True),
+        ("pkg/__pycache__/plugin.cpython-311.pyc", True),
+        ("testing.py", False),
+    ],
+)
+def test_is_excluded(path, expected):
+    assert is_excluded(path, DEFAULT_EXCLUDE) == expected
+
+
+def test_slim_files_cache(tmp_path):
+    sources = []
+    for i in range(3):
+        path = tmp_path / f"module{i}.py"
+        path.write_bytes(SOURCE if i else b"def broken(:\n")
+        sources.append((str(path), f"plugins/module{i}.py"))
+    cache = tmp_path / "cache"
+    cache.mkdir()
+
+    result = slim_files(sources, str(cache))
+    # sources which can't be parsed are kept verbatim
+    broken = result["plugins/module0.py"]
+    assert broken["slim_size"] == broken["size"]
+    # identical sources share single cache entry
+    assert result["plugins/module1.py"]["path"] == result["plugins/module2.py"]["path"]
+    assert result["plugins/module1.py"]["slim_size"] < len(SOURCE)
+    assert len(os.listdir(cache)) == 2
+
+    cached = result["plugins/module1.py"]["path"]
+    os.utime(cached, (0, 0))
+    assert slim_files(sources, str(cache)) == result
+    assert os.stat(cached).st_mtime == 0
+
+    result = slim_files(sources, str(cache), strip_docstrings=False)
+    assert result["plugins/module1.py"]["path"] != cached
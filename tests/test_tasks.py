@@ -0,0 +1,62 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+import threading
+
+import pytest
+
+from hatch_kicad.tasks import SkippedError, Task, run_tasks
+
+
+def test_run_tasks_order():
+    order = []
+    tasks = {
+        "c": Task(lambda: order.append("c"), ("a", "b")),
+        "a": Task(lambda: order.append("a")),
+        "b": Task(lambda: order.append("b"), ("a",)),
+    }
+    assert run_tasks(tasks) == {}
+    assert order == ["a", "b", "c"]
+
+
+def test_run_tasks_concurrent():
+    # both tasks wait for each other, which succeeds only when run concurrently
+    barrier = threading.Barrier(2, timeout=5)
+    tasks = {"a": Task(barrier.wait), "b": Task(barrier.wait)}
+    assert run_tasks(tasks) == {}
+
+
+def test_run_tasks_failure():
+    def _fail():
+        msg = "failure"
+        raise OSError(msg)
+
+    done = []
+    tasks = {
+        "skipped_transitive": Task(lambda: done.append(1), ("skipped",)),
+        "fail": Task(_fail),
+        "independent": Task(lambda: done.append(2)),
+        "skipped": Task(lambda: done.append(3), ("fail", "independent")),
+    }
+    errors = run_tasks(tasks)
+    assert list(errors) == ["skipped_transitive", "fail", "skipped"]
+    assert isinstance(errors["fail"], OSError)
+    assert isinstance(errors["skipped"], SkippedError)
+    assert str(errors["skipped"]) == "requirement `fail` failed"
+    assert str(errors["skipped_transitive"]) == "requirement `skipped` failed"
+    assert done == [2]
+
+
+@pytest.mark.parametrize(
+    "tasks,message",
+    [
+        ({"a": Task(print, ("b",))}, "Task `a` requires unknown tasks: b"),
+        (
+            {"a": Task(print, ("b",)), "b": Task(print, ("a",)), "c": Task(print)},
+            "Tasks with cyclic requirements: a, b",
+        ),
+    ],
+)
+def test_run_tasks_wrong_graph(tasks, message):
+    with pytest.raises(ValueError, match=message):
+        run_tasks(tasks)
@@ -0,0 +1,62 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+import json
+import zipfile
+
+import pytest
+
+from hatch_kicad.build import get_package_metadata
+from hatch_kicad.cli import main
+from hatch_kicad.verify import verify
+
+
+@pytest.fixture
+def artifact(tmp_path):
+    filename = tmp_path / "plugin-0.1.zip"
+    with zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("plugins/", "")
+        for i in range(8):
+            z.writestr(f"plugins/file{i}.py", f"print({i})\n" * 1000)
+        z.writestr("resources/icon.png", b"\x89PNG" + bytes(range(256)))
+    metadata = tmp_path / "metadata.json"
+    version = {"version": "0.1", **get_package_metadata(filename)}
+    metadata.write_text(json.dumps({"versions": [version]}))
+    return filename, metadata
+
+
+def test_verify(artifact):
+    filename, metadata = artifact
+    result = verify(str(filename), str(metadata))
+    assert result["corrupted"] == {}
+    assert result["mismatched"] == {}
+    assert result["package"] == get_package_metadata(filename)
+    assert main(["verify", str(filename)]) == 0
+
+
+def test_verify_corrupted(artifact, capsys):
+    filename, metadata = artifact
+    with zipfile.ZipFile(filename) as z:
+        info = z.getinfo("plugins/file3.py")
+    data = bytearray(filename.read_bytes())
+    # flip bit in the middle of compressed data of the member
+    data[info.header_offset + 30 + len(info.filename) + info.compress_size // 2] ^= 1
+    filename.write_bytes(data)
+
+    result = verify(str(filename), str(metadata))
+    assert list(result["corrupted"]) == ["plugins/file3.py"]
+    assert list(result["mismatched"]) == ["download_sha256"]
+    assert result["package"]["download_size"] == len(data)
+
+    assert main(["verify", str(filename), str(metadata)]) == 1
+    out = capsys.readouterr().out
+    assert "plugins/file3.py" in out
+    assert "`download_sha256`" in out
+
+
+def test_verify_not_zip(tmp_path, capsys):
+    filename = tmp_path / "plugin.zip"
+    filename.write_bytes(b"")
+    (tmp_path / "metadata.json").write_text("{}")
+    assert main(["verify", str(filename)]) == 1
+    assert "File is not a zip file" in capsys.readouterr().out
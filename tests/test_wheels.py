@@ -0,0 +1,199 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+import os
+
+import pytest
+
+from hatch_kicad.utils import getsha256
+from hatch_kicad.wheels import (
+    cache_wheels,
+    extract_wheels,
+    iter_wheel_files,
+    lock_requirements,
+    resolve_wheels,
+)
+
+from .utils import make_wheel
+
+
+@pytest.fixture
+def wheelhouse(tmp_path):
+    directory = tmp_path / "wheels"
+    directory.mkdir()
+    make_wheel(directory, "foo", "1.0", {"foo/__init__.py": "OLD = 1\n"})
+    make_wheel(
+        directory,
+        "foo",
+        "2.0",
+        {"foo/__init__.py": "import bar\n", "foo/tests/test_foo.py": ""},
+        requires=[
+            "bar>=1.0",
+            "baz; extra == 'extra'",
+            "qux; python_version < '3'",
+        ],
+    )
+    make_wheel(directory, "bar", "1.5", {"bar.py": ""})
+    make_wheel(directory, "baz", "0.1", {"baz.py": ""})
+    make_wheel(directory, "unused", "1.0", {"unused.py": ""})
+    make_wheel(directory, "old", "1.0", {"old.py": ""}, requires=["bar<1.0"])
+    make_wheel(
+        directory,
+        "native",
+        "1.0",
+        {"native.so": ""},
+        tag="cp311-cp311-linux_x86_64",
+    )
+    (directory / "not-a-wheel.txt").write_text("")
+    return directory
+
+
+def names(wheels):
+    return [(w.name, str(w.version)) for w in wheels]
+
+
+def test_resolve_wheels(wheelhouse):
+    wheels = resolve_wheels(["Foo"], str(wheelhouse))
+    assert names(wheels) == [("bar", "1.5"), ("foo", "2.0")]
+    wheels = resolve_wheels(["foo[extra]"], str(wheelhouse))
+    assert names(wheels) == [("bar", "1.5"), ("baz", "0.1"), ("foo", "2.0")]
+    wheels = resolve_wheels(["foo<2"], str(wheelhouse))
+    assert names(wheels) == [("foo", "1.0")]
+    assert resolve_wheels([], str(wheelhouse)) == []
+
+
+@pytest.mark.parametrize("variants", [False, True])
+def test_resolve_wheels_extras_of_resolved(wheelhouse, variants):
+    # extras requested after the project is resolved add their dependencies
+    wheels = resolve_wheels(["foo", "foo[extra]"], str(wheelhouse), variants=variants)
+    assert names(wheels) == [("bar", "1.5"), ("baz", "0.1"), ("foo", "2.0")]
+    assert all(w.marker == "" for w in wheels)
+
+
+def test_resolve_wheels_conflict(tmp_path):
+    make_wheel(tmp_path, "bar", "1.0", {"bar.py": ""})
+    make_wheel(tmp_path, "bar", "1.5", {"bar.py": ""}, requires=["new"])
+    make_wheel(tmp_path, "new", "1.0", {"new.py": ""})
+    make_wheel(tmp_path, "pin", "1.0", {"pin.py": ""}, requires=["bar<1.5"])
+    # `bar` is picked again from specifiers seen for it,
+    # dependencies of the first pick are dropped
+    wheels = resolve_wheels(["bar", "pin"], str(tmp_path))
+    assert names(wheels) == [("bar", "1.0"), ("pin", "1.0")]
+
+
+def test_resolve_wheels_variants(wheelhouse, tmp_path):
+    other = tmp_path / "other"
+    other.mkdir()
+    make_wheel(other, "bar", "1.5", {"bar.so": ""}, tag="cp311-cp311-win_amd64")
+    make_wheel(other, "foo", "2.0", {"foo/__init__.py": "DUPLICATE = 1\n"})
+    wheels = resolve_wheels(["foo"], [str(wheelhouse), str(other)], variants=True)
+    assert [os.path.relpath(w.path, tmp_path) for w in wheels] == [
+        os.path.join("wheels", "bar-1.5-py3-none-any.whl"),
+        os.path.join("other", "bar-1.5-cp311-cp311-win_amd64.whl"),
+        os.path.join("wheels", "foo-2.0-py3-none-any.whl"),
+    ]
+
+
+def test_lock_requirements(wheelhouse):
+    native = make_wheel(
+        wheelhouse, "bar", "1.5", {"bar.so": ""}, tag="cp311-cp311-win_amd64"
+    )
+    wheels = resolve_wheels(["foo"], str(wheelhouse), variants=True)
+    hashes = sorted(
+        [getsha256(native), getsha256(wheelhouse / "bar-1.5-py3-none-any.whl")]
+    )
+    assert lock_requirements(wheels, "wheels") == (
+        "# generated by hatch-kicad, installs bundled wheels only\n"
+        "--no-index\n"
+        "--find-links wheels\n"
+        "bar==1.5 \\\n"
+        f"    --hash=sha256:{hashes[0]} \\\n"
+        f"    --hash=sha256:{hashes[1]}\n"
+        "foo==2.0 \\\n"
+        f"    --hash=sha256:{getsha256(wheelhouse / 'foo-2.0-py3-none-any.whl')}\n"
+    )
+
+
+def test_resolve_wheels_platform_markers(tmp_path):
+    make_wheel(
+        tmp_path,
+        "app",
+        "1.0",
+        {"app.py": ""},
+        requires=[
+            "colorama; platform_system == 'Windows'",
+            "posix; os_name == 'posix'",
+            "shared; sys_platform == 'win32'",
+        ],
+    )
+    make_wheel(tmp_path, "colorama", "0.4", {"colorama.py": ""})
+    make_wheel(tmp_path, "posix", "1.0", {"posix.py": ""}, requires=["shared"])
+    make_wheel(tmp_path, "shared", "1.0", {"shared.py": ""})
+    # dependencies of other platforms are bundled too, pip skips them
+    wheels = resolve_wheels(["app"], str(tmp_path), variants=True)
+    assert [(w.name, w.marker) for w in wheels] == [
+        ("app", ""),
+        ("colorama", 'sys_platform == "win32"'),
+        ("posix", 'sys_platform == "darwin" or sys_platform == "linux"'),
+        ("shared", ""),
+    ]
+    lock = lock_requirements(wheels, "wheels")
+    assert 'colorama==0.4; sys_platform == "win32" \\\n    --hash=sha256:' in lock
+
+
+def test_cache_wheels(wheelhouse, tmp_path):
+    cache = tmp_path / "cache"
+    cache.mkdir()
+    cache_wheels(resolve_wheels(["foo"], str(wheelhouse)), str(cache))
+    assert sorted(os.listdir(cache)) == [
+        "bar-1.5-py3-none-any.whl",
+        "foo-2.0-py3-none-any.whl",
+    ]
+    # cached wheels are used when missing in project wheelhouse
+    os.remove(wheelhouse / "bar-1.5-py3-none-any.whl")
+    wheels = resolve_wheels(["foo"], [str(wheelhouse), str(cache)])
+    assert wheels[0].path == str(cache / "bar-1.5-py3-none-any.whl")
+    cache_wheels(wheels, str(cache))
+
+
+@pytest.mark.parametrize(
+    "requirements,message",
+    [
+        (["missing"], "No wheel satisfying `missing` found in"),
+        (["bar", "old"], "No wheel satisfying `bar` .* narrowed it to `<1.0`"),
+        (["not valid!"], "Invalid requirement `not valid!`"),
+        (["native"], "Wheel `native-1.0-cp311-cp311-linux_x86_64.whl` is not pure"),
+    ],
+)
+def test_resolve_wheels_error(requirements, message, wheelhouse):
+    with pytest.raises(ValueError, match=message):
+        resolve_wheels(requirements, str(wheelhouse), pure=True)
+
+
+def test_extract_wheels(wheelhouse, tmp_path):
+    cache = tmp_path / "cache"
+    cache.mkdir()
+    wheels = resolve_wheels(["foo"], str(wheelhouse))
+    extracted = extract_wheels(wheels, str(cache))
+    assert len(extracted) == 2
+    assert sorted(os.listdir(cache)) == sorted(os.path.basename(e) for e in extracted)
+    assert [relpath for _, relpath in iter_wheel_files(extracted[0])] == [
+        "bar-1.5.dist-info/METADATA",
+        "bar-1.5.dist-info/RECORD",
+        "bar-1.5.dist-info/WHEEL",
+        "bar.py",
+    ]
+
+    # extracted wheels are reused
+    marker = os.path.join(extracted[1], "marker")
+    open(marker, "w").close()
+    assert extract_wheels(wheels, str(cache)) == extracted
+    assert os.path.isfile(marker)
+
+
+def test_iter_wheel_files_skip(tmp_path):
+    for name in ["pkg/__init__.py", "pkg/__pycache__/x.pyc", "x-1.data/scripts/x"]:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+    assert [relpath for _, relpath in iter_wheel_files(tmp_path)] == ["pkg/__init__.py"]
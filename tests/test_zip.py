@@ -0,0 +1,167 @@
+# SPDX-FileCopyrightText: 2023-present adamws <adamws@users.noreply.github.com>
+#
+# SPDX-License-Identifier: MIT
+import struct
+import zipfile
+
+import pytest
+
+from hatch_kicad.progress import Progress, format_duration
+from hatch_kicad.zip import ZipArchive
+
+EOCD64_SIGNATURE = b"PK\x06\x06"
+
+
+@pytest.fixture
+def sources(tmp_path):
+    files = []
+    for i in range(20):
+        path = tmp_path / f"file{i}.bin"
+        path.write_bytes(bytes([i]) * (1000 * i))
+        files.append(path)
+    return files
+
+
+@pytest.fixture
+def zip64_limits(monkeypatch):
+    # every member larger than 100 bytes and archive with more than 10 entries
+    # require zip64 records, same code paths as for real >4 GiB / >65535 limits
+    monkeypatch.setattr(zipfile, "ZIP64_LIMIT", 100)
+    monkeypatch.setattr(zipfile, "ZIP_FILECOUNT_LIMIT", 10)
+
+
+def has_zip64_extra(extra: bytes) -> bool:
+    i = 0
+    while i + 4 <= len(extra):
+        field_id, size = struct.unpack_from("<HH", extra, i)
+        if field_id == 1:
+            return True
+        i += 4 + size
+    return False
+
+
+def zip64_members(path) -> list[str]:
+    """
+    Returns names of members which central directory entries have zip64 extra.
+    """
+    with zipfile.ZipFile(path) as z:
+        return [info.filename for info in z.infolist() if has_zip64_extra(info.extra)]
+
+
+def assert_archive(path, sources):
+    with zipfile.ZipFile(path) as z:
+        assert z.testzip() is None
+        assert len(z.infolist()) == len(sources)
+        for source in sources:
+            assert z.read(source.name) == source.read_bytes()
+
+
+@pytest.mark.usefixtures("zip64_limits")
+def test_zip64_write(tmp_path, sources):
+    target = tmp_path / "large.zip"
+    with ZipArchive(target, reproducible=True) as zipf:
+        for source in sources:
+            zipf.write(source, source.name)
+
+    assert EOCD64_SIGNATURE in target.read_bytes()
+    assert zip64_members(target) == [s.name for s in sources if s.stat().st_size]
+    assert_archive(target, sources)
+
+
+@pytest.mark.usefixtures("zip64_limits")
+def test_zip64_copy_raw(tmp_path, sources):
+    source = tmp_path / "source.zip"
+    with ZipArchive(source, reproducible=True) as zipf:
+        for path in sources:
+            zipf.write(path, path.name)
+
+    target = tmp_path / "copy.zip"
+    with zipfile.ZipFile(source) as z, ZipArchive(target, reproducible=True) as zipf:
+        for info in z.infolist():
+            zipf.copy_raw(z, info)
+
+    assert EOCD64_SIGNATURE in target.read_bytes()
+    assert_archive(target, sources)
+
+
+def test_member_stats(tmp_path, sources):
+    source = tmp_path / "source.zip"
+    with ZipArchive(source, reproducible=True) as zipf:
+        for path in sources:
+            zipf.write(path, path.name)
+
+    assert [m.name for m in zipf.members] == [s.name for s in sources]
+    assert [m.size for m in zipf.members] == [s.stat().st_size for s in sources]
+    assert all(m.compress_size == m.size for m in zipf.members)
+    assert all(m.time >= 0 for m in zipf.members)
+
+    target = tmp_path / "copy.zip"
+    with zipfile.ZipFile(source) as z, ZipArchive(target, reproducible=True) as zipf:
+        for info in z.infolist():
+            zipf.copy_raw(z, info)
+
+    assert [m.name for m in zipf.members] == [s.name for s in sources]
+    assert [m.size for m in zipf.members] == [s.stat().st_size for s in sources]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_progress():
+    clock = FakeClock()
+    reports = []
+    progress = Progress(4, 40 * 2**20, reports.append, interval=1.0, clock=clock)
+    progress.advance(10 * 2**20, 1)
+    assert reports == []
+
+    clock.now = 2.0
+    progress.advance(10 * 2**20, 1)
+    # rate limited, no report before interval elapses
+    clock.now = 2.5
+    progress.advance(files=1)
+    assert reports == ["2/4 files, 20.0/40.0 MiB, 10.0 MiB/s, ETA 2s"]
+
+    clock.now = 4.0
+    progress.advance(20 * 2**20, 1)
+    progress.finish()
+    assert reports[1:] == [
+        "4/4 files, 40.0/40.0 MiB, 10.0 MiB/s, ETA 0s",
+        "4 files, 40.0 MiB processed in 4s (10.0 MiB/s)",
+    ]
+
+
+def test_progress_quick():
+    reports = []
+    progress = Progress(1, 10, reports.append, interval=1.0, clock=FakeClock())
+    progress.advance(10, 1)
+    progress.finish()
+    assert reports == []
+
+
+@pytest.mark.parametrize(
+    "seconds,expected", [(0, "0s"), (59.9, "59s"), (61, "1m01s"), (3720, "1h02m")]
+)
+def test_format_duration(seconds, expected):
+    assert format_duration(seconds) == expected
+
+
+def test_zip_progress(tmp_path, sources):
+    class TickingClock(FakeClock):
+        def __call__(self):
+            self.now += 1.0
+            return self.now
+
+    reports = []
+    total = sum(s.stat().st_size for s in sources)
+    progress = Progress(len(sources), total, reports.append, clock=TickingClock())
+    with ZipArchive(tmp_path / "p.zip", reproducible=True, progress=progress) as zipf:
+        for source in sources:
+            zipf.write(source, source.name)
+    assert progress.files_done == len(sources)
+    assert progress.bytes_done == total
+    assert reports[-1].startswith(f"{len(sources)} files, ")
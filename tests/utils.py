@@ -50,3 +50,33 @@ def assert_zip_content(
         # to catch possible bug where `reproducible` is always on
         for info in zip_info:
             assert info.date_time[0] >= 2023
+
+
+def make_wheel(
+    directory,
+    name: str,
+    version: str,
+    files: dict[str, str],
+    *,
+    requires: list[str] | None = None,
+    tag: str = "py3-none-any",
+) -> str:
+    """
+    Write minimal wheel with `files` and `Requires-Dist` dependencies
+    to `directory`, returns its path.
+    """
+    dist_info = f"{name}-{version}.dist-info"
+    metadata = f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n"
+    metadata += "".join(f"Requires-Dist: {r}\n" for r in requires or [])
+    pure = "true" if tag.endswith("none-any") else "false"
+    path = f"{directory}/{name}-{version}-{tag}.whl"
+    with zipfile.ZipFile(path, "w") as z:
+        for arcname, content in files.items():
+            z.writestr(arcname, content)
+        z.writestr(f"{dist_info}/METADATA", metadata)
+        z.writestr(
+            f"{dist_info}/WHEEL",
+            f"Wheel-Version: 1.0\nRoot-Is-Purelib: {pure}\nTag: {tag}\n",
+        )
+        z.writestr(f"{dist_info}/RECORD", "")
+    return path